@@ -1,17 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.rag_services import RAGService
+from app.services.ingestion_jobs import IngestionJobQueue
+from pipeline.embeddings.bulk_embedder import BulkEmbedder
 from fastapi import UploadFile, File
 from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+import hashlib
 import shutil
+import uuid
 import os
-from app.core.security import create_access_token,verify_token
+from app.core.security import create_access_token,verify_token,verify_metrics_token
 from app.core.logger import setup_logger
 from app.core.config import settings
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.vector_store.collections import DEFAULT_COLLECTION
 from fastapi import Depends
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pipeline.metrics import current_profile, requests_in_flight, stage_timer
+import json
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter()
 rag_service = RAGService()
+ingestion_jobs = IngestionJobQueue(
+    rag_service,
+    BulkEmbedder(
+        model_name=settings.EMBEDDING_MODEL,
+        workers=settings.INGEST_WORKERS,
+        cache=rag_service.embedding_cache,
+        backend=settings.EMBEDDING_BACKEND,
+        model_dir=settings.EMBEDDING_MODEL_DIR
+    )
+)
 logger = setup_logger()
 
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
@@ -19,20 +40,53 @@ ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 
 class QueryRequest(BaseModel):
     question : str
+    # Collections to search (in parallel); the default collection if omitted
+    collections : Optional[List[str]] = None
+    # Optional scope: only chunks of these documents / uploaded in this range
+    filenames : Optional[List[str]] = None
+    uploaded_after : Optional[datetime] = None
+    uploaded_before : Optional[datetime] = None
+
+    def filters(self) -> Optional[SearchFilter]:
+        search_filter = SearchFilter(self.filenames, self.uploaded_after, self.uploaded_before)
+        return None if search_filter.is_empty() else search_filter
+
+
+def _collection(name: str) -> str:
+    if not rag_service.collections.exists(name):
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    return name
+
+
+def _raw_dir(collection: str) -> str:
+    # Uploaded files of different collections may share a name
+    if collection == DEFAULT_COLLECTION:
+        return "data/raw"
+
+    return os.path.join("data/raw", collection)
 
 
 @router.get("/health")
 def health():
-    return {
-        "status": "healthy",
-        "documents_indexed": len(rag_service.list_documents())
-    }
+    # Liveness only: never loads or reads an index
+    return {"status": "healthy", "ready": rag_service.ready.is_set()}
 
-@router.post("/upload")
+@router.get("/ready")
+def ready():
+    # Readiness: 503 until the model and the default index are loaded
+    if not rag_service.ready.is_set():
+        return JSONResponse(status_code=503, content=rag_service.startup)
+
+    return dict(rag_service.startup, documents_indexed=rag_service.document_count())
+
+@router.post("/upload", status_code=202)
 def upload_document(
     file: UploadFile = File(...),
+    collection: str = Query(DEFAULT_COLLECTION),
     current_user: str = Depends(verify_token)
 ):
+    _collection(collection)
 
     if not file.filename.lower().endswith((".pdf", ".docx")):
         raise HTTPException(status_code=400, detail="Unsupported file type")
@@ -47,23 +101,55 @@ def upload_document(
 
     filename = os.path.basename(file.filename)
 
-    existing_files = [
-        doc["filename"] for doc in rag_service.list_documents()
-    ]
+    content_hash = hashlib.sha256(file.file.read()).hexdigest()
+    file.file.seek(0)
+
+    # Same bytes already indexed (under any name): nothing to parse or embed
+    duplicate = rag_service.find_duplicate(content_hash, collection)
 
-    if filename.lower() in [f.lower() for f in existing_files]:
-        raise HTTPException(status_code=400, detail="Document already indexed")
+    if duplicate is not None:
+        if duplicate["filename"].lower() == filename.lower():
+            raise HTTPException(status_code=400, detail="Document already indexed")
 
-    save_path = os.path.join("data/raw", filename)
+        return JSONResponse(status_code=200, content={
+            "status": "duplicate",
+            "filename": filename,
+            "duplicate_of": duplicate["filename"]
+        })
 
-    with open(save_path, "wb") as buffer:
+    os.makedirs(_raw_dir(collection), exist_ok=True)
+    save_path = os.path.join(_raw_dir(collection), filename)
+    # Written aside; renamed over save_path once no other job uses that name
+    upload_path = f"{save_path}.{uuid.uuid4().hex}.tmp"
+
+    with open(upload_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    result = rag_service.add_document(save_path)
+    # Parsing and embedding happen in the ingestion workers. A changed
+    # version of an indexed file replaces it, re-embedding only new chunks
+    job = ingestion_jobs.submit_unique(
+        save_path,
+        upload_path,
+        known_hashes=rag_service.chunk_hashes(filename, collection),
+        collection=collection
+    )
+
+    if job is None:
+        os.remove(upload_path)
+        raise HTTPException(status_code=400, detail="Document is already being indexed")
+
+    logger.info(f"User {current_user} uploaded {filename} to {collection} (job {job['job_id']})")
+
+    return job
 
-    logger.info(f"User {current_user} uploaded {filename}")
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str, user: str = Depends(verify_token)):
+    job = ingestion_jobs.get(job_id)
 
-    return result
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
 
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -78,40 +164,100 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @router.post("/query")
-def ask_question(
+async def ask_question(
+    request: QueryRequest,
+    user: str = Depends(verify_token)
+):
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    # {"answer": ..., "usage": prompt tokens, passages and generation time}
+    return await rag_service.aquery(request.question, request.filters(), request.collections)
+
+@router.post("/query/stream")
+async def ask_question_stream(
     request: QueryRequest,
     user: str = Depends(verify_token)
 ):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
-    answer = rag_service.query(request.question)
+    # Checked before the 200 and the stream headers are sent
+    for name in request.collections or []:
+        _collection(name)
 
-    return {"answer": answer}
+    # Set when the client sent X-Profile; headers go out before generation ends
+    stages = current_profile()
+
+    async def events():
+        # Server-sent events: sources first, then tokens as they arrive
+        try:
+            async for event in rag_service.aquery_stream(
+                request.question, request.filters(), request.collections
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+        except HTTPException as e:
+            # E.g. a collection dropped since the check above
+            yield f"data: {json.dumps({'type': 'error', 'detail': e.detail})}\n\n"
+        except RuntimeError as e:
+            logger.error(f"Streaming query failed: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+        if stages is not None:
+            profile = {key: round(seconds * 1000, 3) for key, seconds in stages.items()}
+            yield f"data: {json.dumps({'type': 'profile', 'stages_ms': profile})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 @router.get("/documents")
-def list_documents(user: str = Depends(verify_token)):
-    return rag_service.list_documents()
+def list_documents(collection: str = Query(DEFAULT_COLLECTION), user: str = Depends(verify_token)):
+    return rag_service.list_documents(_collection(collection))
 
 @router.delete("/documents/{filename}")
-def delete_document(filename : str, user : str = Depends(verify_token)):
-    logger.info(f"User {user} deleted {filename}")
-    return rag_service.delete_document(filename)
+def delete_document(filename : str, collection : str = Query(DEFAULT_COLLECTION),
+                    user : str = Depends(verify_token)):
+    logger.info(f"User {user} deleted {filename} from {collection}")
+    return rag_service.delete_document(filename, _collection(collection))
+
+@router.get("/collections")
+def list_collections(user: str = Depends(verify_token)):
+    return rag_service.list_collections()
+
+@router.post("/collections/{name}", status_code=201)
+def create_collection(name: str, user: str = Depends(verify_token)):
+    logger.info(f"User {user} created collection {name}")
+    return rag_service.create_collection(name)
+
+@router.delete("/collections/{name}")
+def drop_collection(name: str, user: str = Depends(verify_token)):
+    logger.info(f"User {user} dropped collection {name}")
+    return rag_service.drop_collection(name)
 
 
 @router.get("/metrics")
 def metrics(user: str = Depends(verify_token)):
+    # Both totals are across all collections
+    unique_docs = rag_service.document_count()
 
-    total_chunks = len(rag_service.vector_store.text_chunks)
-
-    unique_docs = len(set(
-        chunk["filename"]
-        for chunk in rag_service.vector_store.text_chunks
-        if isinstance(chunk, dict)
-    ))
+    total_chunks = rag_service.chunk_count()
 
     return {
         "documents_indexed": unique_docs,
         "total_chunks": total_chunks,
-        "vector_dimension": rag_service.vector_store.dimension
+        "vector_dimension": rag_service.vector_store.dimension,
+        "collections": rag_service.collections.stats(),
+        "embedding_cache": rag_service.embedding_cache.stats(),
+        "answer_cache": rag_service.answer_cache.stats(),
+        "query_embedding_batches": rag_service.query_embedder.stats(),
+        "requests_in_flight": requests_in_flight.value,
+        "prompt_tokens": rag_service.prompt_tokens.snapshot(),
+        # Seconds per stage of queries and ingestion
+        "stages": stage_timer.snapshot()
     }
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+def prometheus_metrics(user: str = Depends(verify_metrics_token)):
+    # Collection names and sizes: authenticated like /metrics
+    return PlainTextResponse(
+        rag_service.prometheus_metrics(), media_type="text/plain; version=0.0.4"
+    )
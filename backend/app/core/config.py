@@ -9,6 +9,49 @@ class Settings:
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "admin123")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    EMBEDDINGS_DIR: str = os.getenv("EMBEDDINGS_DIR", "data/embeddings")
+    # flat | ivf_flat | ivf_pq | hnsw, used once the corpus reaches INDEX_PROMOTE_AT chunks
+    INDEX_TYPE: str = os.getenv("INDEX_TYPE", "flat")
+    INDEX_PROMOTE_AT: int = int(os.getenv("INDEX_PROMOTE_AT", "50000"))
+    INDEX_NPROBE: int = int(os.getenv("INDEX_NPROBE", "16"))
+    INDEX_EF_SEARCH: int = int(os.getenv("INDEX_EF_SEARCH", "64"))
+    # float32 | fp16 | sq8 | pq; re-rank INDEX_RERANK x top_k candidates with exact vectors
+    INDEX_ENCODING: str = os.getenv("INDEX_ENCODING", "float32")
+    INDEX_RERANK: int = int(os.getenv("INDEX_RERANK", "1"))
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    # torch | onnx | onnx_int8; ONNX exports are written under EMBEDDING_MODEL_DIR on first use
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_MODEL_DIR: str = os.getenv("EMBEDDING_MODEL_DIR", "data/models")
+    # Chunk sizes in embedding-model tokens; keep CHUNK_TOKENS below the model's limit (256 for MiniLM)
+    CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", "128"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "500000"))
+    # dense | hybrid (dense + BM25, fused with rrf or weighted scores)
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "hybrid")
+    HYBRID_FUSION: str = os.getenv("HYBRID_FUSION", "rrf")
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_DENSE_WEIGHT: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.5"))
+    # background: load the model and the default index after the server starts (/ready reports it)
+    # eager: before it starts; lazy: on the first request that needs them
+    STARTUP_MODE: str = os.getenv("STARTUP_MODE", "background")
+    # Collections kept in memory (least recently used beyond this are unloaded)
+    COLLECTIONS_MAX_LOADED: int = int(os.getenv("COLLECTIONS_MAX_LOADED", "8"))
+    SHARD_SEARCH_WORKERS: int = int(os.getenv("SHARD_SEARCH_WORKERS", "8"))
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "2"))
+    RETRIEVAL_WORKERS: int = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+    QUERY_EMBED_BATCH_SIZE: int = int(os.getenv("QUERY_EMBED_BATCH_SIZE", "32"))
+    QUERY_EMBED_WAIT_MS: float = float(os.getenv("QUERY_EMBED_WAIT_MS", "5"))
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+    # Static bearer token for Prometheus scrapes of /metrics/prometheus (unset: login tokens only)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    # Chunks retrieved per query; merged and packed into at most CONTEXT_TOKEN_BUDGET
+    # tokens (counted with the embedding tokenizer, an estimate of the LLM's)
+    CONTEXT_CANDIDATES: int = int(os.getenv("CONTEXT_CANDIDATES", "12"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
 
 settings = Settings()
 
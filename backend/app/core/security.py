@@ -1,3 +1,4 @@
+import hmac
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException
 from datetime import datetime, timedelta
@@ -36,4 +37,12 @@ def verify_token(token: str = Depends(oauth2_scheme)):
         return username
 
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+
+def verify_metrics_token(token: str = Depends(oauth2_scheme)):
+    # Scrapers use the long-lived METRICS_TOKEN; a login token works too
+    if settings.METRICS_TOKEN and hmac.compare_digest(token, settings.METRICS_TOKEN):
+        return "metrics"
+
+    return verify_token(token)
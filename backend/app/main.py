@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from app.api.routes import router, ingestion_jobs, rag_service
+from pipeline.metrics import profile, requests_in_flight, server_timing
 
 app = FastAPI(title="Enterprise Document Intelligence API")
 
@@ -14,6 +15,32 @@ app.add_middleware(
 
 app.include_router(router)
 
+@app.on_event("startup")
+async def warm_up():
+    rag_service.start_warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    ingestion_jobs.shutdown()
+    await rag_service.generator.aclose()
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # X-Profile: 1 returns the request's stage breakdown in a Server-Timing header
+    requests_in_flight.inc()
+
+    try:
+        if request.headers.get("x-profile", "").lower() not in ("1", "true"):
+            return await call_next(request)
+
+        with profile() as stages:
+            response = await call_next(request)
+
+        response.headers["Server-Timing"] = server_timing(stages)
+        return response
+    finally:
+        requests_in_flight.dec()
+
 @app.middleware("http")
 async def limit_upload_size(request: Request, call_next):
     max_size = 10 * 1024 * 1024  # 10MB
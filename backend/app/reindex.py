@@ -0,0 +1,139 @@
+"""
+Offline bulk indexing with the multi-process BulkEmbedder.
+
+    # re-embed every stored chunk (e.g. after a model change) into a new store
+    python -m app.reindex reembed --output data/embeddings.new
+
+    # parse, chunk and embed every PDF/DOCX in a directory into the store
+    python -m app.reindex ingest data/raw
+
+Run these while the API is stopped: the store has a single writer.
+"""
+import argparse
+import os
+from itertools import islice
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.rag_services import RAGService
+from pipeline.embeddings.bulk_embedder import BulkEmbedder
+from pipeline.embeddings.embedder import BACKENDS, Embedder
+from pipeline.embeddings.embedding_cache import EmbeddingCache
+from pipeline.vector_store.document_registry import file_fingerprint
+from pipeline.vector_store.faiss_store import FAISSStore
+
+logger = setup_logger()
+
+DIMENSION = 384
+
+def reembed(args, embedder: BulkEmbedder):
+    index_config = RAGService.configured_index()
+
+    source = FAISSStore(dimension=DIMENSION, embedder=None, index_config=index_config)
+    source.load(args.store, read_only=True)
+
+    target = FAISSStore(dimension=DIMENSION, embedder=None, index_config=index_config)
+
+    ids = source.text_chunks.ids()
+    logger.info(f"Re-embedding {len(ids)} chunks from {args.store} into {args.output}")
+
+    # Chunks are decoded lazily, once for the texts and once for the metadata
+    texts = (source.text_chunks.get(i)["text"] for i in ids)
+    chunks = (source.text_chunks.get(i) for i in ids)
+
+    for vectors in embedder.embed_iter(texts):
+        batch = list(islice(chunks, len(vectors)))
+        for chunk in batch:
+            chunk.pop("vector_id", None)
+
+        target.add(vectors, batch)
+        # One segment per window; background compaction merges them
+        target.save(args.output)
+
+        logger.info(f"{embedder.chunks_embedded}/{len(ids)} chunks, {embedder.chunks_per_second:.1f} chunks/s")
+
+    # Carry over what the chunks themselves do not record
+    target.update_documents({
+        record["filename"]: {"content_hash": record["content_hash"], "size_bytes": record["size_bytes"]}
+        for record in source.documents.documents()
+    })
+
+    target.save(args.output)
+    # With the index checkpoint on disk, the server starts without rebuilding it
+    target.checkpoint()
+
+
+def ingest(args, embedder: BulkEmbedder):
+    store = FAISSStore(dimension=DIMENSION, embedder=None, index_config=RAGService.configured_index())
+
+    if FAISSStore.exists(args.store):
+        store.load(args.store)
+
+    for name in sorted(os.listdir(args.directory)):
+        if not name.lower().endswith((".pdf", ".docx")) or store.documents.get(name) is not None:
+            continue
+
+        file_path = os.path.join(args.directory, name)
+        chunks = RAGService.split_document(file_path)
+
+        if not chunks:
+            logger.warning(f"No text extracted from {name}")
+            continue
+
+        vectors = embedder.embed([chunk.text for chunk in chunks])
+        content_hash, size_bytes = file_fingerprint(file_path)
+
+        store.add(
+            vectors,
+            RAGService.chunk_metadata(file_path, chunks),
+            document={"content_hash": content_hash, "size_bytes": size_bytes}
+        )
+        store.save(args.store)
+
+        logger.info(f"Indexed {name}: {len(chunks)} chunks, {embedder.chunks_per_second:.1f} chunks/s")
+
+    store.checkpoint()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk (re)indexing")
+    parser.add_argument("--store", default=settings.EMBEDDINGS_DIR)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--backend", default=settings.EMBEDDING_BACKEND, choices=BACKENDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reembed_parser = commands.add_parser("reembed")
+    reembed_parser.add_argument("--output", required=True)
+
+    ingest_parser = commands.add_parser("ingest")
+    ingest_parser.add_argument("directory")
+
+    args = parser.parse_args()
+
+    embedder = BulkEmbedder(
+        model_name=args.model,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        cache=EmbeddingCache(settings.EMBEDDING_CACHE_PATH, Embedder.cache_namespace(args.model, args.backend)),
+        backend=args.backend,
+        model_dir=settings.EMBEDDING_MODEL_DIR
+    )
+
+    try:
+        if args.command == "reembed":
+            reembed(args, embedder)
+        else:
+            ingest(args, embedder)
+    finally:
+        embedder.shutdown()
+
+    logger.info(
+        f"Embedded {embedder.chunks_embedded} chunks in {embedder.seconds:.1f}s "
+        f"({embedder.chunks_per_second:.1f} chunks/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
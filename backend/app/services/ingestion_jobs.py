@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import FrozenSet, Optional
+from app.core.logger import setup_logger
+from pipeline.embeddings.bulk_embedder import BulkEmbedder, worker_embedder
+from pipeline.metrics import profile, stage_timer
+from pipeline.vector_store.collections import DEFAULT_COLLECTION
+
+logger = setup_logger()
+
+def _prepare_document(file_path: str, known_hashes: FrozenSet[str] = frozenset()) -> dict:
+    # Runs in a worker process: parse, chunk and embed, but never touch the index.
+    # Chunks already indexed for this file (known_hashes) are not re-embedded
+    from app.services.rag_services import RAGService
+    from pipeline.vector_store.document_registry import chunk_fingerprint
+
+    # Stage timings go back with the result, to the server's histograms
+    with profile() as stages:
+        chunks = RAGService.split_document(file_path)
+        rows = [i for i, chunk in enumerate(chunks) if chunk_fingerprint(chunk.text) not in known_hashes]
+
+        with stage_timer.span("ingest", "embed"):
+            embeddings = worker_embedder().embed([chunks[i].text for i in rows]) if rows else None
+
+    return {"chunks": chunks, "embeddings": embeddings, "embedded_rows": rows, "stages": stages}
+
+
+class IngestionJobQueue:
+    # Parsing and embedding run on the embedder's pool; one thread writes the index
+
+    def __init__(self, rag_service, embedder: BulkEmbedder, max_finished_jobs: int = 1000):
+        self.rag_service = rag_service
+        self.embedder = embedder
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._results: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self.jobs[job_id].update(fields)
+
+    def submit_unique(self, file_path: str, upload_path: str,
+                      known_hashes: FrozenSet[str] = frozenset(),
+                      collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        # None while a job for the same file is queued or indexing. The
+        # upload, written aside to upload_path, is renamed over file_path
+        # only once this job holds the name, so no running job reads a
+        # file being overwritten
+        filename = os.path.basename(file_path)
+        job_id = uuid.uuid4().hex
+
+        job = {
+            "job_id": job_id,
+            "collection": collection,
+            "filename": filename,
+            # queued -> indexing -> completed | failed
+            "state": "queued",
+            "progress": 0.0,
+            "chunks": 0,
+            "chunks_reused": 0,
+            "error": None,
+            "submitted_at": datetime.utcnow().isoformat(),
+            "finished_at": None
+        }
+
+        with self._lock:
+            if filename.lower() in self._active_filenames(collection):
+                return None
+
+            self.jobs[job_id] = job
+            self._forget_finished()
+
+        try:
+            os.replace(upload_path, file_path)
+            future = self.embedder.submit(_prepare_document, file_path, frozenset(known_hashes))
+        except Exception as e:
+            # Failed, not left queued: a queued file cannot be uploaded again
+            logger.error(f"Ingestion job {job_id} could not be started: {e}")
+            self._update(
+                job_id, state="failed", error=str(e), finished_at=datetime.utcnow().isoformat()
+            )
+            return self.get(job_id)
+
+        future.add_done_callback(
+            lambda f: self._results.put((job_id, file_path, collection, f))
+        )
+
+        return self.get(job_id)
+
+    def _write_loop(self):
+        # The only thread that writes uploads into the index
+        while True:
+            job_id, file_path, collection, future = self._results.get()
+            self._index(job_id, file_path, collection, future)
+
+    def _index(self, job_id: str, file_path: str, collection: str, future: Future):
+        try:
+            result = future.result()
+            stage_timer.record(result["stages"])
+
+            self._update(
+                job_id, state="indexing", progress=0.8, chunks=len(result["chunks"])
+            )
+
+            indexed = self.rag_service.index_document(
+                file_path, result["chunks"], result["embeddings"], result["embedded_rows"],
+                collection=collection
+            )
+
+            self._update(
+                job_id, state="completed", progress=1.0,
+                chunks_reused=indexed["chunks_reused"],
+                finished_at=datetime.utcnow().isoformat()
+            )
+
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+
+            self._update(
+                job_id, state="failed", error=str(e),
+                finished_at=datetime.utcnow().isoformat()
+            )
+
+    def _forget_finished(self):
+        # Caller holds self._lock; keep the newest finished jobs only
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job["state"] in ("completed", "failed")
+        ]
+
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _active_filenames(self, collection: str):
+        # Caller holds self._lock
+        return {
+            job["filename"].lower() for job in self.jobs.values()
+            if job["state"] not in ("completed", "failed") and job["collection"] == collection
+        }
+
+    def shutdown(self):
+        self.embedder.shutdown()
@@ -1,24 +1,118 @@
 import os
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+import numpy as np
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 from pipeline.embeddings.embedder import Embedder
+from pipeline.embeddings.embedding_cache import EmbeddingCache
+from pipeline.embeddings.batch_scheduler import EmbeddingBatchScheduler
 from pipeline.vector_store.faiss_store import FAISSStore
+from pipeline.vector_store.collections import CollectionManager, DEFAULT_COLLECTION
+from pipeline.vector_store.index_factory import IndexConfig
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.vector_store.document_registry import chunk_fingerprint, file_fingerprint
 from pipeline.retriever.vector_retriever import VectorRetriever
+from pipeline.retriever.hybrid_retriever import HybridRetriever
 from pipeline.llm.prompt_template import PromptTemplate
+from pipeline.llm.answer_cache import SemanticAnswerCache
+from pipeline.llm.context_packer import ContextPacker
 from pipeline.ingestion.ingestion_pipeline import IngestionPipeline
-from pipeline.chunking.recursive_chunker import RecursiveChunker
+from pipeline.chunking.recursive_chunker import Chunk, RecursiveChunker, load_tokenizer
+from pipeline.metrics import Histogram, prometheus_sample, requests_in_flight, stage_timer
 from datetime import datetime
 from pipeline.llm.generator import OllamaGenerator, OpenAIGenerator
 from fastapi import HTTPException
 from app.core.logger import setup_logger
+from app.core.config import settings
 
 logger = setup_logger()
 
+@lru_cache(maxsize=1)
+def document_chunker() -> RecursiveChunker:
+    # One per process; chunk sizes are counted with the embedding model's tokenizer
+    tokenizer = load_tokenizer(settings.EMBEDDING_MODEL)
+
+    if tokenizer is None:
+        logger.warning("Tokenizer unavailable, chunk sizes are approximated from words")
+
+    return RecursiveChunker(
+        chunk_size=settings.CHUNK_TOKENS,
+        overlap=settings.CHUNK_OVERLAP_TOKENS,
+        tokenizer=tokenizer
+    )
+
+
+def count_tokens(text: str) -> int:
+    # Embedding-model tokens: an estimate of what the LLM will count
+    return document_chunker().count_tokens(text)
+
+
+class _TimedPages:
+    # Iterates ``pages``, adding up the time spent producing them
+
+    def __init__(self, pages):
+        self.pages = iter(pages)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self.pages)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _in_context(fn, *args):
+    # For executor threads: spans they record land in the caller's profile
+    return partial(contextvars.copy_context().run, fn, *args)
+
+
 class RAGService:
 
     def __init__(self):
-        self.embedder = Embedder()
+        # Shared by ingestion and retrieval, so both hit the same cache
+        self.embedding_cache = EmbeddingCache(
+            path=settings.EMBEDDING_CACHE_PATH,
+            model_name=Embedder.cache_namespace(settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND),
+            max_entries=settings.EMBEDDING_CACHE_SIZE
+        )
+        self.embedder = Embedder(
+            model_name=settings.EMBEDDING_MODEL,
+            cache=self.embedding_cache,
+            backend=settings.EMBEDDING_BACKEND,
+            model_dir=settings.EMBEDDING_MODEL_DIR
+        )
 
-        self.vector_store = FAISSStore(dimension=384, embedder=self.embedder)
-        self.retriever = VectorRetriever(self.embedder, self.vector_store)
+        self.index_config = self.configured_index()
+
+        # Concurrent queries share model calls instead of batch-of-one encodes
+        self.query_embedder = EmbeddingBatchScheduler(
+            self.embedder,
+            max_batch_size=settings.QUERY_EMBED_BATCH_SIZE,
+            max_wait_ms=settings.QUERY_EMBED_WAIT_MS
+        )
+
+        self.answer_cache = SemanticAnswerCache(
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL,
+            max_entries=settings.ANSWER_CACHE_SIZE
+        )
+
+        # Merges overlapping chunks and fits the context into the token budget
+        self.context_packer = ContextPacker(count_tokens, token_budget=settings.CONTEXT_TOKEN_BUDGET)
+        self.prompt_tokens = Histogram([128, 256, 512, 1024, 2048, 4096, 8192])
+
+        # Runs retrieval for the async query path
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_WORKERS, thread_name_prefix="retrieval"
+        )
 
         use_ollama = os.getenv("USE_OLLAMA", "true").lower() == "true"
 
@@ -29,40 +123,395 @@ class RAGService:
             logger.info("Using OpenAI LLM")
             self.generator = OpenAIGenerator()
 
-        if os.path.exists("data/embeddings/faiss.index"):
-            self.vector_store.load(
-                index_path="data/embeddings/faiss.index",
-                chunks_path="data/embeddings/chunks.npy"
+        # One index shard per collection; the default one is the original store
+        self.collections = CollectionManager(
+            settings.EMBEDDINGS_DIR,
+            open_store=self._open_store,
+            make_retriever=self._make_retriever,
+            max_loaded=settings.COLLECTIONS_MAX_LOADED,
+            executor=ThreadPoolExecutor(
+                max_workers=settings.SHARD_SEARCH_WORKERS, thread_name_prefix="shard"
             )
+        )
+
+        # Set once the model and the default collection are loaded
+        self.ready = threading.Event()
+        self.startup = {"mode": settings.STARTUP_MODE, "state": "starting"}
+
+        if settings.STARTUP_MODE == "eager":
+            self.warm_up()
+        elif settings.STARTUP_MODE == "lazy":
+            # First requests load what they need
+            self.startup["state"] = "ready"
+            self.ready.set()
+
+    @property
+    def vector_store(self) -> FAISSStore:
+        # The default collection is never evicted; the first access loads it
+        with self.collections.use(DEFAULT_COLLECTION) as default:
+            return default.store
+
+    @property
+    def retriever(self):
+        with self.collections.use(DEFAULT_COLLECTION) as default:
+            return default.retriever
+
+    def start_warm_up(self):
+        # Background mode: the server accepts connections while this runs
+        if settings.STARTUP_MODE == "background" and self.startup["state"] == "starting":
+            threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+    def warm_up(self):
+        # Everything the first query would otherwise wait for
+        stages = {}
+
+        try:
+            for stage, load in (
+                ("index", lambda: self.vector_store),
+                ("embedding_model", self.embedder.load),
+                ("tokenizer", document_chunker)
+            ):
+                start = time.perf_counter()
+                load()
+                stages[stage] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            logger.exception("Warm-up failed")
+            self.startup.update(state="failed", error=str(e), seconds=stages)
+            return
+
+        self.startup.update(state="ready", seconds=stages)
+        self.ready.set()
+
+        logger.info(f"Ready: {stages}")
+
+    def _open_store(self, path: str) -> FAISSStore:
+        store = FAISSStore(dimension=384, embedder=self.embedder, index_config=self.index_config)
+
+        if FAISSStore.exists(path):
+            store.load(path)
         else:
-            logger.info("No existing index found. Starting fresh.")
+            logger.info(f"No existing index found in {path}. Starting fresh.")
+
+        return store
+
+    def _make_retriever(self, store: FAISSStore):
+        if settings.RETRIEVAL_MODE == "hybrid":
+            return HybridRetriever(
+                self.query_embedder,
+                store,
+                fusion=settings.HYBRID_FUSION,
+                candidates=settings.HYBRID_CANDIDATES,
+                rrf_k=settings.HYBRID_RRF_K,
+                dense_weight=settings.HYBRID_DENSE_WEIGHT,
+                executor=self.executor
+            )
 
-    def query(self, question: str):
-        results = self.retriever.retrieve(question, top_k=3)
+        return VectorRetriever(self.query_embedder, store)
 
-        # Extract text properly from metadata dict
-        context_chunks = []
+    def _scope(self, collections: Optional[List[str]]) -> List[str]:
+        # Collections a query searches; the default one when none are named
+        names = list(dict.fromkeys(collections)) if collections else [DEFAULT_COLLECTION]
+        missing = [name for name in names if not self.collections.exists(name)]
 
-        for chunk, _ in results:
-            if isinstance(chunk, dict):
-                context_chunks.append(chunk["text"])
-            else:
-                context_chunks.append(chunk)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown collection: {', '.join(missing)}")
 
-        context = "\n\n".join(context_chunks)
+        return names
 
-        prompt = PromptTemplate.build(context, question)
+    def _start_lexical(self, question: str, filters: Optional[SearchFilter], names: List[str]):
+        # Submitted before the query is embedded so BM25 overlaps the model call.
+        # The mode comes from settings: reading self.retriever may load the index
+        if settings.RETRIEVAL_MODE != "hybrid":
+            return None
+
+        return self.executor.submit(_in_context(self._lexical_search, names, question, filters))
+
+    def _lexical_search(self, names: List[str], question: str, filters: Optional[SearchFilter]):
+        with stage_timer.span("query", "lexical"):
+            return self.collections.lexical_search(names, question, filters)
+
+    def _default_version(self) -> int:
+        # Loads the default collection on first use
+        return self.vector_store.version
+
+    def _answer_cache(self, filters: Optional[SearchFilter], names: List[str]):
+        # Cached answers belong to the unfiltered default collection; scoped
+        # queries neither read nor write them
+        if filters is not None and not filters.is_empty():
+            return None
+
+        if names != [DEFAULT_COLLECTION]:
+            return None
+
+        return self.answer_cache
+
+    def _build_prompt(self, question: str, query_embedding: np.ndarray, lexical=None,
+                      filters: Optional[SearchFilter] = None, names: Optional[List[str]] = None):
+        # Shards are searched in parallel and merged by score; more candidates
+        # than fit, so the packer can choose
+        with stage_timer.span("query", "search"):
+            results = self.collections.search(
+                names or [DEFAULT_COLLECTION], query_embedding, top_k=settings.CONTEXT_CANDIDATES,
+                lexical=lexical, filters=filters
+            )
+
+        with stage_timer.span("query", "prompt"):
+            packed = self.context_packer.pack(results)
+            prompt = PromptTemplate.build(packed.context, question)
+
+            usage = {
+                "prompt_tokens": count_tokens(prompt),
+                "context_tokens": packed.tokens,
+                "passages": len(packed.sources),
+                "candidates": packed.candidates
+            }
+
+        self.prompt_tokens.observe(usage["prompt_tokens"])
+
+        return prompt, packed.sources, usage
+
+    @staticmethod
+    def _generated(usage: dict, start: float) -> dict:
+        seconds = time.perf_counter() - start
+        stage_timer.observe("query", "generate", seconds)
+
+        usage["generation_ms"] = round(seconds * 1000, 1)
+        logger.info(f"Query answered: {usage}")
+
+        return usage
+
+    def query(self, question: str, filters: Optional[SearchFilter] = None,
+              collections: Optional[List[str]] = None) -> dict:
+        names = self._scope(collections)
+        lexical = self._start_lexical(question, filters, names)
+        answer_cache = self._answer_cache(filters, names)
+        with stage_timer.span("query", "embed"):
+            query_embedding = self.retriever.embed_query(question)
+        version = self.vector_store.version
+
+        # Near-duplicate questions against an unchanged index reuse the answer
+        with stage_timer.span("query", "cache_lookup"):
+            cached = answer_cache.lookup(query_embedding, version) if answer_cache else None
+        if cached is not None:
+            return {"answer": cached["answer"], "usage": {"cached": True}}
+
+        start = time.perf_counter()
+
+        prompt, sources, usage = self._build_prompt(
+            question, query_embedding, lexical.result() if lexical else None, filters, names
+        )
+
+        generation_start = time.perf_counter()
         answer = self.generator.generate(prompt)
+        self._generated(usage, generation_start)
+
+        if answer_cache is not None:
+            answer_cache.store(
+                query_embedding, version, answer, sources, time.perf_counter() - start
+            )
+
+        return {"answer": answer, "usage": usage}
+
+    def query_stream(self, question: str, filters: Optional[SearchFilter] = None,
+                     collections: Optional[List[str]] = None) -> Iterator[dict]:
+        names = self._scope(collections)
+        lexical = self._start_lexical(question, filters, names)
+        answer_cache = self._answer_cache(filters, names)
+        with stage_timer.span("query", "embed"):
+            query_embedding = self.retriever.embed_query(question)
+        version = self.vector_store.version
+
+        with stage_timer.span("query", "cache_lookup"):
+            cached = answer_cache.lookup(query_embedding, version) if answer_cache else None
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "token": cached["answer"]}
+            yield {"type": "done", "usage": {"cached": True}}
+            return
+
+        start = time.perf_counter()
+
+        # Sources are known before generation starts, so send them first
+        prompt, sources, usage = self._build_prompt(
+            question, query_embedding, lexical.result() if lexical else None, filters, names
+        )
+
+        yield {"type": "sources", "sources": sources}
+
+        tokens = []
+        generation_start = time.perf_counter()
+        for token in self.generator.stream(prompt):
+            if not tokens:
+                usage["first_token_ms"] = round((time.perf_counter() - generation_start) * 1000, 1)
+            tokens.append(token)
+            yield {"type": "token", "token": token}
+        self._generated(usage, generation_start)
+
+        if answer_cache is not None:
+            answer_cache.store(
+                query_embedding, version, "".join(tokens), sources, time.perf_counter() - start
+            )
+
+        yield {"type": "done", "usage": usage}
+
+    async def aquery(self, question: str, filters: Optional[SearchFilter] = None,
+                     collections: Optional[List[str]] = None) -> dict:
+        # Embedding and FAISS search are CPU-bound: keep them off the event loop
+        loop = asyncio.get_running_loop()
+
+        names = self._scope(collections)
+        lexical = self._start_lexical(question, filters, names)
+        answer_cache = self._answer_cache(filters, names)
+        # The retrievers embed with query_embedder; going through one would load
+        # the default collection, which must not happen on the event loop
+        with stage_timer.span("query", "embed"):
+            query_embedding = await loop.run_in_executor(
+                self.executor, self.query_embedder.embed, [question]
+            )
+        version = await loop.run_in_executor(self.executor, self._default_version)
 
-        return answer
+        with stage_timer.span("query", "cache_lookup"):
+            cached = answer_cache.lookup(query_embedding, version) if answer_cache else None
+        if cached is not None:
+            return {"answer": cached["answer"], "usage": {"cached": True}}
 
-    def add_document(self, file_path: str):
+        start = time.perf_counter()
+
+        lexical_results = await asyncio.wrap_future(lexical) if lexical else None
+        prompt, sources, usage = await loop.run_in_executor(
+            self.executor, _in_context(
+                self._build_prompt, question, query_embedding, lexical_results, filters, names
+            )
+        )
+
+        generation_start = time.perf_counter()
+        answer = await self.generator.agenerate(prompt)
+        self._generated(usage, generation_start)
+
+        if answer_cache is not None:
+            answer_cache.store(
+                query_embedding, version, answer, sources, time.perf_counter() - start
+            )
+
+        return {"answer": answer, "usage": usage}
+
+    async def aquery_stream(self, question: str, filters: Optional[SearchFilter] = None,
+                            collections: Optional[List[str]] = None) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+
+        names = self._scope(collections)
+        lexical = self._start_lexical(question, filters, names)
+        answer_cache = self._answer_cache(filters, names)
+        # The retrievers embed with query_embedder; going through one would load
+        # the default collection, which must not happen on the event loop
+        with stage_timer.span("query", "embed"):
+            query_embedding = await loop.run_in_executor(
+                self.executor, self.query_embedder.embed, [question]
+            )
+        version = await loop.run_in_executor(self.executor, self._default_version)
+
+        with stage_timer.span("query", "cache_lookup"):
+            cached = answer_cache.lookup(query_embedding, version) if answer_cache else None
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "token": cached["answer"]}
+            yield {"type": "done", "usage": {"cached": True}}
+            return
+
+        start = time.perf_counter()
+
+        lexical_results = await asyncio.wrap_future(lexical) if lexical else None
+        prompt, sources, usage = await loop.run_in_executor(
+            self.executor, _in_context(
+                self._build_prompt, question, query_embedding, lexical_results, filters, names
+            )
+        )
+
+        yield {"type": "sources", "sources": sources}
+
+        tokens = []
+        generation_start = time.perf_counter()
+        async for token in self.generator.astream(prompt):
+            if not tokens:
+                usage["first_token_ms"] = round((time.perf_counter() - generation_start) * 1000, 1)
+            tokens.append(token)
+            yield {"type": "token", "token": token}
+        self._generated(usage, generation_start)
+
+        if answer_cache is not None:
+            answer_cache.store(
+                query_embedding, version, "".join(tokens), sources, time.perf_counter() - start
+            )
+
+        yield {"type": "done", "usage": usage}
+
+    @staticmethod
+    def configured_index() -> IndexConfig:
+        # Index type and encoding of every store, from the settings
+        return IndexConfig(
+            index_type=settings.INDEX_TYPE,
+            promote_at=settings.INDEX_PROMOTE_AT,
+            nprobe=settings.INDEX_NPROBE,
+            ef_search=settings.INDEX_EF_SEARCH,
+            encoding=settings.INDEX_ENCODING,
+            rerank=settings.INDEX_RERANK
+        )
+
+    @staticmethod
+    def split_document(file_path: str) -> List[Chunk]:
+        # Parse and chunk a file; safe to run in an ingestion worker process
         ingestion = IngestionPipeline()
-        chunker = RecursiveChunker(chunk_size=300, overlap=50)
+        chunker = document_chunker()
 
-        text = ingestion.process(file_path)
-        chunks = chunker.chunk(text)
-    
+        # Pages are chunked as they are extracted, never joined into one string,
+        # so parsing time is what the chunker spends waiting for the next page
+        pages = _TimedPages(ingestion.stream(file_path))
+        start = time.perf_counter()
+        chunks = list(chunker.chunk_spans(pages))
+
+        stage_timer.observe("ingest", "load", pages.seconds)
+        stage_timer.observe("ingest", "chunk", time.perf_counter() - start - pages.seconds)
+
+        return chunks
+
+    def add_document(self, file_path: str, collection: str = DEFAULT_COLLECTION):
+        chunks = self.split_document(file_path)
+
+        # A new version of an indexed file only embeds its changed chunks
+        known = self.chunk_hashes(os.path.basename(file_path), collection)
+        rows = [i for i, chunk in enumerate(chunks) if chunk_fingerprint(chunk.text) not in known]
+        with stage_timer.span("ingest", "embed"):
+            embeddings = self.embedder.embed([chunks[i].text for i in rows]) if rows else None
+
+        return self.index_document(
+            file_path, chunks, embeddings, embedded_rows=rows, collection=collection
+        )
+
+    def find_duplicate(self, content_hash: str,
+                       collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        with self.collections.use(collection) as shard:
+            return shard.store.documents.find_by_hash(content_hash)
+
+    @staticmethod
+    def _document_vectors(store: FAISSStore, filename: str) -> Dict[str, np.ndarray]:
+        # chunk fingerprint -> stored vector, for the chunks of one document
+        vectors = {}
+
+        for vector_id in store.ids_for_filename(filename):
+            chunk = store.text_chunks.get(vector_id)
+            vector = store.vector(vector_id)
+
+            if chunk is not None and vector is not None:
+                vectors[chunk_fingerprint(chunk["text"])] = vector
+
+        return vectors
+
+    def chunk_hashes(self, filename: str, collection: str = DEFAULT_COLLECTION) -> set:
+        with self.collections.use(collection) as shard:
+            return set(self._document_vectors(shard.store, filename))
+
+    @staticmethod
+    def chunk_metadata(file_path: str, chunks: List[Chunk]) -> List[dict]:
         filename = os.path.basename(file_path)
         timestamp = datetime.utcnow().isoformat()
 
@@ -71,69 +520,209 @@ class RAGService:
         for i, chunk in enumerate(chunks):
             metadata_chunks.append({
                 "chunk_id": i,
-                "text" : chunk,
+                "text" : chunk.text,
                 "filename" : filename,
-                "uploaded_at" : timestamp
+                "uploaded_at" : timestamp,
+                "start_char" : chunk.start,
+                "end_char" : chunk.end
             })
 
-        embeddings = self.embedder.embed([c["text"] for c in metadata_chunks])
+        return metadata_chunks
 
-        self.vector_store.add(embeddings, metadata_chunks)
+    def index_document(self, file_path: str, chunks: List[Chunk], embeddings: Optional[np.ndarray],
+                       embedded_rows: Optional[List[int]] = None,
+                       collection: str = DEFAULT_COLLECTION):
+        # embedded_rows: which chunks ``embeddings`` belongs to (default: all).
+        # The others are unchanged chunks of the indexed version of this file
+        filename = os.path.basename(file_path)
+        metadata_chunks = self.chunk_metadata(file_path, chunks)
+        content_hash, size_bytes = file_fingerprint(file_path)
 
-        self.vector_store.save(
-            index_path="data/embeddings/faiss.index",
-            chunks_path="data/embeddings/chunks.npy"
-        )
+        if not chunks:
+            raise ValueError(f"No text extracted from {filename}")
+
+        if embedded_rows is None:
+            embedded_rows = list(range(len(chunks)))
+
+        with self.collections.use(collection) as shard, shard.write_lock:
+            store = shard.store
+            vectors: List[Optional[np.ndarray]] = [None] * len(chunks)
+
+            for row, vector in zip(embedded_rows, embeddings if embeddings is not None else []):
+                vectors[row] = vector
+
+            reused = self._document_vectors(store, filename)
+            reused_count = 0
+
+            for row, chunk in enumerate(chunks):
+                if vectors[row] is None:
+                    vectors[row] = reused.get(chunk_fingerprint(chunk.text))
+                    reused_count += vectors[row] is not None
+
+            # Changed since the job was planned: embed what is still missing
+            missing = [row for row, vector in enumerate(vectors) if vector is None]
+            if missing:
+                with stage_timer.span("ingest", "embed"):
+                    embedded = self.embedder.embed([chunks[i].text for i in missing])
+                for row, vector in zip(missing, embedded):
+                    vectors[row] = vector
+
+            replaced = store.ids_for_filename(filename)
+
+            # Old version out, new version in: one published snapshot, one commit
+            with stage_timer.span("ingest", "index_add"):
+                store.replace(
+                    replaced,
+                    np.stack(vectors),
+                    metadata_chunks,
+                    document={"content_hash": content_hash, "size_bytes": size_bytes}
+                )
 
-        logger.info(f"Document indexed successfully: {filename}")
+            with stage_timer.span("ingest", "save"):
+                store.save(shard.path)
+
+        logger.info(
+            f"Document indexed successfully: {filename} in {collection} "
+            f"({len(chunks) - reused_count} embedded, {reused_count} reused)"
+        )
 
         return {
-            "status": "document indexed successfully",
+            "status": "document updated successfully" if replaced else "document indexed successfully",
+            "collection": collection,
             "filename": filename,
-            "chunks_added": len(metadata_chunks)
+            "chunks_added": len(metadata_chunks),
+            "chunks_reused": reused_count
         }
     
-    def list_documents(self):
-        documents = {}
-
-        for chunk in self.vector_store.text_chunks:
-            if isinstance(chunk, dict):
-                filename = chunk["filename"]
-                uploaded_at = chunk["uploaded_at"]
-                documents[filename] = uploaded_at
+    def list_documents(self, collection: str = DEFAULT_COLLECTION):
+        with self.collections.use(collection) as shard:
+            records = shard.store.documents.documents()
 
         return [
-            {"filename": k, "uploaded_at": v}
-            for k, v in documents.items()
+            {
+                "filename": record["filename"],
+                "uploaded_at": record["uploaded_at"],
+                "chunks": record["chunk_count"],
+                "size_bytes": record["size_bytes"],
+                "content_hash": record["content_hash"]
+            }
+            for record in records
         ]
+
+    def has_document(self, filename: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        with self.collections.use(collection) as shard:
+            return shard.store.documents.get(filename) is not None
+
+    def document_count(self, collection: Optional[str] = None) -> int:
+        # Across all collections unless one is named
+        names = [collection] if collection else self.collections.names()
+        return sum(self.collections.document_count(name) for name in names)
+
+    def chunk_count(self, collection: Optional[str] = None) -> int:
+        names = [collection] if collection else self.collections.names()
+        return sum(self.collections.chunk_count(name) for name in names)
     
-    def delete_document(self, filename: str):
+    def delete_document(self, filename: str, collection: str = DEFAULT_COLLECTION):
 
-        filename = filename.strip().lower()
+        with self.collections.use(collection) as shard, shard.write_lock:
+            # Vector ids belonging to this file
+            ids = shard.store.ids_for_filename(filename)
 
-        # Count how many chunks belong to this file
-        matched_chunks = [
-            chunk for chunk in self.vector_store.text_chunks
-            if isinstance(chunk, dict)
-            and chunk["filename"].strip().lower() == filename
-        ]
+            if not ids:
+                raise HTTPException(status_code=404, detail="Document not found")
 
-        if not matched_chunks:
-            raise HTTPException(status_code=404, detail="Document not found")
+            # Remove only this file's vectors, the rest of the index is untouched
+            removed = shard.store.remove(ids)
 
-        # Keep only chunks that are NOT this file
-        filtered_chunks = [
-            chunk for chunk in self.vector_store.text_chunks
-            if isinstance(chunk, dict)
-            and chunk["filename"].strip().lower() != filename
-        ]
+            shard.store.save(shard.path)
 
-        # Rebuild index with remaining chunks
-        self.vector_store.rebuild_index(filtered_chunks)
+        logger.info("Document Deleted")
 
-        self.vector_store.save(
-            index_path="data/embeddings/faiss.index",
-            chunks_path="data/embeddings/chunks.npy"
+        return {
+            "status": "document deleted successfully",
+            "collection": collection,
+            "filename": filename.strip(),
+            "chunks_removed": removed
+        }
+
+    def prometheus_metrics(self) -> str:
+        # Prometheus text exposition format (version 0.0.4)
+        lines = stage_timer.prometheus("rag_stage_duration_seconds")
+
+        lines.append("# TYPE rag_requests_in_flight gauge")
+        lines.append(prometheus_sample("rag_requests_in_flight", requests_in_flight.value))
+
+        lines.append("# TYPE rag_ready gauge")
+        lines.append(prometheus_sample("rag_ready", int(self.ready.is_set())))
+
+        # Sizes of the collections in memory; documents of all of them
+        snapshots = sorted(
+            (name, store.snapshot) for name, store in self.collections.loaded_stores().items()
         )
+        for metric, size in (
+            ("rag_index_vectors", lambda snapshot: snapshot.ntotal),
+            ("rag_index_chunks", lambda snapshot: len(snapshot.chunks)),
+            ("rag_index_version", lambda snapshot: snapshot.version)
+        ):
+            lines.append(f"# TYPE {metric} gauge")
+            lines += [
+                prometheus_sample(metric, size(snapshot), f'collection="{name}"')
+                for name, snapshot in snapshots
+            ]
+
+        lines.append("# TYPE rag_documents_indexed gauge")
+        for name in self.collections.names():
+            lines.append(prometheus_sample(
+                "rag_documents_indexed", self.collections.document_count(name), f'collection="{name}"'
+            ))
+
+        caches = {"embedding": self.embedding_cache.stats(), "answer": self.answer_cache.stats()}
+        for metric, key, kind in (
+            ("rag_cache_hits_total", "hits", "counter"),
+            ("rag_cache_misses_total", "misses", "counter"),
+            ("rag_cache_hit_ratio", "hit_rate", "gauge"),
+            ("rag_cache_entries", "entries", "gauge")
+        ):
+            lines.append(f"# TYPE {metric} {kind}")
+            lines += [
+                prometheus_sample(metric, stats[key], f'cache="{cache}"')
+                for cache, stats in caches.items()
+            ]
+
+        lines.append("# TYPE rag_prompt_tokens histogram")
+        lines += self.prompt_tokens.prometheus("rag_prompt_tokens")
+
+        lines.append("# TYPE rag_query_embedding_batch_size histogram")
+        lines += self.query_embedder.batch_sizes.prometheus("rag_query_embedding_batch_size")
+
+        return "\n".join(lines) + "\n"
+
+    def list_collections(self) -> List[dict]:
+        return [
+            {"name": name, "documents": self.collections.document_count(name)}
+            for name in self.collections.names()
+        ]
+
+    def create_collection(self, name: str) -> dict:
+        try:
+            created = self.collections.create(name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if not created:
+            raise HTTPException(status_code=400, detail="Collection already exists")
+
+        logger.info(f"Collection created: {name}")
+        return {"status": "collection created", "name": name}
+
+    def drop_collection(self, name: str) -> dict:
+        try:
+            dropped = self.collections.drop(name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if not dropped:
+            raise HTTPException(status_code=404, detail="Collection not found")
 
-        logger.info("Document Deleted")
\ No newline at end of file
+        logger.info(f"Collection dropped: {name}")
+        return {"status": "collection dropped", "name": name}
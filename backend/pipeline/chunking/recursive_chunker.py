@@ -1,25 +1,280 @@
-from typing import List
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+import numpy as np
+
+# Split levels, coarsest first: paragraph, line, sentence, word.
+# A separator stays attached to the piece before it.
+SEPARATORS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?;:])\s+"),
+    re.compile(r"\s+"),
+]
+
+# Without a model tokenizer, every word and every punctuation mark counts
+# as one token (a lower bound on word-piece counts). ASCII character
+# classes: 0 space, 1 word, 2 punctuation; everything else is a word char
+_ASCII_CLASS = np.full(128, 2, dtype="uint8")
+_ASCII_CLASS[[9, 10, 11, 12, 13, 32]] = 0
+for _low, _high in ((48, 57), (65, 90), (97, 122), (95, 95)):
+    _ASCII_CLASS[_low:_high + 1] = 1
+
+def _fallback_token_starts(text: str) -> np.ndarray:
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype="uint32")
+    classes = np.where(codes < 128, _ASCII_CLASS[np.minimum(codes, 127)], 1)
+
+    word = classes == 1
+    previous_word = np.concatenate([[False], word[:-1]])
+    return np.flatnonzero((classes == 2) | (word & ~previous_word))
+
+
+# A streamed document is cut at a paragraph break when one is buffered,
+# otherwise at the last line break / space once this much text is waiting
+MAX_BUFFER_CHARS = 1 << 20
+
+
+class Chunk(NamedTuple):
+    text: str
+    # Character offsets into the streamed document, end exclusive
+    start: int
+    end: int
+    tokens: int
+
+
+class _Span(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(model_name: str):
+    # Fast (Rust) tokenizer of the embedding model; None if unavailable
+    try:
+        from transformers import AutoTokenizer
+
+        repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        return AutoTokenizer.from_pretrained(repo, use_fast=True)
+    except Exception:
+        return None
+
 
 class RecursiveChunker:
+    # Splits on paragraphs, lines, sentences and words, and packs the pieces
+    # into chunks of at most chunk_size tokens
 
-    def __init__(self, chunk_size : int = 500, overlap : int = 50):
+    def __init__(self, chunk_size : int = 128, overlap : int = 16, tokenizer = None,
+                 batch_size : int = 64):
         if overlap >= chunk_size:
             raise ValueError("overlap must be smaller than chunk size")
-        
+
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+
+    # ---------------- public API ----------------
 
     def chunk(self, text : str) -> List[str]:
+        return list(self.chunk_stream([text]))
+
+    def chunk_stream(self, segments : Iterable[str]) -> Iterator[str]:
+        for chunk in self.chunk_spans(segments):
+            yield chunk.text
+
+    def count_tokens(self, text : str) -> int:
+        return len(self._token_starts([text])[0])
+
+    def chunk_spans(self, segments : Iterable[str]) -> Iterator[Chunk]:
+        # Text is kept only from the oldest span still waiting to be packed
+        window = ""
+        window_start = 0
+        pending: List[_Span] = []
+
+        for block_start, block in self._blocks(segments):
+            if not window:
+                window_start = block_start
+            window += block
+
+            spans = self._split_block(block_start, block)
+
+            chunks, pending = self._pack(pending, spans, window, window_start)
+            yield from chunks
+
+            # Drop text no pending span can refer to any more
+            keep_from = pending[0].start if pending else block_start + len(block)
+            window = window[keep_from - window_start:]
+            window_start = keep_from
+
+        if pending:
+            yield self._emit(pending, window, window_start)
+
+    # ---------------- streaming ----------------
+
+    def _blocks(self, segments : Iterable[str]) -> Iterator[Tuple[int, str]]:
+        # (offset, text) pieces of the stream, each ending at a natural break
+        buffer = ""
+        offset = 0
+
+        for segment in segments:
+            buffer += segment
+
+            cut = self._cut_point(buffer)
+            if cut > 0:
+                yield offset, buffer[:cut]
+                offset += cut
+                buffer = buffer[cut:]
+
+        if buffer:
+            yield offset, buffer
+
+    @staticmethod
+    def _cut_point(buffer : str) -> int:
+        paragraph = max(buffer.rfind("\n\n"), buffer.rfind("\n \n"))
+        if paragraph >= 0:
+            return paragraph + 2
+
+        if len(buffer) < MAX_BUFFER_CHARS:
+            return 0
+
+        for separator in ("\n", " "):
+            position = buffer.rfind(separator)
+            if position >= 0:
+                return position + 1
+
+        return len(buffer)
+
+    # ---------------- splitting ----------------
+
+    def _token_starts(self, texts : List[str]) -> List[np.ndarray]:
+        # Start offset of every token, per text
+        if self.tokenizer is None:
+            return [_fallback_token_starts(text) for text in texts]
+
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+
+        return [
+            np.array([start for start, _ in offsets], dtype="int64")
+            for offsets in encoded["offset_mapping"]
+        ]
+
+    @staticmethod
+    def _pieces(text : str, start : int, end : int, separator) -> List[Tuple[int, int]]:
+        pieces = []
+        piece_start = start
+
+        for match in separator.finditer(text, start, end):
+            if match.end() > piece_start and match.start() > piece_start:
+                pieces.append((piece_start, match.end()))
+                piece_start = match.end()
+
+        if piece_start < end:
+            pieces.append((piece_start, end))
+
+        return pieces
+
+    def _split(self, text : str, starts : np.ndarray, start : int, end : int,
+               level : int, out : List[_Span], offset : int):
+        tokens = int(starts.searchsorted(end) - starts.searchsorted(start))
+
+        if tokens <= self.chunk_size:
+            out.append(_Span(offset + start, offset + end, tokens))
+            return
+
+        if level == len(SEPARATORS):
+            # One unbroken run longer than a chunk: cut between tokens
+            first = int(starts.searchsorted(start))
+            last = int(starts.searchsorted(end))
+
+            for i in range(first, last, self.chunk_size):
+                piece_start = start if i == first else int(starts[i])
+                j = min(i + self.chunk_size, last)
+                piece_end = end if j == last else int(starts[j])
+                out.append(_Span(offset + piece_start, offset + piece_end, j - i))
+            return
+
+        pieces = self._pieces(text, start, end, SEPARATORS[level])
+
+        if len(pieces) == 1:
+            self._split(text, starts, start, end, level + 1, out, offset)
+            return
+
+        for piece_start, piece_end in pieces:
+            self._split(text, starts, piece_start, piece_end, level + 1, out, offset)
+
+    def _split_block(self, block_start : int, block : str) -> List[_Span]:
+        # Paragraphs are tokenized in batches, then split further if too long
+        paragraphs = self._pieces(block, 0, len(block), SEPARATORS[0])
+        spans: List[_Span] = []
+
+        if self.tokenizer is None:
+            # The fallback scans the whole block at once; no batching needed
+            block_starts = _fallback_token_starts(block)
+
+            for start, end in paragraphs:
+                starts = block_starts[block_starts.searchsorted(start):block_starts.searchsorted(end)]
+                self._split(block[start:end], starts - start, 0, end - start, 1, spans, block_start + start)
+
+            return spans
+
+        for i in range(0, len(paragraphs), self.batch_size):
+            batch = paragraphs[i:i + self.batch_size]
+            token_starts = self._token_starts([block[s:e] for s, e in batch])
+
+            for (start, end), starts in zip(batch, token_starts):
+                self._split(block[start:end], starts, 0, end - start, 1, spans, block_start + start)
+
+        return spans
+
+    # ---------------- packing ----------------
+
+    @staticmethod
+    def _emit(spans : List[_Span], window : str, window_start : int) -> Chunk:
+        raw = window[spans[0].start - window_start:spans[-1].end - window_start]
+        text = raw.strip()
+        lead = len(raw) - len(raw.lstrip())
+        start = spans[0].start + lead
+
+        return Chunk(text, start, start + len(text), sum(span.tokens for span in spans))
+
+    def _pack(self, pending : List[_Span], spans : List[_Span], window : str,
+              window_start : int) -> Tuple[List[Chunk], List[_Span]]:
+        # Greedy: fill up to chunk_size tokens, then carry the last spans
+        # (at most ``overlap`` tokens) into the next chunk
         chunks = []
-        start = 0
-        text_length = len(text)
+        total = sum(span.tokens for span in pending)
+
+        for span in spans:
+            if span.tokens == 0 and not pending:
+                continue
+
+            if pending and total + span.tokens > self.chunk_size:
+                chunk = self._emit(pending, window, window_start)
+                if chunk.text:
+                    chunks.append(chunk)
+
+                carry: List[_Span] = []
+                carried = 0
+                for previous in reversed(pending[1:]):
+                    if carried + previous.tokens > self.overlap:
+                        break
+                    carry.insert(0, previous)
+                    carried += previous.tokens
+
+                while carry and carried + span.tokens > self.chunk_size:
+                    carried -= carry.pop(0).tokens
 
-        while start < text_length:
-            end = min(start + self.chunk_size, text_length)
-            chunk = text[start:end].strip()
-            chunks.append(chunk)
+                pending, total = carry, carried
 
-            start += self.chunk_size - self.overlap
+            pending = pending + [span]
+            total += span.tokens
 
-        return chunks
-        
\ No newline at end of file
+        return chunks, pending
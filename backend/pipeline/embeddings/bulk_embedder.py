@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Callable, Iterable, Iterator, List, Optional
+from pipeline.embeddings.embedding_cache import EmbeddingCache
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int, backend: str, model_dir: str,
+                 cache_args: Optional[tuple] = None):
+    global _worker_model
+
+    from pipeline.embeddings.embedder import Embedder
+
+    # Workers split the cores instead of fighting over them
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+
+    # (path, namespace, max_entries) of the parent's cache, for worker_embedder().embed
+    cache = EmbeddingCache(cache_args[0], cache_args[1], max_entries=cache_args[2]) if cache_args else None
+
+    _worker_model = Embedder(model_name, cache=cache, backend=backend, model_dir=model_dir, threads=threads)
+    _worker_model.load()
+
+
+def worker_embedder():
+    # The model of the current worker process, for functions run with BulkEmbedder.submit
+    return _worker_model
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    # Uncached: the parent already looked the texts up
+    return np.asarray(_worker_model._encode(texts), dtype="float32")
+
+
+class BulkEmbedder:
+    # One model copy per worker process; batches are length-sorted within a window
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", workers: Optional[int] = None,
+                 batch_size: int = 64, window_batches: int = 8,
+                 cache: Optional[EmbeddingCache] = None,
+                 backend: str = "torch", model_dir: str = "data/models"):
+        cpus = os.cpu_count() or 1
+
+        self.model_name = model_name
+        self.backend = backend
+        self.model_dir = model_dir
+        self.workers = workers or max(1, cpus // 2)
+        self.threads_per_worker = max(1, cpus // self.workers)
+        self.batch_size = batch_size
+        self.window = batch_size * self.workers * window_batches
+        self.cache = cache
+
+        self.chunks_embedded = 0
+        self.seconds = 0.0
+
+        # Started on first use and kept until shutdown()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_embedded / self.seconds if self.seconds else 0.0
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        cache = self.cache
+        cache_args = (cache.path, cache.model_name, cache.max_entries) if cache is not None else None
+
+        # spawn: forking a process that already loaded torch can deadlock
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads_per_worker, self.backend, self.model_dir, cache_args)
+        )
+
+    def submit(self, fn: Callable, *args) -> Future:
+        # fn runs in a worker process, where worker_embedder() is loaded.
+        # A worker that died (e.g. killed for memory) breaks the whole pool:
+        # replace it once, then give up
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = self._start_pool()
+
+            try:
+                return self._pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._start_pool()
+                return self._pool.submit(fn, *args)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _windows(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        window = []
+
+        for text in texts:
+            window.append(text)
+            if len(window) == self.window:
+                yield window
+                window = []
+
+        if window:
+            yield window
+
+    def _embed_window(self, texts: List[str]) -> np.ndarray:
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        todo = list(range(len(texts)))
+
+        if self.cache is not None:
+            keys = [self.cache.key(text) for text in texts]
+            found = self.cache.get_many(keys)
+            for i, key in enumerate(keys):
+                if key in found:
+                    vectors[i] = found[key]
+            todo = [i for i in todo if vectors[i] is None]
+
+        # Length buckets: neighbours in sorted order pad to similar lengths
+        todo.sort(key=lambda i: len(texts[i]))
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+
+        futures = deque(
+            (batch, self.submit(_encode_batch, [texts[i] for i in batch]))
+            for batch in batches
+        )
+
+        computed = {}
+        while futures:
+            batch, future = futures.popleft()
+            for i, vector in zip(batch, future.result()):
+                vectors[i] = vector
+                if self.cache is not None:
+                    computed[keys[i]] = vector
+
+        if self.cache is not None:
+            self.cache.put_many(computed)
+
+        return np.stack(vectors).astype("float32")
+
+    def embed_iter(self, texts: Iterable[str]) -> Iterator[np.ndarray]:
+        # Yields one (n, dim) array per window, in input order
+        for window in self._windows(texts):
+            start = time.perf_counter()
+            vectors = self._embed_window(window)
+
+            self.seconds += time.perf_counter() - start
+            self.chunks_embedded += len(window)
+
+            yield vectors
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        windows = list(self.embed_iter(texts))
+
+        if not windows:
+            return np.empty((0, 0), dtype="float32")
+
+        return np.concatenate(windows)
@@ -1,18 +1,94 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
 import numpy as np
-from typing import List
+from typing import List, Optional
+from pipeline.embeddings.embedding_cache import EmbeddingCache
+
+# torch: SentenceTransformer in full precision
+# onnx: the same model exported to ONNX Runtime
+# onnx_int8: the ONNX export with dynamically quantized int8 weights
+BACKENDS = ("torch", "onnx", "onnx_int8")
 
 class Embedder:
 
-    def __init__(self, model_name : str = "all-MiniLM-L6-v2"):
-        # load embedding model
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name : str = "all-MiniLM-L6-v2", cache : Optional[EmbeddingCache] = None,
+                 backend : str = "torch", model_dir : str = "data/models", threads : int = 0):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
 
-    def embed(self, texts : List[str]) -> np.ndarray:
-        # convert list of text into embedding vectors
-        embeddings = self.model.encode(
+        self.model_name = model_name
+        self.backend = backend
+        self.cache = cache
+        self.model_dir = model_dir
+        self.threads = threads
+
+        # The model is loaded on first use (or by load()), not at construction
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        # Warm-up: pay the model load before the first request does
+        return self.model
+
+    def _load_model(self):
+        if self.backend == "torch":
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(self.model_name)
+
+        from pipeline.embeddings.onnx_encoder import OnnxEncoder
+        return OnnxEncoder(
+            self.model_name,
+            model_dir=os.path.join(self.model_dir, self.model_name.replace("/", "__")),
+            quantize=self.backend == "onnx_int8",
+            threads=self.threads
+        )
+
+    @staticmethod
+    def cache_namespace(model_name : str, backend : str = "torch") -> str:
+        # Backends drift slightly, so their vectors must not share cache rows
+        return model_name if backend == "torch" else f"{model_name}:{backend}"
+
+    def _encode(self, texts : List[str]) -> np.ndarray:
+        if self.backend != "torch":
+            return self.model.encode(texts)
+
+        return self.model.encode(
             texts,
             convert_to_numpy= True,
-            show_progress_bar= True
+            show_progress_bar= False
         )
-        return embeddings
+
+    def embed(self, texts : List[str]) -> np.ndarray:
+        # convert list of text into embedding vectors
+        if self.cache is None or not texts:
+            return self._encode(texts)
+
+        keys = [self.cache.key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Encode each missing text once, even if it repeats in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return np.stack([found[key] for key in keys]).astype("float32")
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List
+
+def normalize_text(text: str) -> str:
+    # Whitespace-only differences must not produce a new cache entry
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    # SQLite table keyed by (model, text hash), with an in-memory LRU in front
+
+    def __init__(self, path: str, model_name: str,
+                 max_entries: int = 500000, memory_entries: int = 20000,
+                 touch_batch: int = 1000):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # key -> last use not yet written to last_used; flushed in batches
+        # and before eviction, so hits do not write to SQLite
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._db.commit()
+
+        self._count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray):
+        # Caller holds self._lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self._touched[key] = now
+
+            missing = list(dict.fromkeys(key for key in keys if key not in found))
+
+            # SQLite caps the number of bound parameters per statement
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype="float32")
+                    found[key] = vector
+                    self._touched[key] = now
+                    self._remember(key, vector)
+
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touched()
+                self._db.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            before = self._db.total_changes
+
+            self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype="float32").tobytes(), now)
+                    for key, vector in items.items()
+                ]
+            )
+
+            self._count += self._db.total_changes - before
+
+            for key, vector in items.items():
+                self._remember(key, np.asarray(vector, dtype="float32"))
+
+            if self._count > self.max_entries:
+                self._flush_touched()
+                self._evict(self._count - self.max_entries)
+
+            self._db.commit()
+
+    def _flush_touched(self):
+        # Caller holds self._lock and commits
+        self._db.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(used, key) for key, used in self._touched.items()]
+        )
+        self._touched = {}
+
+    def _evict(self, n: int):
+        # Caller holds self._lock
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (n,)
+        )
+        self._count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": self._count,
+            "memory_entries": len(self._memory)
+        }
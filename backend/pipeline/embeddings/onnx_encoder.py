@@ -0,0 +1,154 @@
+import json
+import os
+from contextlib import contextmanager
+import numpy as np
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # Windows: exports are not serialized across processes
+    fcntl = None
+
+
+@contextmanager
+def _export_lock(model_dir: str):
+    # The API process and every ingestion worker may find the export
+    # missing at once; one exports, the others wait and reuse it
+    if fcntl is None:
+        yield
+        return
+
+    with open(os.path.join(model_dir, ".export.lock"), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class OnnxEncoder:
+    # SentenceTransformer on ONNX Runtime; exported to model_dir on first use
+
+    def __init__(self, model_name: str, model_dir: str, quantize: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.model_dir = model_dir
+
+        path = os.path.join(model_dir, "model.int8.onnx" if quantize else "model.onnx")
+
+        if not os.path.exists(path):
+            self.export(model_name, model_dir, quantize)
+
+        with open(os.path.join(model_dir, "config.json")) as f:
+            config = json.load(f)
+
+        self.max_seq_length = config["max_seq_length"]
+        self.normalize = config["normalize"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def export(model_name: str, model_dir: str, quantize: bool = False):
+        os.makedirs(model_dir, exist_ok=True)
+
+        with _export_lock(model_dir):
+            OnnxEncoder._export(model_name, model_dir, quantize)
+
+    @staticmethod
+    def _export(model_name: str, model_dir: str, quantize: bool):
+        path = os.path.join(model_dir, "model.onnx")
+        # Per process, should the lock be unavailable
+        tmp_suffix = f".{os.getpid()}.tmp"
+
+        if not os.path.exists(path):
+            import torch
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(model_name, device="cpu")
+            transformer = model[0].auto_model.eval()
+            tokenizer = model.tokenizer
+
+            sample = tokenizer(["export sample"], return_tensors="pt")
+            names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+            dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+            dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+            # Write to a temp name so an interrupted export is not picked up
+            with torch.no_grad():
+                torch.onnx.export(
+                    transformer,
+                    tuple(sample[name] for name in names),
+                    path + tmp_suffix,
+                    input_names=names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic,
+                    opset_version=14
+                )
+
+            tokenizer.save_pretrained(model_dir)
+
+            config_path = os.path.join(model_dir, "config.json")
+            with open(config_path + tmp_suffix, "w") as f:
+                json.dump({
+                    "model_name": model_name,
+                    "max_seq_length": model.max_seq_length,
+                    "normalize": any(type(m).__name__ == "Normalize" for m in model)
+                }, f)
+
+            # The config is in place before the model that signals a finished export
+            os.replace(config_path + tmp_suffix, config_path)
+            os.replace(path + tmp_suffix, path)
+
+        quantized = os.path.join(model_dir, "model.int8.onnx")
+
+        if quantize and not os.path.exists(quantized):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(path, quantized + tmp_suffix, weight_type=QuantType.QInt8)
+            os.replace(quantized + tmp_suffix, quantized)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        outputs = []
+
+        # Sorting by length keeps padding per batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+        for start in range(0, len(order), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+
+            tokens = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feed = {name: tokens[name].astype("int64") for name in tokens if name in self.input_names}
+
+            hidden = self.session.run(None, feed)[0]
+            mask = tokens["attention_mask"][..., None].astype("float32")
+
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            outputs.append(pooled)
+
+        if not outputs:
+            return np.empty((0, 0), dtype="float32")
+
+        vectors = np.concatenate(outputs).astype("float32")
+
+        # Back to input order
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
@@ -0,0 +1,233 @@
+"""
+Throughput and retrieval-recall benchmark for the document chunkers.
+
+    python -m pipeline.evaluation.chunking_benchmark --mb 8
+    python -m pipeline.evaluation.chunking_benchmark --file data/raw/handbook.pdf --retriever dense
+
+Compares the token-sized recursive chunker with the fixed 300/50 character
+window it replaced. Text comes from a file (PDF, DOCX or plain text) or is
+generated. For recall, sentences are sampled from the text, a third of
+their words are dropped to form a query, and a hit is a top-k chunk that
+covers at least half of the sentence. ``--retriever bm25`` needs no model.
+"""
+import argparse
+import json
+import re
+import time
+import numpy as np
+from typing import Iterator, List
+from pipeline.chunking.recursive_chunker import Chunk, RecursiveChunker, load_tokenizer
+
+VOCABULARY = (
+    "invoice contract employee policy refund server cluster backup quarterly revenue "
+    "audit license warranty shipment supplier customer ticket release deployment "
+    "budget forecast compliance incident password network storage index latency "
+    "holiday payroll training manager review approval deadline region market"
+).split()
+
+FILLER = "the a of to and in for with on by is are was be will must may should".split()
+
+SENTENCE = re.compile(r"[^.!?\n]+[.!?]")
+
+
+def generate_text(megabytes: float, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    words = np.array(VOCABULARY + FILLER)
+    # Content words are rarer than filler, as in prose
+    weights = np.array([1.0] * len(VOCABULARY) + [6.0] * len(FILLER))
+    weights /= weights.sum()
+
+    paragraphs, size = [], 0
+
+    while size < megabytes * 1_000_000:
+        sentences = []
+        for _ in range(int(rng.integers(1, 9))):
+            sentence = " ".join(rng.choice(words, size=int(rng.integers(6, 40)), p=weights))
+            sentences.append(sentence.capitalize() + f" {int(rng.integers(1000, 99999))}.")
+
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+
+    return "\n\n".join(paragraphs)
+
+
+def load_text(path: str) -> str:
+    if path.lower().endswith((".pdf", ".docx")):
+        from pipeline.ingestion.ingestion_pipeline import IngestionPipeline
+        return "".join(IngestionPipeline().stream(path))
+
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def char_window_chunks(segments: Iterator[str], chunk_size: int = 300,
+                       overlap: int = 50) -> Iterator[Chunk]:
+    # The previous chunker: fixed character windows, blind to boundaries
+    buffer, offset = "", 0
+    step = chunk_size - overlap
+
+    for segment in segments:
+        buffer += segment
+        while len(buffer) >= chunk_size:
+            text = buffer[:chunk_size]
+            yield Chunk(text, offset, offset + chunk_size, 0)
+            buffer, offset = buffer[step:], offset + step
+
+    if buffer.strip():
+        yield Chunk(buffer, offset, offset + len(buffer), 0)
+
+
+def stream(text: str, segment_chars: int = 64 * 1024) -> Iterator[str]:
+    # Feed the chunker the way page-by-page extraction does
+    for i in range(0, len(text), segment_chars):
+        yield text[i:i + segment_chars]
+
+
+def token_counts(tokenizer, chunks: List[Chunk]) -> np.ndarray:
+    texts = [chunk.text for chunk in chunks]
+
+    if tokenizer is None:
+        return np.array([len(re.findall(r"\w+|[^\w\s]", text)) for text in texts])
+
+    lengths = []
+    for i in range(0, len(texts), 1024):
+        encoded = tokenizer(texts[i:i + 1024], add_special_tokens=False, verbose=False)
+        lengths.extend(len(ids) for ids in encoded["input_ids"])
+
+    return np.array(lengths)
+
+
+def sample_sentences(text: str, n: int, seed: int = 0) -> List[tuple]:
+    sentences = [m for m in SENTENCE.finditer(text) if len(m.group().split()) >= 6]
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(sentences), size=min(n, len(sentences)), replace=False)
+
+    return [(sentences[i].start(), sentences[i].end(), sentences[i].group()) for i in picks]
+
+
+def make_query(sentence: str, rng) -> str:
+    words = sentence.split()
+    keep = rng.random(len(words)) > 0.33
+    return " ".join(w for w, k in zip(words, keep) if k) or sentence
+
+
+def covers(chunk: Chunk, start: int, end: int) -> bool:
+    return min(chunk.end, end) - max(chunk.start, start) >= (end - start) / 2
+
+
+def search_fn(retriever: str, chunks: List[Chunk], model: str):
+    if retriever == "bm25":
+        from pipeline.vector_store.bm25_index import BM25Index
+
+        index = BM25Index()
+        index.update((i, chunk.text) for i, chunk in enumerate(chunks))
+
+        return lambda queries, k: [[i for i, _ in index.search(q, k)] for q in queries]
+
+    import faiss
+    from pipeline.embeddings.embedder import Embedder
+
+    embedder = Embedder(model)
+    vectors = np.asarray(embedder.embed([chunk.text for chunk in chunks]), dtype="float32")
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+
+    def search(queries, k):
+        _, ids = index.search(np.asarray(embedder.embed(queries), dtype="float32"), k)
+        return [list(row) for row in ids]
+
+    return search
+
+
+def evaluate(name: str, chunks: List[Chunk], seconds: float, text: str, tokenizer,
+             max_tokens: int, sentences: List[tuple], queries: List[str], args) -> dict:
+    lengths = token_counts(tokenizer, chunks)
+
+    # Sentences that survive whole inside at least one chunk
+    starts = np.array([chunk.start for chunk in chunks])
+    intact = 0
+    for start, end, _ in sentences:
+        first = max(int(np.searchsorted(starts, end, side="right")) - 8, 0)
+        intact += any(
+            chunk.start <= start and chunk.end >= end
+            for chunk in chunks[first:first + 8]
+        )
+
+    result = {
+        "chunker": name,
+        "chunks": len(chunks),
+        "mb_per_s": round(len(text) / 1_000_000 / seconds, 2),
+        "mean_tokens": round(float(lengths.mean()), 1),
+        "max_tokens": int(lengths.max()),
+        "truncated": int((lengths > max_tokens).sum()),
+        "intact_sentences": round(intact / len(sentences), 3)
+    }
+
+    search = search_fn(args.retriever, chunks, args.model)
+    hits = search(queries, args.k)
+
+    recall = [
+        any(covers(chunks[i], start, end) for i in row if i >= 0)
+        for (start, end, _), row in zip(sentences, hits)
+    ]
+    result[f"recall@{args.k}"] = round(float(np.mean(recall)), 3)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker throughput / recall benchmark")
+    parser.add_argument("--file", help="PDF, DOCX or text file; generated text otherwise")
+    parser.add_argument("--mb", type=float, default=4.0, help="Size of generated text")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--overlap-tokens", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=254,
+                        help="Model input limit without special tokens")
+    parser.add_argument("--retriever", choices=["bm25", "dense"], default="bm25")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    text = load_text(args.file) if args.file else generate_text(args.mb)
+    tokenizer = load_tokenizer(args.model)
+
+    rng = np.random.default_rng(1)
+    sentences = sample_sentences(text, args.queries)
+    queries = [make_query(sentence, rng) for _, _, sentence in sentences]
+
+    chunker = RecursiveChunker(args.chunk_tokens, args.overlap_tokens, tokenizer=tokenizer)
+    runs = {
+        "char 300/50": lambda: list(char_window_chunks(stream(text))),
+        f"recursive {args.chunk_tokens}/{args.overlap_tokens}": lambda: list(chunker.chunk_spans(stream(text))),
+    }
+
+    results = []
+    for name, run in runs.items():
+        start = time.perf_counter()
+        chunks = run()
+        seconds = time.perf_counter() - start
+
+        results.append(evaluate(
+            name, chunks, seconds, text, tokenizer, args.max_tokens, sentences, queries, args
+        ))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(text) / 1_000_000:.1f} MB, {len(sentences)} queries, "
+          f"tokenizer: {'model' if tokenizer is not None else 'regex fallback'}, "
+          f"retriever: {args.retriever}\n")
+    print(f"{'chunker':<18} {'chunks':>8} {'MB/s':>7} {'mean tok':>9} {'max tok':>8} "
+          f"{'truncated':>10} {'intact':>7} {'recall@' + str(args.k):>9}")
+    for r in results:
+        print(f"{r['chunker']:<18} {r['chunks']:>8} {r['mb_per_s']:>7} {r['mean_tokens']:>9} "
+              f"{r['max_tokens']:>8} {r['truncated']:>10} {r['intact_sentences']:>7} "
+              f"{r['recall@' + str(args.k)]:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Concurrency stress test for the vector store: uploads, deletes and
+queries at the same time, checking every read for torn state.
+
+    python -m pipeline.evaluation.concurrency_stress --seconds 30
+    python -m pipeline.evaluation.concurrency_stress --index-type hnsw --promote-at 500 --readers 8
+
+Writers replace and delete synthetic documents (committing each change
+as the API does); readers search, filter and run lexical queries against
+one snapshot at a time. Each chunk records its document's generation,
+and every document's registry record carries the same generation as its
+content hash, so a result whose chunk, vector or registry entry belong
+to different writes is reported. Exits non-zero on any violation.
+Needs no embedding model.
+"""
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List
+import numpy as np
+from pipeline.vector_store.faiss_store import FAISSStore, StoreSnapshot
+from pipeline.vector_store.index_factory import INDEX_TYPES, IndexConfig
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.evaluation.retrieval_metrics import latency_summary
+
+WORDS = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima".split()
+
+
+def chunk_vector(filename: str, generation: int, part: int, dimension: int) -> np.ndarray:
+    # Deterministic, so readers can recompute what a chunk's vector must be
+    seed = int.from_bytes(
+        hashlib.sha256(f"{filename}:{generation}:{part}".encode("utf-8")).digest()[:8], "little"
+    )
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype("float32")
+    return vector / np.linalg.norm(vector)
+
+
+def chunk_text(filename: str, generation: int, part: int) -> str:
+    word = WORDS[(generation + part) % len(WORDS)]
+    return f"{filename} generation {generation} part {part} {word}"
+
+
+def make_document(filename: str, generation: int, parts: int, dimension: int):
+    uploaded_at = datetime.utcnow().isoformat()
+    chunks = [
+        {
+            "chunk_id": part,
+            "text": chunk_text(filename, generation, part),
+            "filename": filename,
+            "uploaded_at": uploaded_at
+        }
+        for part in range(parts)
+    ]
+    vectors = np.stack([chunk_vector(filename, generation, part, dimension) for part in range(parts)])
+
+    return vectors, chunks
+
+
+def parse_chunk(chunk: dict):
+    # (filename, generation, part) encoded in the chunk text
+    words = chunk["text"].split()
+    return words[0], int(words[2]), int(words[4])
+
+
+class Stress:
+
+    def __init__(self, store: FAISSStore, path: str, documents: int, max_parts: int,
+                 exact_scores: bool):
+        self.store = store
+        self.path = path
+        self.filenames = [f"doc-{i:03d}.pdf" for i in range(documents)]
+        self.max_parts = max_parts
+        self.exact_scores = exact_scores
+
+        # Serializes read-modify-write of a document, like a collection's write lock
+        self.write_lock = threading.Lock()
+        self.generations = {}
+        self.stop = threading.Event()
+
+        self.violations: List[str] = []
+        self.counts = {"uploads": 0, "deletes": 0, "searches": 0, "lexical": 0, "audits": 0}
+        self.search_ms: List[float] = []
+        self.write_ms: List[float] = []
+        self._lock = threading.Lock()
+
+    def fail(self, message: str):
+        with self._lock:
+            if len(self.violations) < 50:
+                self.violations.append(message)
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    # ---------------- writers ----------------
+
+    def upload(self, rng: random.Random):
+        filename = rng.choice(self.filenames)
+
+        with self.write_lock:
+            generation = self.generations.get(filename, 0) + 1
+            self.generations[filename] = generation
+
+            vectors, chunks = make_document(
+                filename, generation, rng.randint(1, self.max_parts), self.store.dimension
+            )
+
+            self.store.replace(
+                self.store.ids_for_filename(filename), vectors, chunks,
+                document={"content_hash": f"{filename}:{generation}", "size_bytes": len(chunks)}
+            )
+            self.store.save(self.path)
+
+        self.count("uploads")
+
+    def delete(self, rng: random.Random):
+        filename = rng.choice(self.filenames)
+
+        with self.write_lock:
+            ids = self.store.ids_for_filename(filename)
+            if not ids:
+                return
+
+            self.store.remove(ids)
+            self.store.save(self.path)
+
+        self.count("deletes")
+
+    def writer(self, seed: int):
+        rng = random.Random(seed)
+
+        while not self.stop.is_set():
+            start = time.perf_counter()
+
+            try:
+                if rng.random() < 0.7:
+                    self.upload(rng)
+                else:
+                    self.delete(rng)
+            except Exception as e:
+                self.fail(f"writer: {type(e).__name__}: {e}")
+
+            with self._lock:
+                self.write_ms.append((time.perf_counter() - start) * 1000)
+
+    # ---------------- readers ----------------
+
+    def check_result(self, snapshot: StoreSnapshot, result: dict, query: np.ndarray = None):
+        chunk = result["chunk"]
+
+        if chunk["vector_id"] != result["id"]:
+            self.fail(f"id {result['id']} returned chunk {chunk['vector_id']}")
+            return
+
+        filename, generation, part = parse_chunk(chunk)
+        record = snapshot.documents.get(filename)
+
+        if record is None:
+            self.fail(f"id {result['id']}: {filename} not in the registry of version {snapshot.version}")
+            return
+
+        if record["content_hash"] != f"{filename}:{generation}":
+            self.fail(
+                f"id {result['id']}: chunk of generation {generation}, "
+                f"registry has {record['content_hash']} (version {snapshot.version})"
+            )
+
+        if not any(start <= result["id"] < end for start, end in record["id_ranges"]):
+            self.fail(f"id {result['id']} outside the id ranges of {filename}")
+
+        if query is not None and self.exact_scores:
+            expected = float(chunk_vector(filename, generation, part, self.store.dimension) @ query)
+            if abs(expected - result["score"]) > 1e-3:
+                self.fail(f"id {result['id']}: score {result['score']:.4f}, vector gives {expected:.4f}")
+
+    def audit(self, snapshot: StoreSnapshot):
+        # Every registered document is complete and of a single generation
+        for record in snapshot.documents.documents():
+            ids = [i for start, end in record["id_ranges"] for i in range(start, end)]
+
+            if len(ids) != record["chunk_count"]:
+                self.fail(f"{record['filename']}: {len(ids)} ids for {record['chunk_count']} chunks")
+
+            generations = set()
+            for vector_id in ids:
+                chunk = snapshot.chunks.get(vector_id)
+                if chunk is None:
+                    self.fail(f"{record['filename']}: id {vector_id} has no chunk")
+                    continue
+                generations.add(parse_chunk(chunk)[1])
+
+            if len(generations) > 1:
+                self.fail(f"{record['filename']}: mixed generations {sorted(generations)}")
+
+        self.count("audits")
+
+    def reader(self, seed: int, top_k: int, batch_size: int):
+        rng = np.random.default_rng(seed)
+        queries_done = 0
+
+        while not self.stop.is_set():
+            try:
+                snapshot = self.store.snapshot
+
+                queries = rng.standard_normal((batch_size, self.store.dimension)).astype("float32")
+                queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+                start = time.perf_counter()
+                batch = self.store.search_batch(queries, top_k=top_k, snapshot=snapshot)
+                elapsed = (time.perf_counter() - start) * 1000
+
+                with self._lock:
+                    self.search_ms.append(elapsed / batch_size)
+
+                for query, results in zip(queries, batch):
+                    scores = [result["score"] for result in results]
+                    if scores != sorted(scores, reverse=True):
+                        self.fail("results not sorted by score")
+
+                    for result in results:
+                        self.check_result(snapshot, result, query)
+
+                self.count("searches")
+
+                records = snapshot.documents.documents()
+                if records:
+                    name = records[int(rng.integers(len(records)))]["filename"]
+                    filters = SearchFilter(filenames=[name])
+
+                    for result in self.store.search_batch(
+                        queries[:1], top_k=top_k, filters=filters, snapshot=snapshot
+                    )[0]:
+                        if result["chunk"]["filename"] != name:
+                            self.fail(f"filter on {name} returned {result['chunk']['filename']}")
+                        self.check_result(snapshot, result)
+
+                word = WORDS[int(rng.integers(len(WORDS)))]
+                for result in self.store.lexical_search(word, top_k, snapshot=snapshot):
+                    self.check_result(snapshot, result)
+                self.count("lexical")
+
+                queries_done += 1
+                if queries_done % 25 == 0:
+                    self.audit(snapshot)
+
+            except Exception as e:
+                self.fail(f"reader: {type(e).__name__}: {e}")
+
+
+def run_stress(path: str, seconds: float = 20, writers: int = 2, readers: int = 4,
+               documents: int = 40, max_parts: int = 40, dimension: int = 64,
+               index_type: str = "flat", promote_at: int = 300, delta_limit: int = 128,
+               top_k: int = 10, batch_size: int = 8) -> dict:
+    # Runs against a store in path (an empty directory); the report lists any violations
+    config = IndexConfig(index_type=index_type, promote_at=promote_at, nprobe=8, pq_m=dimension // 8)
+    store = FAISSStore(dimension, embedder=None, index_config=config, delta_limit=delta_limit)
+
+    # Scores are exact inner products unless the codes are compressed
+    stress = Stress(store, path, documents, max_parts, exact_scores=index_type != "ivf_pq")
+
+    threads = [
+        threading.Thread(target=stress.writer, args=(i,), daemon=True) for i in range(writers)
+    ] + [
+        threading.Thread(target=stress.reader, args=(1000 + i, top_k, batch_size), daemon=True)
+        for i in range(readers)
+    ]
+
+    try:
+        for thread in threads:
+            thread.start()
+
+        time.sleep(seconds)
+        stress.stop.set()
+
+        for thread in threads:
+            thread.join()
+
+        # The committed state reloads to what the last snapshot showed. A
+        # checkpoint still being written would replace the file the reload opens
+        store.wait_for_background()
+        reloaded = FAISSStore(dimension, embedder=None, index_config=config)
+        reloaded.load(path)
+
+        if reloaded.documents.to_dict() != store.documents.to_dict():
+            stress.fail("reloaded registry differs from the last published snapshot")
+        stress.audit(reloaded.snapshot)
+        reloaded.wait_for_background()
+    finally:
+        # Checkpoint and compaction threads may still be writing into path
+        store.wait_for_background()
+
+    return {
+        "index_type": index_type,
+        "seconds": seconds,
+        "writers": writers,
+        "readers": readers,
+        "counts": stress.counts,
+        "final_version": store.version,
+        "documents": len(store.documents),
+        "chunks": len(store.text_chunks),
+        "search_latency": latency_summary(stress.search_ms),
+        "write_latency": latency_summary(stress.write_ms),
+        "violations": stress.violations
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent read/write stress test for the vector store")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--max-parts", type=int, default=40, help="Chunks per document, at most")
+    parser.add_argument("--dimension", type=int, default=64)
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--promote-at", type=int, default=300)
+    parser.add_argument("--delta-limit", type=int, default=128,
+                        help="Small, so base/delta merges happen during the run")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    options = vars(args)
+    as_json = options.pop("json")
+
+    path = tempfile.mkdtemp(prefix="stress-")
+    try:
+        report = run_stress(path, **options)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    violations = report["violations"]
+
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.index_type}, {args.seconds:.0f}s, {args.writers} writers, {args.readers} readers")
+        print("  " + ", ".join(f"{name}: {n}" for name, n in report["counts"].items()))
+        for name in ("search_latency", "write_latency"):
+            summary = report[name]
+            if summary:
+                print(f"  {name.replace('_', ' ')}: p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms")
+        print(f"  violations: {len(violations)}")
+        for violation in violations[:20]:
+            print("    " + violation)
+
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Latency/throughput/memory benchmark and parity check for the embedding backends.
+
+    python -m pipeline.evaluation.embedding_benchmark
+    python -m pipeline.evaluation.embedding_benchmark --store data/embeddings --texts 2000
+
+Each backend runs in its own process so peak memory is measured cleanly.
+Vectors are compared against the torch backend on the same texts; the run
+fails (exit code 1) when any backend's worst-case cosine drift exceeds
+``--max-drift``.
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List
+from pipeline.embeddings.embedder import BACKENDS
+
+SAMPLE_TEXTS = [
+    "What is the refund policy for annual subscriptions?",
+    "The quarterly report shows revenue growth of twelve percent.",
+    "Install the package with pip and set the SECRET_KEY environment variable.",
+    "FAISS supports exact and approximate nearest neighbour search.",
+    "Employees must submit expense claims within thirty days.",
+    "The contract may be terminated by either party with written notice.",
+    "Retrieval-augmented generation grounds answers in source documents.",
+    "Chunk overlap keeps sentences that straddle a boundary retrievable.",
+]
+
+# Also the default for the pytest parity check
+MAX_DRIFT = 0.01
+
+def load_store_texts(storage_dir: str, n: int) -> List[str]:
+    from pipeline.vector_store.faiss_store import FAISSStore
+
+    store = FAISSStore(dimension=384, embedder=None)
+    store.load(storage_dir, read_only=True)
+
+    return [store.text_chunks.get(i)["text"] for i in store.text_chunks.ids()[:n]]
+
+
+def sample_texts(n: int) -> List[str]:
+    # Vary the length so batches see realistic padding
+    rng = np.random.default_rng(0)
+    texts = []
+
+    for i in range(n):
+        parts = rng.choice(len(SAMPLE_TEXTS), size=int(rng.integers(1, 8)))
+        texts.append(" ".join(SAMPLE_TEXTS[p] for p in parts))
+
+    return texts
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def bench_backend(model_name: str, backend: str, model_dir: str, texts: List[str],
+                  queries: int) -> dict:
+    # Runs in a fresh process
+    from pipeline.embeddings.embedder import Embedder
+
+    baseline_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    embedder = Embedder(model_name, backend=backend, model_dir=model_dir)
+    embedder.load()
+    load_seconds = time.perf_counter() - start
+
+    embedder.embed(texts[:8])  # warm-up
+
+    # Single-text latency, as seen by one /query request
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        embedder.embed([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vectors = np.asarray(embedder.embed(texts), dtype="float32")
+    throughput = len(texts) / (time.perf_counter() - start)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "texts_per_s": round(throughput, 1),
+        "model_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "vectors": vectors
+    }
+
+
+def cosine_drift(vectors: np.ndarray, reference: np.ndarray) -> dict:
+    a = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    drift = 1.0 - np.sum(a * b, axis=1)
+
+    return {"mean_drift": round(float(drift.mean()), 6), "max_drift": round(float(drift.max()), 6)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--model-dir", default="data/models")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--store", help="Take texts from an existing store")
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-drift", type=float, default=MAX_DRIFT,
+                        help="Largest allowed 1 - cosine(backend, torch) on any text")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    texts = load_store_texts(args.store, args.texts) if args.store else sample_texts(args.texts)
+
+    # The reference vectors always come from torch
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = []
+
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results.append(pool.submit(
+                bench_backend, args.model, backend, args.model_dir, texts, args.queries
+            ).result())
+
+    reference = results[0]["vectors"]
+    failed = False
+
+    for result in results:
+        result.update(cosine_drift(result.pop("vectors"), reference))
+        failed |= result["max_drift"] > args.max_drift
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(texts)} texts, {args.queries} single-text queries, model {args.model}\n")
+        print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p99 ms':>8} {'texts/s':>9} "
+              f"{'model MB':>9} {'mean drift':>11} {'max drift':>10}")
+        for r in results:
+            print(f"{r['backend']:<10} {r['load_s']:>7} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['texts_per_s']:>9} {r['model_rss_mb']:>9} {r['mean_drift']:>11} {r['max_drift']:>10}")
+
+    if failed:
+        print(f"\nParity check failed: max drift above {args.max_drift}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
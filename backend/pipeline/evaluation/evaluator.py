@@ -1,39 +1,226 @@
+"""
+Retrieval quality and latency evaluation over a labelled query set.
+
+    python -m pipeline.evaluation.evaluator --dataset data/eval.json --top-k 5
+    python -m pipeline.evaluation.evaluator --dataset data/eval.json --encoding sq8 --rerank 4 \\
+        --output reports/sq8.json --baseline reports/float32.json
+
+The dataset is a JSON list (or JSON-lines file) of
+``{"query": ..., "relevant_keyword": ...}`` items; ``relevant_keywords``
+may list several. A retrieved chunk is relevant when it contains one of
+them. Queries are embedded and searched in batches; stage latencies are
+per query, amortized over each batch (``--batch-size 1`` measures single
+requests). Reports are JSON, and ``--baseline`` prints the change against
+an earlier report.
+"""
+import argparse
 import json
-from typing import List
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
 from pipeline.retriever.vector_retriever import VectorRetriever
-from pipeline.evaluation.retrieval_metrics import recall_at_k, precision_at_k
+from pipeline.retriever.hybrid_retriever import HybridRetriever
+from pipeline.llm.prompt_template import PromptTemplate
+from pipeline.evaluation.retrieval_metrics import relevance_matrix, summarize, latency_summary
 
 class Evaluator:
 
-    def __init__(self, retriever : VectorRetriever, dataset_path : str):
+    def __init__(self, retriever : VectorRetriever, dataset_path : str, generator = None):
         self.retriever = retriever
         self.dataset_path = dataset_path
+        # Optional; with one, answers are generated and timed too
+        self.generator = generator
+
+    def load_dataset(self) -> List[dict]:
+        with open(self.dataset_path, "r", encoding="utf-8") as f:
+            if self.dataset_path.endswith(".jsonl"):
+                return [json.loads(line) for line in f if line.strip()]
+            return json.load(f)
+
+    @staticmethod
+    def _keywords(item : dict) -> List[str]:
+        keywords = item.get("relevant_keywords") or [item["relevant_keyword"]]
+        return [keywords] if isinstance(keywords, str) else list(keywords)
+
+    def _retrieve(self, queries : List[str], top_k : int, timings : Dict[str, List[float]]):
+        n = len(queries)
+
+        lexical = None
+        if isinstance(self.retriever, HybridRetriever):
+            # Started first, so it overlaps the embedding call as in the API
+            def timed_lexical():
+                start = time.perf_counter()
+                results = self.retriever.lexical_search_batch(queries)
+                timings["lexical"].append((time.perf_counter() - start) * 1000 / n)
+                return results
+
+            lexical = self.retriever.executor.submit(timed_lexical)
+
+        start = time.perf_counter()
+        query_embeddings = self.retriever.embedder.embed(queries)
+        timings["embed"].append((time.perf_counter() - start) * 1000 / n)
+
+        start = time.perf_counter()
+        if lexical is None:
+            results = self.retriever.search_batch(query_embeddings, top_k=top_k)
+        else:
+            results = self.retriever.search_batch(query_embeddings, top_k=top_k, lexical=lexical.result())
+        timings["search"].append((time.perf_counter() - start) * 1000 / n)
+
+        return results
+
+    def evaluate(self, top_k : int = 3, batch_size : int = 32, generate : bool = False,
+                 verbose : bool = False) -> dict:
+        dataset = self.load_dataset()
+        queries = [item["query"] for item in dataset]
+        keywords = [self._keywords(item) for item in dataset]
+
+        timings: Dict[str, List[float]] = {"embed": [], "lexical": [], "search": [], "generate": []}
+        retrieved: List[List[dict]] = []
+
+        start = time.perf_counter()
+        for i in range(0, len(queries), batch_size):
+            retrieved.extend(self._retrieve(queries[i:i + batch_size], top_k, timings))
+        retrieval_seconds = time.perf_counter() - start
+
+        if generate and self.generator is not None:
+            for query, results in zip(queries, retrieved):
+                context = "\n\n".join(result["chunk"]["text"] for result in results)
+
+                start = time.perf_counter()
+                self.generator.generate(PromptTemplate.build(context, query))
+                timings["generate"].append((time.perf_counter() - start) * 1000)
+
+        texts = [[result["chunk"]["text"] for result in results] for results in retrieved]
+        relevance = relevance_matrix(texts, keywords, top_k)
+
+        if verbose:
+            for query, row in zip(queries, relevance):
+                rank = int(row.argmax()) + 1 if row.any() else None
+                print(f"{'hit @' + str(rank) if rank else 'miss':>8}  {query}")
+
+        return {
+            "dataset": self.dataset_path,
+            "queries": len(queries),
+            "top_k": top_k,
+            "batch_size": batch_size,
+            "metrics": summarize(relevance),
+            "queries_per_s": round(len(queries) / retrieval_seconds, 1) if queries else 0.0,
+            "latency": {
+                stage: latency_summary(samples) for stage, samples in timings.items() if samples
+            }
+        }
+
+
+def compare(report : dict, baseline : dict) -> List[str]:
+    lines = []
+
+    for name, value in report["metrics"].items():
+        before = baseline.get("metrics", {}).get(name)
+        if before is not None:
+            lines.append(f"{name:<14} {before:>8.4f} -> {value:>8.4f}  ({value - before:+.4f})")
+
+    for stage, summary in report["latency"].items():
+        before = baseline.get("latency", {}).get(stage)
+        if not before:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            lines.append(
+                f"{stage + ' ' + key:<14} {before[key]:>8.3f} -> {summary[key]:>8.3f}  "
+                f"({summary[key] - before[key]:+.3f})"
+            )
+
+    return lines
+
+
+def build_retriever(args):
+    from pipeline.embeddings.embedder import Embedder
+    from pipeline.vector_store.faiss_store import FAISSStore
+    from pipeline.vector_store.index_factory import IndexConfig
+
+    embedder = Embedder(args.model, backend=args.backend, model_dir=args.model_dir)
+
+    index_config = IndexConfig(
+        index_type=args.index_type,
+        promote_at=args.promote_at,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search,
+        encoding=args.encoding,
+        rerank=args.rerank
+    )
+
+    store = FAISSStore(dimension=384, embedder=embedder, index_config=index_config)
+    # The API may be writing to the same directory
+    store.load(args.store, read_only=True)
+
+    if args.retrieval == "hybrid":
+        return HybridRetriever(embedder, store, fusion=args.fusion)
+
+    return VectorRetriever(embedder, store)
+
+
+def main():
+    from pipeline.embeddings.embedder import BACKENDS
+    from pipeline.vector_store.index_factory import ENCODINGS, INDEX_TYPES
+
+    parser = argparse.ArgumentParser(description="Retrieval evaluation")
+    parser.add_argument("--dataset", required=True)
+    parser.add_argument("--store", default="data/embeddings")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--model-dir", default="data/models")
+    parser.add_argument("--retrieval", choices=["dense", "hybrid"], default="hybrid")
+    parser.add_argument("--fusion", choices=["rrf", "weighted"], default="rrf")
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--promote-at", type=int, default=0,
+                        help="Build --index-type once the store holds this many vectors")
+    parser.add_argument("--encoding", default="float32", choices=ENCODINGS)
+    parser.add_argument("--rerank", type=int, default=1)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--generate", action="store_true", help="Also time answer generation (Ollama)")
+    parser.add_argument("--llm-model", default="mistral")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    generator = None
+    if args.generate:
+        from pipeline.llm.generator import OllamaGenerator
+        generator = OllamaGenerator(model=args.llm_model)
 
-    def evaluate(self, top_k : int = 3):
-        with open(self.dataset_path, "r") as f:
-            dataset = json.load(f)
+    evaluator = Evaluator(build_retriever(args), args.dataset, generator=generator)
+    report = evaluator.evaluate(
+        top_k=args.top_k, batch_size=args.batch_size, generate=args.generate, verbose=args.verbose
+    )
 
-        total_recall = 0
-        total_precision = 0
+    report["created_at"] = datetime.utcnow().isoformat()
+    report["config"] = {
+        key: getattr(args, key)
+        for key in ("store", "model", "backend", "retrieval", "fusion", "index_type",
+                    "encoding", "rerank", "nprobe", "ef_search")
+    }
 
-        for item in dataset:
-            query = item["query"]
-            keyword = item["relevant_keyword"]
+    print(json.dumps(report, indent=2))
 
-            results = self.retriever.retrieve(query, top_k= top_k)
-            retrieved_chunks = [chunk for chunk, _ in results]
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
 
-            recall = recall_at_k(retrieved_chunks, keyword)
-            precision = precision_at_k(retrieved_chunks, keyword)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
 
-            total_recall += recall
-            total_precision += precision
+        print("\nChange against baseline:", file=sys.stderr)
+        for line in compare(report, baseline):
+            print("  " + line, file=sys.stderr)
 
-            print(f"\n Query: {query}")
-            print(f"Recall {top_k} : {recall}")
-            print(f"Precision {top_k} : {precision}")
 
-        n = len(dataset)
-        print("\n =====Overall Metrics=====")
-        print(f"Average Recall {top_k} : {total_recall / n}")
-        print(f"Average Precision {top_k} : {total_precision/ n}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Recall/latency benchmark for the FAISS index types.
+
+    python -m pipeline.evaluation.index_benchmark --store data/embeddings
+    python -m pipeline.evaluation.index_benchmark --synthetic 200000
+
+Recall@k is measured against the exact flat index on the same vectors.
+Compressed encodings (fp16, sq8, pq) are reported with and without exact
+re-ranking, together with the code bytes stored per vector.
+"""
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from typing import List, Tuple
+from pipeline.vector_store.index_factory import (
+    IndexConfig, build_index, train_index, search_params, bytes_per_vector
+)
+from pipeline.vector_store.segment_store import SegmentStore
+
+def load_store_vectors(storage_dir: str) -> np.ndarray:
+    store = SegmentStore(storage_dir)
+    deleted = store.deleted_ids()
+
+    vectors = [
+        segment.vectors[segment.live_rows(deleted)]
+        for segment in store.open_segments()
+    ]
+
+    return np.ascontiguousarray(np.concatenate(vectors), dtype="float32")
+
+
+def synthetic_vectors(n: int, dimension: int = 384, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    # Clustered data; uniform random vectors make every ANN index look bad
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.5 * rng.standard_normal((n, dimension)).astype("float32")
+
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def split_queries(vectors: np.ndarray, n_queries: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    rows = rng.permutation(len(vectors))
+
+    queries = vectors[rows[:n_queries]].copy()
+    queries += 0.05 * rng.standard_normal(queries.shape).astype("float32")
+    faiss.normalize_L2(queries)
+
+    return np.ascontiguousarray(vectors[rows[n_queries:]]), queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def bench_index(label: str, index, config: IndexConfig, queries: np.ndarray,
+                truth: np.ndarray, k: int, build_seconds: float,
+                exact_vectors: np.ndarray = None) -> dict:
+    params = search_params(index, config)
+    candidates = k * config.rerank if exact_vectors is not None else k
+
+    # Single-query latency, as seen by one /query request
+    latencies = []
+    found = np.full((len(queries), k), -1, dtype="int64")
+
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, labels = index.search(queries[i:i + 1], candidates, params=params)
+
+        if exact_vectors is not None:
+            # Same re-rank as FAISSStore: exact scores for the candidates
+            labels = labels[0][labels[0] >= 0]
+            exact = exact_vectors[labels] @ queries[i]
+            labels = labels[np.argsort(-exact)[:k]][None, :]
+
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[i, :labels.shape[1]] = labels[0]
+
+    return {
+        "index": label,
+        "bytes_per_vector": bytes_per_vector(index),
+        "recall_at_k": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "build_s": round(build_seconds, 2)
+    }
+
+
+def run(vectors: np.ndarray, n_queries: int = 500, k: int = 10,
+        nprobes: List[int] = (4, 16, 64), ef_searches: List[int] = (32, 64, 128),
+        pq_m: int = 48, rerank: int = 4) -> List[dict]:
+    base, queries = split_queries(vectors, n_queries)
+    dimension = base.shape[1]
+    ids = np.arange(len(base), dtype="int64")
+
+    results = []
+
+    for index_type in ("flat", "ivf_flat", "ivf_pq", "hnsw"):
+        config = IndexConfig(index_type=index_type, pq_m=pq_m)
+
+        start = time.perf_counter()
+        index = build_index(index_type, dimension, config, len(base))
+        train_index(index, base)
+        index.add_with_ids(base, ids)
+        build_seconds = time.perf_counter() - start
+
+        if index_type == "flat":
+            _, truth = index.search(queries, k)
+            results.append(bench_index("flat", index, config, queries, truth, k, build_seconds))
+        elif index_type == "hnsw":
+            for ef_search in ef_searches:
+                config.ef_search = ef_search
+                results.append(bench_index(
+                    f"hnsw efSearch={ef_search}", index, config, queries, truth, k, build_seconds
+                ))
+        else:
+            for nprobe in nprobes:
+                config.nprobe = nprobe
+                results.append(bench_index(
+                    f"{index_type} nprobe={nprobe}", index, config, queries, truth, k, build_seconds
+                ))
+
+    # Compressed storage on the exact (flat) search path
+    for encoding in ("fp16", "sq8", "pq"):
+        config = IndexConfig(index_type="flat", pq_m=pq_m, encoding=encoding, rerank=rerank)
+
+        start = time.perf_counter()
+        index = build_index("flat", dimension, config, len(base), encoding=encoding)
+        train_index(index, base)
+        index.add_with_ids(base, ids)
+        build_seconds = time.perf_counter() - start
+
+        results.append(bench_index(f"flat {encoding}", index, config, queries, truth, k, build_seconds))
+        results.append(bench_index(
+            f"flat {encoding} rerank x{rerank}", index, config, queries, truth, k, build_seconds,
+            exact_vectors=base
+        ))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index recall/latency benchmark")
+    parser.add_argument("--store", help="vector store directory to read vectors from")
+    parser.add_argument("--synthetic", type=int, default=100000, help="number of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--rerank", type=int, default=4, help="candidates per result for exact re-ranking")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.store:
+        vectors = load_store_vectors(args.store)
+    else:
+        vectors = synthetic_vectors(args.synthetic)
+
+    print(f"Vectors: {len(vectors)}  dim: {vectors.shape[1]}  k: {args.k}")
+
+    results = run(vectors, n_queries=args.queries, k=args.k, pq_m=args.pq_m, rerank=args.rerank)
+
+    print(f"\n{'index':<26}{'bytes/vec':>10}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'build s':>10}")
+    for row in results:
+        print(
+            f"{row['index']:<26}{row['bytes_per_vector']:>10.0f}{row['recall_at_k']:>10}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['build_s']:>10}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Concurrent load test for the /query endpoint.
+
+    python -m pipeline.evaluation.load_test --url http://localhost:8000 \
+        --concurrency 16 64 128 --requests 512
+
+Reports throughput and latency percentiles per concurrency level, so the
+async path can be compared against the old threadpool-bound handlers
+(which saturate around the default 40 worker threads).
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "What is the leave policy?",
+    "Summarize the document.",
+    "What are the key responsibilities?",
+    "Which tools are mentioned?",
+]
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_level(url: str, token: str, concurrency: int, total: int, path: str) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300, headers=headers) as client:
+
+        async def worker():
+            nonlocal errors
+
+            for i in counter:
+                question = QUESTIONS[i % len(QUESTIONS)]
+                start = time.perf_counter()
+
+                try:
+                    response = await client.post(path, json={"question": question})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 1)
+    }
+
+
+async def main_async(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        token = await _login(client, args.username, args.password)
+
+    results = []
+
+    for concurrency in args.concurrency:
+        result = await run_level(args.url, token, concurrency, args.requests, args.path)
+        results.append(result)
+
+        print(
+            f"concurrency={result['concurrency']:<5} rps={result['throughput_rps']:<8} "
+            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+            f"errors={result['errors']}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /query")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/query")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64, 128])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
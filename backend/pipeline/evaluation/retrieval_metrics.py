@@ -1,12 +1,14 @@
-from typing import List
+from typing import Dict, List, Sequence
+import numpy as np
 
 def recall_at_k(results : List[str] , relevant_keyword : str) -> float:
     # Recall@K: Did we retrieve at least one relevant chunk?
     for chunk in results:
         if relevant_keyword.lower() in chunk.lower():
             return 1.0
-        return 0.0
-    
+
+    return 0.0
+
 
 def precision_at_k(results : List[str] , relevant_keyword : str) -> float:
     # Precision@K: How many retrieved chunks are relevant?
@@ -16,4 +18,72 @@ def precision_at_k(results : List[str] , relevant_keyword : str) -> float:
         if relevant_keyword.lower() in chunk.lower():
             relevant_count += 1
 
-    return relevant_count / len(results) if results else 0.0
\ No newline at end of file
+    return relevant_count / len(results) if results else 0.0
+
+
+# ---------------- batched metrics ----------------
+# relevance: (queries, k) boolean matrix, True where the chunk at that rank
+# is relevant; shorter result lists are padded with False
+
+def relevance_matrix(results : Sequence[Sequence[str]], keywords : Sequence[Sequence[str]],
+                     k : int) -> np.ndarray:
+    relevance = np.zeros((len(results), k), dtype=bool)
+
+    for row, (chunks, relevant) in enumerate(zip(results, keywords)):
+        needles = [keyword.lower() for keyword in relevant]
+
+        for rank, chunk in enumerate(chunks[:k]):
+            text = chunk.lower()
+            relevance[row, rank] = any(needle in text for needle in needles)
+
+    return relevance
+
+
+def batch_recall_at_k(relevance : np.ndarray) -> np.ndarray:
+    return relevance.any(axis=1).astype("float64")
+
+
+def batch_precision_at_k(relevance : np.ndarray) -> np.ndarray:
+    return relevance.mean(axis=1)
+
+
+def batch_reciprocal_rank(relevance : np.ndarray) -> np.ndarray:
+    # 1 / rank of the first relevant chunk, 0 when none is retrieved
+    first = relevance.argmax(axis=1)
+    return np.where(relevance.any(axis=1), 1.0 / (first + 1), 0.0)
+
+
+def batch_ndcg_at_k(relevance : np.ndarray) -> np.ndarray:
+    # Binary gains; the ideal ranking puts the retrieved relevant chunks first
+    discounts = 1.0 / np.log2(np.arange(2, relevance.shape[1] + 2))
+
+    dcg = relevance @ discounts
+    ideal = np.cumsum(discounts)[np.maximum(relevance.sum(axis=1) - 1, 0)]
+
+    return np.where(relevance.any(axis=1), dcg / ideal, 0.0)
+
+
+def summarize(relevance : np.ndarray) -> Dict[str, float]:
+    k = relevance.shape[1]
+
+    return {
+        f"recall@{k}": float(batch_recall_at_k(relevance).mean()),
+        f"precision@{k}": float(batch_precision_at_k(relevance).mean()),
+        "mrr": float(batch_reciprocal_rank(relevance).mean()),
+        f"ndcg@{k}": float(batch_ndcg_at_k(relevance).mean())
+    }
+
+
+def latency_summary(samples_ms : Sequence[float]) -> Dict[str, float]:
+    samples = np.asarray(samples_ms, dtype="float64")
+
+    if len(samples) == 0:
+        return {}
+
+    return {
+        "count": int(len(samples)),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3)
+    }
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class BaseLoader(ABC):
     @abstractmethod
+    def iter_pages(self, file_path : str) -> Iterator[str]:
+        # Yield the document as a stream of text segments (pages, paragraphs)
+        pass
+
     def load(self, file_path : str) -> str :
-        pass
\ No newline at end of file
+        return "".join(self.iter_pages(file_path))
@@ -1,10 +1,10 @@
 from .base_loader import BaseLoader
 from docx import Document
+from typing import Iterator
 
 class DocxLoader(BaseLoader):
-    def load(self, file_path : str) -> str:
+    def iter_pages(self, file_path : str) -> Iterator[str]:
         doc = Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs if para.text().strip()])
-        return text
-
-        
\ No newline at end of file
+        for para in doc.paragraphs:
+            if para.text.strip():
+                yield para.text + "\n"
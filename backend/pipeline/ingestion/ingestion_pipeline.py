@@ -1,6 +1,7 @@
 from .base_loader import BaseLoader
 from .docx_loader import DocxLoader
 from .pdf_loader import PDFLoader
+from typing import Iterator
 import os
 
 class IngestionPipeline:
@@ -11,7 +12,8 @@ class IngestionPipeline:
             ".docx" : DocxLoader()
         }
 
-    def process(self, file_path : str) -> str:
+    def stream(self, file_path : str) -> Iterator[str]:
+        # Text segments in document order; the full text is never built
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
@@ -21,4 +23,7 @@ class IngestionPipeline:
             raise ValueError("Unsupported File Format")
         
         loader : BaseLoader = self.loaders[ext]
-        return loader.load(file_path)
+        return loader.iter_pages(file_path)
+
+    def process(self, file_path : str) -> str:
+        return "".join(self.stream(file_path))
@@ -1,14 +1,62 @@
+import os
 import pdfplumber
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterator, List
 from .base_loader import BaseLoader
 
+def _extract_pages(file_path : str, start : int, end : int) -> List[str]:
+    # Runs in a worker process; page numbers are 1-based in pdfplumber
+    with pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))) as pdf:
+        texts = []
+        for page in pdf.pages:
+            texts.append(page.extract_text() or "")
+            page.flush_cache()
+        return texts
+
+
 class PDFLoader(BaseLoader):
-    def load(seld, file_path : str) -> str:
-        text = ""
 
+    def __init__(self, workers : int = None, parallel_threshold : int = 64, pages_per_task : int = 16):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        # Smaller documents are not worth the process start-up cost
+        self.parallel_threshold = parallel_threshold
+        self.pages_per_task = pages_per_task
+
+    def iter_pages(self, file_path : str) -> Iterator[str]:
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + '\n'
-                
-        return text
\ No newline at end of file
+            page_count = len(pdf.pages)
+
+            if page_count < self.parallel_threshold or self.workers <= 1:
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    # Drop parsed layout objects so memory stays per page
+                    page.flush_cache()
+                    if page_text:
+                        yield page_text + '\n'
+                return
+
+        yield from self._iter_pages_parallel(file_path, page_count)
+
+    def _iter_pages_parallel(self, file_path : str, page_count : int) -> Iterator[str]:
+        # At most `window` page batches are extracted ahead of the consumer
+        window = self.workers * 2
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn")) as pool:
+            for start in range(0, page_count, self.pages_per_task):
+                end = min(start + self.pages_per_task, page_count)
+                pending.append(pool.submit(_extract_pages, file_path, start, end))
+
+                if len(pending) >= window:
+                    yield from self._non_empty(pending.popleft().result())
+
+            while pending:
+                yield from self._non_empty(pending.popleft().result())
+
+    @staticmethod
+    def _non_empty(texts : List[str]) -> Iterator[str]:
+        for page_text in texts:
+            if page_text:
+                yield page_text + '\n'
@@ -0,0 +1,102 @@
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Optional
+
+class SemanticAnswerCache:
+    # Hits on a cached question with cosine >= threshold, answered against
+    # the current index version
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+        self.version = -1
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: int) -> bool:
+        # Caller holds self._lock; any index change invalidates every answer.
+        # Requests that started against an older index neither read nor write.
+        if version > self.version:
+            self._entries.clear()
+            self.version = version
+
+        return version == self.version
+
+    def _expire(self):
+        # Caller holds self._lock
+        deadline = time.monotonic() - self.ttl_seconds
+
+        for key in [k for k, entry in self._entries.items() if entry["created"] < deadline]:
+            del self._entries[key]
+
+    def lookup(self, query_embedding: np.ndarray, version: int) -> Optional[dict]:
+        query = self._unit(query_embedding)
+
+        with self._lock:
+            current = self._check_version(version)
+            self._expire()
+
+            best_key, best_score = None, self.threshold
+
+            if current and self._entries:
+                keys = list(self._entries)
+                scores = np.stack([self._entries[k]["vector"] for k in keys]) @ query
+                best = int(np.argmax(scores))
+
+                if scores[best] >= best_score:
+                    best_key, best_score = keys[best], float(scores[best])
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_key]
+            self._entries.move_to_end(best_key)
+
+            self.hits += 1
+            self.latency_saved += entry["seconds"]
+
+            return {"answer": entry["answer"], "sources": entry["sources"], "similarity": best_score}
+
+    def store(self, query_embedding: np.ndarray, version: int, answer: str, sources: list, seconds: float):
+        with self._lock:
+            if not self._check_version(version):
+                return
+
+            self._entries[self._next_key] = {
+                "vector": self._unit(query_embedding),
+                "answer": answer,
+                "sources": sources,
+                "seconds": seconds,
+                "created": time.monotonic()
+            }
+            self._next_key += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "entries": len(self._entries)
+        }
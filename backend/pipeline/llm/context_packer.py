@@ -0,0 +1,138 @@
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class PackedContext(NamedTuple):
+    context: str
+    # One per passage in the context, best first
+    sources: List[dict]
+    tokens: int
+    candidates: int
+
+
+class ContextPacker:
+    # Overlapping chunks of a document are merged into one passage, then
+    # passages are added best first while they fit token_budget
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int = 1024):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+
+    def pack(self, results: List[dict]) -> PackedContext:
+        passages = self._deduplicate(self._merge(results))
+        passages.sort(key=lambda passage: passage["score"], reverse=True)
+
+        packed = []
+        tokens = 0
+
+        for passage in passages:
+            if packed and tokens + passage["tokens"] > self.token_budget:
+                continue
+
+            packed.append(passage)
+            tokens += passage["tokens"]
+
+        return PackedContext(
+            context="\n\n".join(passage["text"] for passage in packed),
+            sources=[
+                {
+                    "collection": passage["collection"],
+                    "filename": passage["filename"],
+                    "chunk_id": passage["chunk_ids"][0],
+                    "chunk_ids": passage["chunk_ids"],
+                    "score": passage["score"],
+                    "tokens": passage["tokens"]
+                }
+                for passage in packed
+            ],
+            tokens=tokens,
+            candidates=len(results)
+        )
+
+    def _merge(self, results: List[dict]) -> List[dict]:
+        # Chunks without offsets (indexed before they were recorded) stay alone
+        documents = {}
+        passages = []
+
+        for result in results:
+            chunk = result["chunk"]
+
+            if chunk.get("start_char") is None or chunk.get("end_char") is None:
+                passages.append(self._passage(result, chunk["text"]))
+                continue
+
+            documents.setdefault(
+                (result.get("collection"), chunk["filename"]), []
+            ).append(result)
+
+        for group in documents.values():
+            group.sort(key=lambda result: result["chunk"]["start_char"])
+            current: Optional[dict] = None
+
+            for result in group:
+                chunk = result["chunk"]
+
+                # The next chunk of the document is separated by whitespace only
+                adjacent = current is not None and chunk["chunk_id"] == current["chunk_ids"][-1] + 1
+
+                if current is None or (chunk["start_char"] > current["end"] and not adjacent):
+                    current = self._passage(result, chunk["text"])
+                    passages.append(current)
+                    continue
+
+                # Overlapping: append only the text past the passage's end
+                overlap = max(0, current["end"] - chunk["start_char"])
+                tail = chunk["text"][overlap:]
+                tail_tokens = self.count_tokens(tail) if tail else 0
+
+                if current["tokens"] + tail_tokens > self.token_budget:
+                    # Too long to keep growing: the rest starts a new passage
+                    current = self._passage(result, tail)
+                    passages.append(current)
+                    continue
+
+                if tail and chunk["start_char"] > current["end"]:
+                    tail = "\n" + tail
+
+                current["text"] += tail
+                current["tokens"] += tail_tokens
+                current["end"] = max(current["end"], chunk["end_char"])
+                current["chunk_ids"].append(chunk["chunk_id"])
+                current["score"] = max(current["score"], result["score"])
+
+        return passages
+
+    @staticmethod
+    def _deduplicate(passages: List[dict]) -> List[dict]:
+        # A passage whose text appears in a longer one (the same boilerplate
+        # in two documents, a chunk of a reindexed copy) is dropped; the
+        # longer one takes its score if higher
+        kept = []
+
+        for passage in sorted(passages, key=lambda passage: len(passage["text"]), reverse=True):
+            normalized = _WHITESPACE.sub(" ", passage["text"]).strip().lower()
+            if not normalized:
+                continue
+
+            container = next((other for other, text in kept if normalized in text), None)
+            if container is None:
+                kept.append((passage, normalized))
+            else:
+                container["score"] = max(container["score"], passage["score"])
+
+        return [passage for passage, _ in kept]
+
+    def _passage(self, result: dict, text: str) -> dict:
+        chunk = result["chunk"]
+
+        return {
+            "collection": result.get("collection"),
+            "filename": chunk["filename"],
+            "chunk_ids": [chunk["chunk_id"]],
+            "text": text,
+            "tokens": self.count_tokens(text),
+            "end": chunk.get("end_char"),
+            "score": result["score"]
+        }
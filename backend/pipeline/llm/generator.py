@@ -1,6 +1,24 @@
+import asyncio
+import json
+import httpx
 import requests
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import os
+from typing import AsyncIterator, Iterator
+
+# Connection pool shared by every async LLM call in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+def _async_http_client(timeout: float) -> httpx.AsyncClient:
+    # Keep-alive pool; concurrency itself is bounded by the generator semaphore
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=10),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS
+        )
+    )
 
 
 class OllamaGenerator:
@@ -9,9 +27,15 @@ class OllamaGenerator:
         self.model = model
         self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
+        # Reuse TCP connections across requests instead of one per call
+        self.session = requests.Session()
+
+        self.async_client = _async_http_client(timeout=120)
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
     def generate(self, prompt: str) -> str:
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
@@ -27,19 +51,149 @@ class OllamaGenerator:
 
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"Ollama connection failed: {e}")
-        
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        # Yield tokens as Ollama produces them (newline-delimited JSON)
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True
+                },
+                stream=True,
+                timeout=120
+            ) as response:
+
+                response.raise_for_status()
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+
+                    data = json.loads(line)
+
+                    if data.get("response"):
+                        yield data["response"]
+
+                    if data.get("done"):
+                        break
+
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Ollama connection failed: {e}")
+
+    async def agenerate(self, prompt: str) -> str:
+        async with self.semaphore:
+            try:
+                response = await self.async_client.post(
+                    f"{self.base_url}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": prompt,
+                        "stream": False
+                    }
+                )
+
+                response.raise_for_status()
+
+                return response.json()["response"]
+
+            except httpx.HTTPError as e:
+                raise RuntimeError(f"Ollama connection failed: {e}")
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.semaphore:
+            try:
+                async with self.async_client.stream(
+                    "POST",
+                    f"{self.base_url}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": prompt,
+                        "stream": True
+                    }
+                ) as response:
+
+                    response.raise_for_status()
+
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+
+                        data = json.loads(line)
+
+                        if data.get("response"):
+                            yield data["response"]
+
+                        if data.get("done"):
+                            break
+
+            except httpx.HTTPError as e:
+                raise RuntimeError(f"Ollama connection failed: {e}")
+
+    async def aclose(self):
+        await self.async_client.aclose()
+        self.session.close()
+
 class OpenAIGenerator:
 
     def __init__(self):
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+        self.async_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=_async_http_client(timeout=120)
+        )
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    def _messages(self, prompt: str):
+        return [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": prompt}
+        ]
+
     def generate(self, prompt: str):
         response = self.client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=self._messages(prompt),
             temperature=0.2
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._messages(prompt),
+            temperature=0.2,
+            stream=True
+        )
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def agenerate(self, prompt: str) -> str:
+        async with self.semaphore:
+            response = await self.async_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=self._messages(prompt),
+                temperature=0.2
+            )
+            return response.choices[0].message.content
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.semaphore:
+            stream = await self.async_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=self._messages(prompt),
+                temperature=0.2,
+                stream=True
+            )
+
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def aclose(self):
+        await self.async_client.close()
@@ -0,0 +1,201 @@
+import numbers
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+class Histogram:
+    # buckets: upper bounds; larger values go into an overflow bucket
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+
+            rank = q / 100 * self.count
+            seen = 0
+
+            for i, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[i - 1] if i > 0 else 0.0
+                    upper = self.buckets[i] if i < len(self.buckets) else self.max
+                    value = lower + (upper - lower) * (rank - seen) / bucket_count
+                    return min(value, self.max)
+                seen += bucket_count
+
+            return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "max": round(self.max, 4)
+        }
+
+    def prometheus(self, name: str, labels: str = "") -> List[str]:
+        # Cumulative buckets, as Prometheus expects; labels like 'stage="embed"'
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+
+        prefix = labels + "," if labels else ""
+        lines = []
+        cumulative = 0
+
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{_number(bound)}"}} {cumulative}')
+
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        return lines
+
+
+class Gauge:
+    # A value that goes up and down, e.g. requests in flight
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self):
+        with self._lock:
+            self.value += 1
+
+    def dec(self):
+        with self._lock:
+            self.value -= 1
+
+
+# Seconds; from sub-millisecond cache lookups to minute-long LLM calls
+STAGE_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+# The stage breakdown of the current request, when it asked for one
+_profile: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_profile", default=None)
+
+
+@contextmanager
+def profile() -> Iterator[Dict[str, float]]:
+    # Collects "operation.stage" -> seconds for every span inside the block,
+    # including spans run in threads given a copy of this context
+    stages: Dict[str, float] = {}
+    token = _profile.set(stages)
+
+    try:
+        yield stages
+    finally:
+        _profile.reset(token)
+
+
+def current_profile() -> Optional[Dict[str, float]]:
+    return _profile.get()
+
+
+class StageTimer:
+    # Latency histograms per (operation, stage), e.g. ("query", "embed")
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.bucket_bounds = list(buckets)
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, operation: str, stage: str) -> Histogram:
+        key = (operation, stage)
+
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.bucket_bounds)
+            return self.histograms[key]
+
+    def observe(self, operation: str, stage: str, seconds: float):
+        self.histogram(operation, stage).observe(seconds)
+
+        stages = _profile.get()
+        if stages is not None:
+            key = f"{operation}.{stage}"
+            stages[key] = stages.get(key, 0.0) + seconds
+
+    def record(self, stages: Dict[str, float]):
+        # A profile collected elsewhere, e.g. in an ingestion worker process
+        for key, seconds in stages.items():
+            operation, stage = key.split(".", 1)
+            self.observe(operation, stage, seconds)
+
+    @contextmanager
+    def span(self, operation: str, stage: str):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(operation, stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            items = sorted(self.histograms.items())
+
+        stages: Dict[str, Dict[str, dict]] = {}
+        for (operation, stage), histogram in items:
+            stages.setdefault(operation, {})[stage] = histogram.snapshot()
+
+        return stages
+
+    def prometheus(self, name: str) -> List[str]:
+        with self._lock:
+            items = sorted(self.histograms.items())
+
+        lines = [f"# TYPE {name} histogram"]
+        for (operation, stage), histogram in items:
+            lines += histogram.prometheus(name, f'operation="{operation}",stage="{stage}"')
+
+        return lines
+
+
+def _number(value) -> str:
+    # Exact: integers as such, floats at full precision (never 1.23457e+06)
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def _labels(labels: str) -> str:
+    return "{" + labels + "}" if labels else ""
+
+
+def prometheus_sample(name: str, value: float, labels: str = "") -> str:
+    return f"{name}{_labels(labels)} {_number(value)}"
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    # Server-Timing header value, durations in milliseconds
+    return ", ".join(
+        f"{key.replace('.', '-')};dur={seconds * 1000:.1f}" for key, seconds in stages.items()
+    )
+
+
+# Process-wide; the API exports both at /metrics/prometheus
+stage_timer = StageTimer()
+requests_in_flight = Gauge()
@@ -0,0 +1,116 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from pipeline.vector_store.faiss_store import FAISSStore
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.retriever.vector_retriever import VectorRetriever
+
+FUSIONS = ("rrf", "weighted")
+
+class HybridRetriever(VectorRetriever):
+    # fusion: "rrf" sums 1 / (rrf_k + rank); "weighted" mixes min-max
+    # normalized scores with dense_weight
+
+    def __init__(self, embedder, vector_store: FAISSStore, fusion: str = "rrf",
+                 candidates: int = 20, rrf_k: int = 60, dense_weight: float = 0.5,
+                 executor: Optional[Executor] = None):
+        super().__init__(embedder, vector_store)
+
+        if fusion not in FUSIONS:
+            raise ValueError(f"Unsupported fusion: {fusion}")
+
+        self.fusion = fusion
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self.executor = executor or ThreadPoolExecutor(max_workers=2, thread_name_prefix="lexical")
+
+    def lexical_search(self, query: str, top_k: Optional[int] = None,
+                       filters: Optional[SearchFilter] = None) -> List[dict]:
+        return self.vector_store.lexical_search(
+            query, top_k=top_k or self.candidates, filters=filters
+        )
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 3,
+               lexical: Optional[List[dict]] = None,
+               filters: Optional[SearchFilter] = None) -> List[dict]:
+        dense = self.vector_store.search(
+            query_embedding, top_k=max(top_k, self.candidates), filters=filters
+        )
+
+        if lexical is None:
+            return dense[:top_k]
+
+        return self.fuse(dense, lexical, top_k)
+
+    def retrieve(self, query: str, top_k: int = 3,
+                 filters: Optional[SearchFilter] = None) -> List[dict]:
+        # BM25 runs while the query is being embedded
+        lexical = self.executor.submit(self.lexical_search, query, None, filters)
+        query_embedding = self.embed_query(query)
+
+        return self.search(
+            query_embedding, top_k=top_k, lexical=lexical.result(), filters=filters
+        )
+
+    def lexical_search_batch(self, queries: List[str],
+                             filters: Optional[SearchFilter] = None) -> List[List[dict]]:
+        # Sequential: BM25 scoring holds the index lock anyway
+        return [self.lexical_search(query, None, filters) for query in queries]
+
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int = 3,
+                     lexical: Optional[List[List[dict]]] = None,
+                     filters: Optional[SearchFilter] = None) -> List[List[dict]]:
+        dense = self.vector_store.search_batch(
+            query_embeddings, top_k=max(top_k, self.candidates), filters=filters
+        )
+
+        if lexical is None:
+            return [results[:top_k] for results in dense]
+
+        return [self.fuse(d, l, top_k) for d, l in zip(dense, lexical)]
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 3,
+                       filters: Optional[SearchFilter] = None) -> List[List[dict]]:
+        lexical = self.executor.submit(self.lexical_search_batch, queries, filters)
+        query_embeddings = self.embedder.embed(queries)
+
+        return self.search_batch(
+            query_embeddings, top_k=top_k, lexical=lexical.result(), filters=filters
+        )
+
+    @staticmethod
+    def _normalized(results: List[dict]) -> Dict[int, float]:
+        if not results:
+            return {}
+
+        scores = [result["score"] for result in results]
+        low, high = min(scores), max(scores)
+        span = high - low
+
+        return {
+            result["id"]: (result["score"] - low) / span if span else 1.0
+            for result in results
+        }
+
+    def fuse(self, dense: List[dict], lexical: List[dict], top_k: int) -> List[dict]:
+        chunks = {result["id"]: result["chunk"] for result in lexical}
+        chunks.update({result["id"]: result["chunk"] for result in dense})
+
+        fused: Dict[int, float] = {}
+
+        if self.fusion == "rrf":
+            for results in (dense, lexical):
+                for rank, result in enumerate(results):
+                    fused[result["id"]] = fused.get(result["id"], 0.0) + 1 / (self.rrf_k + rank + 1)
+        else:
+            for weight, results in ((self.dense_weight, dense), (1 - self.dense_weight, lexical)):
+                for vector_id, score in self._normalized(results).items():
+                    fused[vector_id] = fused.get(vector_id, 0.0) + weight * score
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+        return [
+            {"id": vector_id, "chunk": chunks[vector_id], "score": score}
+            for vector_id, score in ranked
+        ]
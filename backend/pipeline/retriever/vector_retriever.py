@@ -1,17 +1,37 @@
-from typing import List, Tuple
+from typing import List, Optional
 import numpy as np
 from pipeline.vector_store.faiss_store import FAISSStore
+from pipeline.vector_store.search_filter import SearchFilter
 from pipeline.embeddings.embedder import Embedder
 
 class VectorRetriever:
 
     def __init__(self, embedder : Embedder, vector_store : FAISSStore):
-        # Retriever depends on abstraction of embedder and vector store
+        # Retriever depends on abstraction of embedder and vector store;
+        # any object with embed(texts), e.g. EmbeddingBatchScheduler, works
         self.embedder = embedder
         self.vector_store = vector_store
 
-    def retrieve(self, query : str, top_k : int = 3) -> List[Tuple[str, float]]:
+    def embed_query(self, query : str) -> np.ndarray:
+        return self.embedder.embed([query])
+
+    def search(self, query_embedding : np.ndarray, top_k : int = 3,
+               filters : Optional[SearchFilter] = None) -> List[dict]:
+        return self.vector_store.search(query_embedding, top_k = top_k, filters = filters)
+
+    def retrieve(self, query : str, top_k : int = 3,
+                 filters : Optional[SearchFilter] = None) -> List[dict]:
         #  Convert query to embedding and search similar chunks.
-        query_embedding = self.embedder.embed([query])
-        results = self.vector_store.search(query_embedding, top_k = top_k)
-        return results
\ No newline at end of file
+        query_embedding = self.embed_query(query)
+        results = self.search(query_embedding, top_k = top_k, filters = filters)
+        return results
+
+    def search_batch(self, query_embeddings : np.ndarray, top_k : int = 3,
+                     filters : Optional[SearchFilter] = None) -> List[List[dict]]:
+        return self.vector_store.search_batch(query_embeddings, top_k = top_k, filters = filters)
+
+    def retrieve_batch(self, queries : List[str], top_k : int = 3,
+                       filters : Optional[SearchFilter] = None) -> List[List[dict]]:
+        # One embedding call and one index search for the whole batch
+        query_embeddings = self.embedder.embed(queries)
+        return self.search_batch(query_embeddings, top_k = top_k, filters = filters)
@@ -0,0 +1,218 @@
+import re
+import threading
+import numpy as np
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Identifiers such as "ISO-27001", "4.2.1" or "SKU_123/B" stay one token;
+# their alphanumeric parts are indexed as well
+COMPOUND = re.compile(r"[a-z0-9]+(?:[._\-/:][a-z0-9]+)+|[a-z0-9]+")
+PART = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+
+    for match in COMPOUND.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+
+        parts = PART.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+
+    return tokens
+
+
+class _Postings:
+    # Never modified once published; terms added since the last merge are in delta
+
+    __slots__ = ("base", "base_size", "delta", "lengths", "documents", "total_length", "stale")
+
+    def __init__(self, base: Dict[str, Tuple[np.ndarray, np.ndarray]], base_size: int,
+                 delta: Dict[str, Tuple[np.ndarray, np.ndarray]], lengths: np.ndarray,
+                 documents: int, total_length: int, stale: int):
+        self.base = base
+        # Postings in the base, live or not
+        self.base_size = base_size
+        self.delta = delta
+        # Token count by id; 0 for removed (or never added) ids
+        self.lengths = lengths
+        self.documents = documents
+        self.total_length = total_length
+        self.stale = stale
+
+    def parts(self, term: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [postings[term] for postings in (self.base, self.delta) if term in postings]
+
+    @property
+    def delta_size(self) -> int:
+        return sum(len(ids) for ids, _ in self.delta.values())
+
+
+def _concat(parts: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    if len(parts) == 1:
+        return parts[0]
+
+    return np.concatenate([ids for ids, _ in parts]), np.concatenate([tfs for _, tfs in parts])
+
+
+class BM25Index:
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, delta_limit: int = 65536):
+        self.k1 = k1
+        self.b = b
+        # Postings in the delta beyond which it is merged into the base
+        # (or an eighth of the base, so merges stay amortized)
+        self.delta_limit = delta_limit
+
+        self._postings = self._empty()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty() -> _Postings:
+        return _Postings({}, 0, {}, np.zeros(0, dtype="uint32"), 0, 0, 0)
+
+    def __len__(self):
+        return self._postings.documents
+
+    def add(self, vector_id: int, text: str):
+        self.update(added=[(vector_id, text)])
+
+    def remove(self, vector_id: int):
+        self.update(removed=[vector_id])
+
+    def update(self, added: Iterable[Tuple[int, str]] = (), removed: Iterable[int] = ()):
+        # One published version for any number of removals and additions
+        added = [(vector_id, Counter(tokenize(text))) for vector_id, text in added]
+
+        with self._lock:
+            current = self._postings
+            documents, total_length, stale = current.documents, current.total_length, current.stale
+
+            top = max([vector_id for vector_id, _ in added] + [-1])
+            lengths = np.zeros(max(top + 1, len(current.lengths)), dtype="uint32")
+            lengths[:len(current.lengths)] = current.lengths
+
+            for vector_id in removed:
+                if vector_id < len(lengths) and lengths[vector_id]:
+                    total_length -= int(lengths[vector_id])
+                    lengths[vector_id] = 0
+                    documents -= 1
+                    stale += 1
+
+            new_terms: Dict[str, Tuple[List[int], List[int]]] = {}
+
+            for vector_id, counts in added:
+                length = sum(counts.values())
+
+                # Empty chunks still count as documents; length 0 marks removed ones
+                lengths[vector_id] = max(length, 1)
+                documents += 1
+                total_length += length
+
+                for term, tf in counts.items():
+                    ids, tfs = new_terms.setdefault(term, ([], []))
+                    ids.append(vector_id)
+                    tfs.append(tf)
+
+            delta = dict(current.delta)
+            for term, (ids, tfs) in new_terms.items():
+                part = (np.asarray(ids, dtype="int64"), np.asarray(tfs, dtype="float32"))
+                delta[term] = _concat([delta[term], part]) if term in delta else part
+
+            postings = _Postings(
+                current.base, current.base_size, delta, lengths, documents, total_length, stale
+            )
+
+            if stale > 1000 and stale > documents // 4:
+                postings = self._compact(postings)
+            elif postings.delta_size > max(self.delta_limit, postings.base_size // 8):
+                postings = self._merge(postings)
+
+            self._postings = postings
+
+    @staticmethod
+    def _merge(postings: _Postings) -> _Postings:
+        base = dict(postings.base)
+
+        for term, part in postings.delta.items():
+            base[term] = _concat([base[term], part]) if term in base else part
+
+        return _Postings(
+            base, postings.base_size + postings.delta_size, {}, postings.lengths,
+            postings.documents, postings.total_length, postings.stale
+        )
+
+    @staticmethod
+    def _compact(postings: _Postings) -> _Postings:
+        # Merges the delta and drops the postings of removed documents
+        base = {}
+
+        for term in set(postings.base) | set(postings.delta):
+            ids, tfs = _concat(postings.parts(term))
+            live = postings.lengths[ids] > 0
+
+            if live.all():
+                base[term] = (ids, tfs)
+            elif live.any():
+                base[term] = (ids[live], tfs[live])
+
+        base_size = sum(len(ids) for ids, _ in base.values())
+
+        return _Postings(
+            base, base_size, {}, postings.lengths, postings.documents, postings.total_length, 0
+        )
+
+    def clear(self):
+        with self._lock:
+            self._postings = self._empty()
+
+    def search(self, query: str, top_k: int = 10,
+               allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        # allowed: optional boolean mask over ids; others are never scored
+        terms = set(tokenize(query))
+        postings = self._postings
+
+        if not terms or postings.documents == 0:
+            return []
+
+        avg_length = postings.total_length / postings.documents
+        all_ids, all_scores = [], []
+
+        for term in terms:
+            scored = []
+            frequency = 0
+
+            for ids, tfs in postings.parts(term):
+                lengths = postings.lengths[ids].astype("float32")
+
+                live = lengths > 0
+                frequency += int(live.sum())
+
+                # Filtering restricts which documents score, not the statistics
+                if allowed is not None:
+                    live &= (ids < len(allowed)) & allowed[np.minimum(ids, len(allowed) - 1)]
+
+                if live.any():
+                    scored.append((ids[live], tfs[live], lengths[live]))
+
+            if not scored:
+                continue
+
+            idf = np.log(1 + (postings.documents - frequency + 0.5) / (frequency + 0.5))
+
+            for ids, tfs, lengths in scored:
+                norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+
+                all_ids.append(ids)
+                all_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        if not all_ids:
+            return []
+
+        ids, inverse = np.unique(np.concatenate(all_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+
+        top = np.argsort(-scores, kind="stable")[:top_k]
+
+        return [(int(ids[i]), float(scores[i])) for i in top]
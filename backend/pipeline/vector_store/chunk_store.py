@@ -0,0 +1,327 @@
+import json
+import mmap
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+EPOCH = datetime(1970, 1, 1)
+
+def _to_micros(timestamp: str) -> int:
+    return (datetime.fromisoformat(timestamp) - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value) -> str:
+    return (EPOCH + timedelta(microseconds=int(value))).isoformat()
+
+
+def _save_array(path: str, array: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class ColumnarSegment:
+    # Read-only chunk columns of one segment; rows are decoded on access
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.text_offsets = np.load(os.path.join(path, "text_offsets.npy"), mmap_mode="r")
+        self.filename_codes = np.load(os.path.join(path, "filename_codes.npy"), mmap_mode="r")
+        self.uploaded_at = np.load(os.path.join(path, "uploaded_at.npy"), mmap_mode="r")
+        self.chunk_no = np.load(os.path.join(path, "chunk_no.npy"), mmap_mode="r")
+
+        # Character offsets of each chunk in its document; absent in older segments
+        spans_path = os.path.join(path, "char_spans.npy")
+        self.char_spans = np.load(spans_path, mmap_mode="r") if os.path.exists(spans_path) else None
+
+        with open(os.path.join(path, "strings.json"), "r", encoding="utf-8") as f:
+            self.strings: List[str] = json.load(f)
+
+        self._texts = self._map(os.path.join(path, "texts.bin"))
+
+    @staticmethod
+    def _map(path: str):
+        if os.path.getsize(path) == 0:
+            return b""
+
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def write(path: str, ids: np.ndarray, vectors: np.ndarray, chunks: List[dict]):
+        os.makedirs(path, exist_ok=True)
+
+        strings: Dict[str, int] = {}
+        offsets = np.zeros(len(chunks) + 1, dtype="int64")
+
+        with open(os.path.join(path, "texts.bin"), "wb") as f:
+            for row, chunk in enumerate(chunks):
+                data = chunk["text"].encode("utf-8")
+                f.write(data)
+                offsets[row + 1] = offsets[row] + len(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        codes = np.array(
+            [strings.setdefault(chunk["filename"], len(strings)) for chunk in chunks],
+            dtype="int32"
+        )
+
+        _save_array(os.path.join(path, "ids.npy"), ids.astype("int64"))
+        _save_array(os.path.join(path, "vectors.npy"), np.asarray(vectors, dtype="float32"))
+        _save_array(os.path.join(path, "text_offsets.npy"), offsets)
+        _save_array(os.path.join(path, "filename_codes.npy"), codes)
+        _save_array(
+            os.path.join(path, "uploaded_at.npy"),
+            np.array([_to_micros(chunk["uploaded_at"]) for chunk in chunks], dtype="int64")
+        )
+        _save_array(
+            os.path.join(path, "chunk_no.npy"),
+            np.array([chunk["chunk_id"] for chunk in chunks], dtype="int32")
+        )
+        _save_array(
+            os.path.join(path, "char_spans.npy"),
+            np.array(
+                [[chunk.get("start_char", -1), chunk.get("end_char", -1)] for chunk in chunks],
+                dtype="int64"
+            ).reshape(-1, 2)
+        )
+
+        with open(os.path.join(path, "strings.json"), "w", encoding="utf-8") as f:
+            json.dump(list(strings), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_of(self, vector_id: int) -> int:
+        # Ids are ascending within a segment
+        if len(self.ids) == 0 or vector_id < self.ids[0] or vector_id > self.ids[-1]:
+            return -1
+
+        row = int(np.searchsorted(self.ids, vector_id))
+
+        if row < len(self.ids) and self.ids[row] == vector_id:
+            return row
+
+        return -1
+
+    def text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def chunk(self, row: int) -> dict:
+        chunk = {
+            "chunk_id": int(self.chunk_no[row]),
+            "text": self.text(row),
+            "filename": self.strings[self.filename_codes[row]],
+            "uploaded_at": _from_micros(self.uploaded_at[row]),
+            "vector_id": int(self.ids[row])
+        }
+
+        if self.char_spans is not None and self.char_spans[row, 0] >= 0:
+            chunk["start_char"] = int(self.char_spans[row, 0])
+            chunk["end_char"] = int(self.char_spans[row, 1])
+
+        return chunk
+
+    def live_rows(self, deleted: np.ndarray) -> np.ndarray:
+        if len(deleted) == 0:
+            return np.arange(len(self.ids))
+
+        return np.flatnonzero(~np.isin(self.ids, deleted))
+
+    def rows_for_filename(self, filename: str, rows: np.ndarray) -> np.ndarray:
+        filename = filename.strip().lower()
+
+        codes = [
+            code for code, name in enumerate(self.strings)
+            if name.strip().lower() == filename
+        ]
+
+        if not codes:
+            return rows[:0]
+
+        return rows[np.isin(self.filename_codes[rows], codes)]
+
+
+class ChunkStore:
+    # vector id -> chunk metadata, from the segments plus uncommitted dicts
+
+    def __init__(self):
+        self.segments: List[ColumnarSegment] = []
+        self.pending: Dict[int, dict] = {}
+        self.deleted = set()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, vector_id: int):
+        return self.get(vector_id) is not None
+
+    def copy(self) -> "ChunkStore":
+        # Segments are read-only and shared; the mutable parts are copied
+        other = ChunkStore()
+        other.segments = list(self.segments)
+        other.pending = dict(self.pending)
+        other.deleted = set(self.deleted)
+        other._size = self._size
+        return other
+
+    def open(self, segments: List[ColumnarSegment], deleted: Iterable[int]):
+        self.segments = segments
+        self.pending = {}
+        self.deleted = set(int(i) for i in deleted)
+
+        deleted_array = self._deleted_array()
+        self._size = sum(len(segment.live_rows(deleted_array)) for segment in segments)
+
+    def set_segments(self, segments: List[ColumnarSegment], committed: Iterable[int]):
+        # Called after a commit: committed chunks now live in the segments
+        self.segments = segments
+
+        for vector_id in committed:
+            self.pending.pop(int(vector_id), None)
+
+    def _deleted_array(self) -> np.ndarray:
+        return np.fromiter(self.deleted, dtype="int64", count=len(self.deleted))
+
+    def _locate(self, vector_id: int):
+        for segment in self.segments:
+            row = segment.row_of(vector_id)
+            if row >= 0:
+                return segment, row
+
+        return None, -1
+
+    def add(self, chunks: List[dict]):
+        for chunk in chunks:
+            self.pending[chunk["vector_id"]] = chunk
+
+        self._size += len(chunks)
+
+    def remove(self, vector_id: int) -> bool:
+        vector_id = int(vector_id)
+
+        if self.pending.pop(vector_id, None) is not None:
+            self._size -= 1
+            return True
+
+        if vector_id in self.deleted:
+            return False
+
+        segment, _ = self._locate(vector_id)
+
+        if segment is None:
+            return False
+
+        self.deleted.add(vector_id)
+        self._size -= 1
+        return True
+
+    def get(self, vector_id: int) -> Optional[dict]:
+        vector_id = int(vector_id)
+
+        if vector_id in self.pending:
+            return self.pending[vector_id]
+
+        if vector_id in self.deleted:
+            return None
+
+        segment, row = self._locate(vector_id)
+
+        return segment.chunk(row) if segment is not None else None
+
+    def vector(self, vector_id: int) -> Optional[np.ndarray]:
+        # Exact float32 vector of a committed chunk, read from the mmap
+        vector_id = int(vector_id)
+
+        if vector_id in self.deleted:
+            return None
+
+        segment, row = self._locate(vector_id)
+
+        return np.asarray(segment.vectors[row]) if segment is not None else None
+
+    def committed_vectors(self, dimension: int):
+        # (ids, vectors) of live committed rows, read from the segment files
+        deleted = self._deleted_array()
+        ids = [np.empty(0, dtype="int64")]
+        vectors = [np.empty((0, dimension), dtype="float32")]
+
+        for segment in self.segments:
+            rows = segment.live_rows(deleted)
+            ids.append(segment.ids[rows])
+            vectors.append(segment.vectors[rows])
+
+        return np.concatenate(ids), np.concatenate(vectors)
+
+    def ids(self) -> List[int]:
+        deleted = self._deleted_array()
+        ids = []
+
+        for segment in self.segments:
+            ids.extend(int(i) for i in segment.ids[segment.live_rows(deleted)])
+
+        ids.extend(self.pending)
+
+        return ids
+
+    def ids_for_filename(self, filename: str) -> List[int]:
+        deleted = self._deleted_array()
+        ids = []
+
+        for segment in self.segments:
+            rows = segment.rows_for_filename(filename, segment.live_rows(deleted))
+            ids.extend(int(i) for i in segment.ids[rows])
+
+        filename = filename.strip().lower()
+
+        ids.extend(
+            vector_id for vector_id, chunk in self.pending.items()
+            if chunk["filename"].strip().lower() == filename
+        )
+
+        return ids
+
+    def document_ids(self) -> Dict[str, np.ndarray]:
+        # filename -> ids of its live chunks, grouped from the filename column
+        deleted = self._deleted_array()
+        groups: Dict[str, List[np.ndarray]] = {}
+
+        for segment in self.segments:
+            rows = segment.live_rows(deleted)
+            codes = segment.filename_codes[rows]
+
+            for code in np.unique(codes):
+                groups.setdefault(segment.strings[code], []).append(segment.ids[rows[codes == code]])
+
+        for vector_id, chunk in self.pending.items():
+            groups.setdefault(chunk["filename"], []).append(np.array([vector_id], dtype="int64"))
+
+        return {filename: np.concatenate(ids) for filename, ids in groups.items()}
+
+    def documents(self) -> Dict[str, str]:
+        # filename -> uploaded_at, read from the columns without decoding texts
+        deleted = self._deleted_array()
+        documents = {}
+
+        for segment in self.segments:
+            rows = segment.live_rows(deleted)
+            codes, first = np.unique(segment.filename_codes[rows], return_index=True)
+
+            for code, row in zip(codes, rows[first]):
+                documents[segment.strings[code]] = _from_micros(segment.uploaded_at[row])
+
+        for chunk in self.pending.values():
+            documents[chunk["filename"]] = chunk["uploaded_at"]
+
+        return documents
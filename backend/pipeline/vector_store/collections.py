@@ -0,0 +1,281 @@
+import heapq
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import numpy as np
+from pipeline.vector_store.faiss_store import FAISSStore
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.vector_store.segment_store import SegmentStore
+
+DEFAULT_COLLECTION = "default"
+COLLECTION_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+def validate_name(name: str) -> str:
+    if not COLLECTION_NAME.match(name or ""):
+        raise ValueError(
+            f"Invalid collection name: {name!r} (lowercase letters, digits, '-' and '_', max 64)"
+        )
+
+    return name
+
+
+class Collection:
+    # One shard: its store, a retriever over it and the lock writers take
+
+    def __init__(self, name: str, path: str, store: FAISSStore, retriever):
+        self.name = name
+        self.path = path
+        self.store = store
+        self.retriever = retriever
+        self.write_lock = threading.Lock()
+        # In-flight users; a collection in use is never evicted
+        self.users = 0
+
+
+class CollectionManager:
+    # The default collection lives in root and stays loaded; others live
+    # under root/collections/<name> and are evicted LRU beyond max_loaded
+
+    def __init__(self, root: str, open_store: Callable[[str], FAISSStore],
+                 make_retriever: Callable[[FAISSStore], object], max_loaded: int = 8,
+                 executor: Optional[Executor] = None):
+        self.root = root
+        self.open_store = open_store
+        self.make_retriever = make_retriever
+        self.max_loaded = max(1, max_loaded)
+        self.executor = executor or ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard")
+
+        self._loaded: "OrderedDict[str, Collection]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One loader per collection; other collections load concurrently
+        self._loading: Dict[str, threading.Lock] = {}
+
+        self.loads = 0
+        self.evictions = 0
+
+    # ---------------- layout ----------------
+
+    def path(self, name: str) -> str:
+        if name == DEFAULT_COLLECTION:
+            return self.root
+
+        return os.path.join(self.root, "collections", validate_name(name))
+
+    def exists(self, name: str) -> bool:
+        if name == DEFAULT_COLLECTION:
+            return True
+
+        return COLLECTION_NAME.match(name or "") is not None and os.path.isdir(self.path(name))
+
+    def names(self) -> List[str]:
+        directory = os.path.join(self.root, "collections")
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+        return [DEFAULT_COLLECTION] + [
+            name for name in names
+            if name != DEFAULT_COLLECTION and COLLECTION_NAME.match(name)
+        ]
+
+    # ---------------- loading ----------------
+
+    def create(self, name: str) -> bool:
+        # False if it already existed
+        if self.exists(name):
+            return False
+
+        os.makedirs(self.path(name), exist_ok=True)
+        return True
+
+    def _get(self, name: str) -> Collection:
+        with self._lock:
+            collection = self._loaded.get(name)
+            if collection is not None:
+                self._loaded.move_to_end(name)
+                collection.users += 1
+                return collection
+
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self._lock:
+                collection = self._loaded.get(name)
+                if collection is not None:
+                    self._loaded.move_to_end(name)
+                    collection.users += 1
+                    return collection
+
+            if not self.exists(name):
+                raise KeyError(name)
+
+            # Loading reads segments and rebuilds the index: outside the manager lock
+            path = self.path(name)
+            store = self.open_store(path)
+            collection = Collection(name, path, store, self.make_retriever(store))
+
+            with self._lock:
+                collection.users += 1
+                self._loaded[name] = collection
+                self.loads += 1
+                evicted = self._evict()
+
+        self._finish_evictions(evicted)
+        return collection
+
+    def _release(self, collection: Collection):
+        with self._lock:
+            collection.users -= 1
+            evicted = self._evict()
+
+        self._finish_evictions(evicted)
+
+    def _evict(self) -> list:
+        # Caller holds self._lock. Idle collections only, oldest first.
+        # Each evicted collection's loader lock is taken so it cannot be
+        # reloaded before its background writes have finished
+        excess = len(self._loaded) - self.max_loaded
+        evicted = []
+
+        for name in list(self._loaded):
+            if excess <= 0:
+                break
+
+            collection = self._loaded[name]
+            if name == DEFAULT_COLLECTION or collection.users > 0:
+                continue
+
+            loading = self._loading.setdefault(name, threading.Lock())
+            if not loading.acquire(blocking=False):
+                continue
+
+            del self._loaded[name]
+            evicted.append((collection, loading))
+            excess -= 1
+            self.evictions += 1
+
+        return evicted
+
+    @staticmethod
+    def _finish_evictions(evicted: list):
+        for collection, loading in evicted:
+            try:
+                collection.store.wait_for_background()
+            finally:
+                loading.release()
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Collection]:
+        # Pins the collection in memory for the duration of the block
+        collection = self._get(name)
+        try:
+            yield collection
+        finally:
+            self._release(collection)
+
+    def drop(self, name: str) -> bool:
+        if name == DEFAULT_COLLECTION:
+            raise ValueError("The default collection cannot be dropped")
+
+        if not self.exists(name):
+            return False
+
+        with self.use(name) as collection:
+            with collection.write_lock:
+                with self._lock:
+                    self._loaded.pop(name, None)
+
+                collection.store.wait_for_background()
+
+                shutil.rmtree(collection.path, ignore_errors=True)
+
+        return True
+
+    # ---------------- search ----------------
+
+    def search(self, names: List[str], query_embedding: np.ndarray, top_k: int = 3,
+               lexical: Optional[Dict[str, List[dict]]] = None,
+               filters: Optional[SearchFilter] = None) -> List[dict]:
+        # Each result is tagged with its collection; ids are per collection
+        def search_shard(name: str) -> List[dict]:
+            with self.use(name) as collection:
+                if lexical is None:
+                    results = collection.retriever.search(
+                        query_embedding, top_k=top_k, filters=filters
+                    )
+                else:
+                    results = collection.retriever.search(
+                        query_embedding, top_k=top_k, lexical=lexical.get(name, []), filters=filters
+                    )
+
+            return [dict(result, collection=name) for result in results]
+
+        if len(names) == 1:
+            return search_shard(names[0])
+
+        shards = list(self.executor.map(search_shard, names))
+
+        return heapq.nlargest(
+            top_k, (result for results in shards for result in results),
+            key=lambda result: result["score"]
+        )
+
+    def lexical_search(self, names: List[str], query: str,
+                       filters: Optional[SearchFilter] = None) -> Dict[str, List[dict]]:
+        lexical = {}
+
+        for name in names:
+            with self.use(name) as collection:
+                lexical[name] = collection.retriever.lexical_search(query, None, filters)
+
+        return lexical
+
+    # ---------------- stats ----------------
+
+    def loaded_stores(self) -> Dict[str, FAISSStore]:
+        with self._lock:
+            return {name: collection.store for name, collection in self._loaded.items()}
+
+    def _counts(self, name: str) -> tuple:
+        # (documents, chunks); loaded collections answer from memory, others
+        # from the document registry in their manifest
+        with self._lock:
+            collection = self._loaded.get(name)
+
+        if collection is not None:
+            return len(collection.store.documents), len(collection.store.text_chunks)
+
+        path = self.path(name)
+        if SegmentStore.exists(path):
+            documents = SegmentStore(path).manifest.get("documents")
+            if documents is not None:
+                return len(documents), sum(record["chunk_count"] for record in documents.values())
+
+        if not FAISSStore.exists(path):
+            return 0, 0
+
+        # Legacy files, or a manifest from before the registry: only a load
+        # can count them (and the first save migrates them)
+        with self.use(name) as collection:
+            return len(collection.store.documents), len(collection.store.text_chunks)
+
+    def document_count(self, name: str) -> int:
+        return self._counts(name)[0]
+
+    def chunk_count(self, name: str) -> int:
+        return self._counts(name)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = list(self._loaded)
+
+        return {
+            "collections": len(self.names()),
+            "loaded": loaded,
+            "max_loaded": self.max_loaded,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,228 @@
+import hashlib
+import threading
+import uuid
+from bisect import bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from pipeline.embeddings.embedding_cache import normalize_text
+
+def file_fingerprint(path: str) -> Tuple[str, int]:
+    # (sha256 of the file contents, size in bytes)
+    digest = hashlib.sha256()
+    size = 0
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+
+    return digest.hexdigest(), size
+
+
+def chunk_fingerprint(text: str) -> str:
+    # Chunks differing only in whitespace/Unicode form share a fingerprint
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _to_ranges(ids: np.ndarray) -> List[List[int]]:
+    # Sorted ids -> [start, end) runs of consecutive ids
+    if len(ids) == 0:
+        return []
+
+    breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+    starts = np.concatenate([[0], breaks])
+    ends = np.concatenate([breaks, [len(ids)]])
+
+    return [[int(ids[s]), int(ids[e - 1]) + 1] for s, e in zip(starts, ends)]
+
+
+class DocumentRegistry:
+    # One record per document: id ranges, hash, size, upload time, chunk count
+
+    def __init__(self):
+        self.records: Dict[str, dict] = {}
+        self._by_filename: Dict[str, str] = {}
+        self._by_hash: Dict[str, str] = {}
+        # Sorted (start, end, document_id) over all records, for id -> document
+        self._ranges: List[Tuple[int, int, str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def _key(filename: str) -> str:
+        return filename.strip().lower()
+
+    def _reindex_ranges(self):
+        # Caller holds self._lock
+        self._ranges = sorted(
+            (start, end, document_id)
+            for document_id, record in self.records.items()
+            for start, end in record["id_ranges"]
+        )
+
+    def add(self, filename: str, uploaded_at: str, ids: Iterable[int],
+            content_hash: Optional[str] = None, size_bytes: Optional[int] = None) -> dict:
+        ids = np.sort(np.asarray(list(ids), dtype="int64"))
+
+        with self._lock:
+            document_id = self._by_filename.get(self._key(filename))
+
+            if document_id is None:
+                document_id = uuid.uuid4().hex
+                self.records[document_id] = {
+                    "document_id": document_id,
+                    "filename": filename,
+                    "content_hash": content_hash,
+                    "size_bytes": size_bytes,
+                    "uploaded_at": uploaded_at,
+                    "chunk_count": 0,
+                    "id_ranges": []
+                }
+                self._by_filename[self._key(filename)] = document_id
+
+            record = self.records[document_id]
+            ranges = _to_ranges(ids)
+            record["id_ranges"].extend(ranges)
+            record["chunk_count"] += len(ids)
+
+            for start, end in ranges:
+                insort(self._ranges, (start, end, document_id))
+
+            if content_hash is not None:
+                record["content_hash"] = content_hash
+                self._by_hash[content_hash] = document_id
+            if size_bytes is not None:
+                record["size_bytes"] = size_bytes
+
+            return self._copy(record)
+
+    @staticmethod
+    def _copy(record: dict) -> dict:
+        return dict(record, id_ranges=[list(r) for r in record["id_ranges"]])
+
+    def update(self, filename: str, **fields):
+        with self._lock:
+            document_id = self._by_filename.get(self._key(filename))
+            if document_id is not None:
+                self.records[document_id].update(fields)
+
+                if fields.get("content_hash") is not None:
+                    self._by_hash[fields["content_hash"]] = document_id
+
+    def remove_ids(self, ids: Iterable[int]):
+        ids = np.unique(np.asarray(list(ids), dtype="int64"))
+
+        with self._lock:
+            starts = [start for start, _, _ in self._ranges]
+            changed = set()
+
+            # Whole runs at a time: deleting a document is one run per range
+            for low, high in _to_ranges(ids):
+                while low < high:
+                    position = bisect_right(starts, low) - 1
+
+                    if position < 0 or low >= self._ranges[position][1]:
+                        # low is in a gap; continue at the next range start
+                        position += 1
+                        if position >= len(starts) or starts[position] >= high:
+                            break
+                        low = starts[position]
+
+                    start, end, document_id = self._ranges[position]
+                    cut_end = min(high, end)
+
+                    record = self.records[document_id]
+                    record["id_ranges"].remove([start, end])
+
+                    pieces = [(s, e) for s, e in ((start, low), (cut_end, end)) if e > s]
+                    record["id_ranges"].extend([s, e] for s, e in pieces)
+                    record["chunk_count"] -= cut_end - low
+                    changed.add(document_id)
+
+                    self._ranges[position:position + 1] = [(s, e, document_id) for s, e in pieces]
+                    starts[position:position + 1] = [s for s, _ in pieces]
+
+                    low = cut_end
+
+            for document_id in changed:
+                record = self.records[document_id]
+                record["id_ranges"].sort()
+
+                if record["chunk_count"] <= 0:
+                    del self.records[document_id]
+                    self._by_filename.pop(self._key(record["filename"]), None)
+
+                    if self._by_hash.get(record["content_hash"]) == document_id:
+                        del self._by_hash[record["content_hash"]]
+
+    def get(self, filename: str) -> Optional[dict]:
+        with self._lock:
+            document_id = self._by_filename.get(self._key(filename))
+            return self._copy(self.records[document_id]) if document_id is not None else None
+
+    def find_by_hash(self, content_hash: str) -> Optional[dict]:
+        with self._lock:
+            document_id = self._by_hash.get(content_hash)
+            return self._copy(self.records[document_id]) if document_id is not None else None
+
+    def ids_of(self, filename: str) -> np.ndarray:
+        record = self.get(filename)
+
+        if record is None:
+            return np.empty(0, dtype="int64")
+
+        return np.concatenate(
+            [np.arange(start, end, dtype="int64") for start, end in record["id_ranges"]]
+            or [np.empty(0, dtype="int64")]
+        )
+
+    def documents(self) -> List[dict]:
+        with self._lock:
+            return [self._copy(record) for record in self.records.values()]
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                document_id: self._copy(record) for document_id, record in self.records.items()
+            }
+
+    def copy(self) -> "DocumentRegistry":
+        registry = DocumentRegistry()
+
+        with self._lock:
+            registry.records = {
+                document_id: self._copy(record) for document_id, record in self.records.items()
+            }
+            registry._by_filename = dict(self._by_filename)
+            registry._by_hash = dict(self._by_hash)
+            registry._ranges = list(self._ranges)
+
+        return registry
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DocumentRegistry":
+        registry = cls()
+        registry.records = {document_id: cls._copy(record) for document_id, record in data.items()}
+        registry._by_filename = {
+            cls._key(record["filename"]): document_id
+            for document_id, record in registry.records.items()
+        }
+        registry._by_hash = {
+            record["content_hash"]: document_id
+            for document_id, record in registry.records.items()
+            if record.get("content_hash")
+        }
+        registry._reindex_ranges()
+        return registry
+
+    @classmethod
+    def rebuild(cls, document_ids: Dict[str, np.ndarray], uploaded: Dict[str, str]) -> "DocumentRegistry":
+        # For stores persisted before the registry existed; hashes are unknown
+        registry = cls()
+
+        for filename, ids in document_ids.items():
+            registry.add(filename, uploaded[filename], ids)
+
+        return registry
@@ -1,20 +1,243 @@
+import os
+import threading
 import faiss
 import numpy as np
-from typing import List
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from pipeline.vector_store.segment_store import SegmentStore
+from pipeline.vector_store.chunk_store import ChunkStore
+from pipeline.vector_store.bm25_index import BM25Index
+from pipeline.vector_store.search_filter import SearchFilter
+from pipeline.vector_store.document_registry import DocumentRegistry
+from pipeline.vector_store.index_factory import (
+    IndexConfig, build_index, train_index, index_type_of, supports_remove, search_params,
+    supports_selector, stored_ids, without_ivf_id_map
+)
+
+# Files written before segment persistence, migrated on first load
+LEGACY_INDEX_FILE = "faiss.index"
+LEGACY_CHUNKS_FILE = "chunks.npy"
+
+class StoreSnapshot:
+    # Index, chunks and registry of one version; never modified once published.
+    # Removed ids stay in base/delta until the next merge, hidden by excluded
+
+    __slots__ = ("version", "base", "delta", "excluded", "chunks", "vectors", "documents",
+                 "next_id", "_selector")
+
+    def __init__(self, version: int, base, delta, excluded: frozenset, chunks: ChunkStore,
+                 vectors: Dict[int, np.ndarray], documents: DocumentRegistry, next_id: int):
+        self.version = version
+        self.base = base
+        self.delta = delta
+        self.excluded = excluded
+        self.chunks = chunks
+        # Vectors not yet committed to a segment
+        self.vectors = vectors
+        self.documents = documents
+        self.next_id = next_id
+        self._selector = None
+
+    @property
+    def ntotal(self) -> int:
+        return self.base.ntotal + (self.delta.ntotal if self.delta is not None else 0)
+
+    def excluded_selector(self):
+        # Built on first use; racing readers at worst build it twice
+        if self.excluded and self._selector is None:
+            ids = np.fromiter(self.excluded, dtype="int64", count=len(self.excluded))
+            self._selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(ids))
+
+        return self._selector
+
+    def vector(self, vector_id: int) -> Optional[np.ndarray]:
+        vector = self.vectors.get(vector_id)
+        return vector if vector is not None else self.chunks.vector(vector_id)
+
+
+class _Draft:
+    # A writer's private working copy of the next snapshot
+
+    def __init__(self, snapshot: StoreSnapshot):
+        self.base = snapshot.base
+        self.delta = snapshot.delta
+        self.excluded = set(snapshot.excluded)
+        self.chunks = snapshot.chunks.copy()
+        self.vectors = dict(snapshot.vectors)
+        self.documents = snapshot.documents.copy()
+        self.next_id = snapshot.next_id
+
+        # Applied when the draft is published
+        self.added_ids: List[np.ndarray] = []
+        self.added_vectors: List[np.ndarray] = []
+        self.lexical_added: List[tuple] = []
+        self.lexical_removed: List[int] = []
+        self.tombstones: List[int] = []
+
 
 class FAISSStore:
 
-    def __init__(self, dimension, embedder):
+    def __init__(self, dimension, embedder, index_config: IndexConfig = None,
+                 delta_limit: int = 4096):
         self.dimension = dimension
         self.embedder = embedder
-        self.index = faiss.IndexFlatIP(dimension)
-        self.text_chunks = []
+        self.index_config = index_config or IndexConfig()
+        # Lexical index over the same ids
+        self.lexical_index = BM25Index()
+        # The delta is merged into the base index beyond this many vectors
+        # (or an eighth of the base, so merges stay amortized on large stores)
+        self.delta_limit = delta_limit
+
+        self._snapshot = self._empty_snapshot(0)
+
+        # Changes not yet committed to disk
+        self._pending_deletes: List[int] = []
+        self._pending_template = None
+        self.segment_store = None
+
+        # Loaded read-only: never writes to its directory (see load)
+        self.read_only = False
+
+        # Base index last written as the on-disk checkpoint, and the writer
+        self._checkpointed = None
+        self._checkpoint_thread = None
+
+        # One writer at a time; readers never take this lock
+        self._write_lock = threading.RLock()
+
+        # (filter key, version) -> id mask of the matching documents
+        self._filter_masks: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._masks_lock = threading.Lock()
+
+    @staticmethod
+    def exists(storage_dir: str) -> bool:
+        return SegmentStore.exists(storage_dir) or os.path.exists(
+            os.path.join(storage_dir, LEGACY_INDEX_FILE)
+        )
+
+    # ---------------- snapshots ----------------
+
+    @property
+    def snapshot(self) -> StoreSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        # Bumped on every change of the stored contents
+        return self._snapshot.version
+
+    @property
+    def index(self):
+        # The base index; vectors added since its last merge are in snapshot.delta
+        return self._snapshot.base
+
+    @property
+    def text_chunks(self) -> ChunkStore:
+        # vector id -> chunk metadata
+        return self._snapshot.chunks
+
+    @property
+    def documents(self) -> DocumentRegistry:
+        # Per-document id ranges and file facts, persisted in the manifest
+        return self._snapshot.documents
+
+    @property
+    def next_id(self) -> int:
+        return self._snapshot.next_id
+
+    def _empty_snapshot(self, version: int) -> StoreSnapshot:
+        return StoreSnapshot(
+            version, self._new_index(), None, frozenset(), ChunkStore(), {}, DocumentRegistry(), 0
+        )
+
+    def _new_index(self):
+        # Every vector keeps a stable id that survives removals of others
+        return build_index(
+            "flat", self.dimension, self.index_config, encoding=self.index_config.initial_encoding
+        )
+
+    def _new_delta(self):
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.dimension))
+
+    def _publish(self, draft: _Draft, changed: bool = True):
+        # Caller holds self._write_lock
+        if not supports_remove(draft.base) and len(draft.excluded) > self._merge_limit(draft.base):
+            self._rebuild(draft)
+
+        delta = draft.delta
+
+        if draft.added_ids:
+            delta = faiss.clone_index(delta) if delta is not None else self._new_delta()
+            delta.add_with_ids(np.concatenate(draft.added_vectors), np.concatenate(draft.added_ids))
+
+        base, excluded = draft.base, draft.excluded
+
+        if self._merge_due(base, delta, excluded):
+            base, delta, excluded = self._merge(base, delta, excluded)
+
+        self._snapshot = StoreSnapshot(
+            self._snapshot.version + int(changed), base, delta, frozenset(excluded),
+            draft.chunks, draft.vectors, draft.documents, draft.next_id
+        )
+        self._pending_deletes.extend(draft.tombstones)
+
+        if draft.lexical_removed or draft.lexical_added:
+            self.lexical_index.update(draft.lexical_added, draft.lexical_removed)
+
+    def _merge_limit(self, base) -> int:
+        return max(self.delta_limit, base.ntotal // 8)
+
+    def _merge_due(self, base, delta, excluded: set) -> bool:
+        limit = self._merge_limit(base)
+        delta_size = delta.ntotal if delta is not None else 0
+
+        return delta_size > limit or (supports_remove(base) and len(excluded) > limit)
+
+    def _merge(self, base, delta, excluded: set):
+        # Not clone_index: its copy of a memory-mapped checkpoint still views
+        # the file, and growing or compacting that copy aborts
+        base = faiss.deserialize_index(faiss.serialize_index(base))
+        ids = np.fromiter(excluded, dtype="int64", count=len(excluded))
+
+        if len(ids) and supports_remove(base):
+            base.remove_ids(faiss.IDSelectorBatch(ids))
+            kept = set()
+        else:
+            kept = set(excluded)
+
+        if delta is not None and delta.ntotal:
+            delta_ids = faiss.vector_to_array(delta.id_map)
+            live = ~np.isin(delta_ids, ids)
+            vectors = delta.index.reconstruct_n(0, delta.ntotal)
+            base.add_with_ids(np.ascontiguousarray(vectors[live]), delta_ids[live])
+
+        return base, None, kept
+
+    # ---------------- writes ----------------
 
     def _normalize(self, vectors: np.ndarray):
         faiss.normalize_L2(vectors)
 
-    def add(self, embeddings: np.ndarray, chunks: List[dict]):
+    def add(self, embeddings: np.ndarray, chunks: List[dict],
+            document: Optional[dict] = None) -> np.ndarray:
+        # document: optional content_hash / size_bytes for the registry
+        return self.replace([], embeddings, chunks, document)
 
+    def replace(self, ids: Iterable[int], embeddings: np.ndarray, chunks: List[dict],
+                document: Optional[dict] = None) -> np.ndarray:
+        # Removes ids and adds chunks in one published version, so readers
+        # see either the old document or the new one, never neither
+        with self._write_lock:
+            draft = _Draft(self._snapshot)
+            self._remove(draft, ids)
+            added = self._add(draft, embeddings, chunks, document or {})
+            self._maybe_promote(draft)
+            self._publish(draft)
+
+        return added
+
+    def _add(self, draft: _Draft, embeddings: np.ndarray, chunks: List[dict],
+             document: dict) -> np.ndarray:
         if embeddings is None or len(embeddings) == 0:
             raise ValueError("No embeddings to add to vector store")
 
@@ -28,48 +251,539 @@ class FAISSStore:
         if embeddings.ndim == 1:
             embeddings = embeddings.reshape(1, -1)
 
+        if len(embeddings) != len(chunks):
+            raise ValueError("Number of embeddings and chunks must match")
+
         self._normalize(embeddings)
 
-        self.index.add(embeddings)
-        self.text_chunks.extend(chunks)
+        ids = np.arange(draft.next_id, draft.next_id + len(chunks), dtype="int64")
+
+        draft.added_ids.append(ids)
+        draft.added_vectors.append(embeddings)
+
+        for vector_id, vector, chunk in zip(ids, embeddings, chunks):
+            chunk["vector_id"] = int(vector_id)
+            draft.vectors[int(vector_id)] = vector
+            draft.lexical_added.append((int(vector_id), chunk["text"]))
+
+        draft.chunks.add(chunks)
+        self._register(draft, ids, chunks, document)
+
+        draft.next_id += len(chunks)
+
+        return ids
+
+    def _register(self, draft: _Draft, ids: np.ndarray, chunks: List[dict], document: dict):
+        by_filename: Dict[str, List[int]] = {}
+        uploaded = {}
+
+        for vector_id, chunk in zip(ids, chunks):
+            by_filename.setdefault(chunk["filename"], []).append(int(vector_id))
+            uploaded.setdefault(chunk["filename"], chunk["uploaded_at"])
+
+        for filename, document_ids in by_filename.items():
+            draft.documents.add(filename, uploaded[filename], document_ids, **document)
+
+    def update_documents(self, fields: Dict[str, dict]):
+        # filename -> registry fields (content_hash, size_bytes), in one version
+        with self._write_lock:
+            draft = _Draft(self._snapshot)
+
+            for filename, values in fields.items():
+                draft.documents.update(filename, **values)
+
+            self._publish(draft)
+
+    def remove(self, ids: Iterable[int]) -> int:
+        # Drop vectors by id; nothing is re-embedded
+        with self._write_lock:
+            draft = _Draft(self._snapshot)
+            removed = self._remove(draft, ids)
+
+            if draft.lexical_removed:
+                self._publish(draft)
+
+        return removed
+
+    def _remove(self, draft: _Draft, ids: Iterable[int]) -> int:
+        ids = np.asarray(list(ids), dtype="int64")
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 3):
-        if self.index.ntotal == 0:
-            return []
+        if len(ids) == 0:
+            return 0
 
-        query_embedding = query_embedding.astype("float32")
-        self._normalize(query_embedding)
+        removed = 0
 
-        scores, indices = self.index.search(query_embedding, top_k)
+        for vector_id in ids:
+            removed += draft.chunks.remove(vector_id)
+            draft.lexical_removed.append(int(vector_id))
+
+            # Vectors never written to disk need no tombstone
+            if draft.vectors.pop(int(vector_id), None) is None:
+                draft.tombstones.append(int(vector_id))
+
+        draft.documents.remove_ids(ids)
+        draft.excluded.update(int(i) for i in ids)
+
+        return removed
+
+    # ---------------- reads ----------------
+
+    def lexical_search(self, query: str, top_k: int = 10,
+                       filters: Optional[SearchFilter] = None,
+                       snapshot: Optional[StoreSnapshot] = None) -> List[dict]:
+        snapshot = snapshot or self._snapshot
+        mask = None
+
+        if filters is not None and not filters.is_empty():
+            mask = self._filter_mask(filters, snapshot)
+            if not mask.any():
+                return []
 
         results = []
-        for idx, score in zip(indices[0], scores[0]):
-            if idx < len(self.text_chunks):
-                results.append({
-                    "chunk": self.text_chunks[idx],
-                    "score": float(score)
-                })
+
+        for vector_id, score in self.lexical_index.search(query, top_k, allowed=mask):
+            # Postings may already be ahead of or behind this snapshot
+            chunk = snapshot.chunks.get(vector_id)
+            if chunk is not None:
+                results.append({"id": vector_id, "chunk": chunk, "score": score})
 
         return results
 
-    def save(self, index_path: str, chunks_path: str):
-        faiss.write_index(self.index, index_path)
-        np.save(chunks_path, np.array(self.text_chunks, dtype=object))
+    def ids_for_filename(self, filename: str) -> List[int]:
+        return self.documents.ids_of(filename).tolist()
+
+    def _filter_mask(self, filters: SearchFilter, snapshot: StoreSnapshot) -> np.ndarray:
+        # Boolean mask over vector ids; cached per snapshot version
+        key = (filters.key(), snapshot.version)
+
+        with self._masks_lock:
+            mask = self._filter_masks.get(key)
+            if mask is not None:
+                self._filter_masks.move_to_end(key)
+                return mask
+
+        mask = np.zeros(snapshot.next_id, dtype=bool)
+
+        for record in snapshot.documents.documents():
+            if filters.matches(record["filename"], record["uploaded_at"]):
+                for start, end in record["id_ranges"]:
+                    mask[start:end] = True
+
+        with self._masks_lock:
+            self._filter_masks[key] = mask
+            while len(self._filter_masks) > 64:
+                self._filter_masks.popitem(last=False)
+
+        return mask
+
+    @staticmethod
+    def _bitmap_selector(mask: np.ndarray):
+        # FAISS reads bit (id & 7) of byte (id >> 3)
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        # The selector does not own the buffer
+        selector.bitmap_array = bitmap
+        return selector
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 3,
+               filters: Optional[SearchFilter] = None):
+        return self.search_batch(query_embedding[:1], top_k=top_k, filters=filters)[0]
+
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int = 3,
+                     filters: Optional[SearchFilter] = None,
+                     snapshot: Optional[StoreSnapshot] = None) -> List[List[dict]]:
+        # One FAISS call per index for many queries; results per query row
+        snapshot = snapshot or self._snapshot
+        n_queries = len(query_embeddings)
+
+        if snapshot.ntotal == 0:
+            return [[] for _ in range(n_queries)]
+
+        if filters is not None and not filters.is_empty():
+            mask = self._filter_mask(filters, snapshot)
+            if not mask.any():
+                return [[] for _ in range(n_queries)]
+
+            # Only live ids are set, so this also hides removed vectors
+            selector = self._bitmap_selector(mask)
+            keep = lambda ids: (ids >= 0) & (ids < len(mask)) & mask[np.clip(ids, 0, len(mask) - 1)]
+        else:
+            selector = snapshot.excluded_selector()
+            keep = lambda ids: (ids >= 0) & ~np.isin(
+                ids, np.fromiter(snapshot.excluded, dtype="int64", count=len(snapshot.excluded))
+            )
+
+        query_embeddings = np.array(query_embeddings, dtype="float32")
+        self._normalize(query_embeddings)
+
+        rerank = self.index_config.rerank
+        candidates = top_k * rerank if rerank > 1 else top_k
 
-    def load(self, index_path: str, chunks_path: str):
-        self.index = faiss.read_index(index_path)
-        self.text_chunks = list(np.load(chunks_path, allow_pickle=True))
+        scores, indices = self._search_index(
+            snapshot.base, query_embeddings, candidates, selector, keep
+        )
 
-    def rebuild_index(self, chunks: List[dict]):
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.text_chunks = chunks
+        if snapshot.delta is not None and snapshot.delta.ntotal:
+            delta_scores, delta_indices = self._search_index(
+                snapshot.delta, query_embeddings, candidates, selector, keep
+            )
 
-        if not chunks:
+            scores = np.concatenate([scores, delta_scores], axis=1)
+            indices = np.concatenate([indices, delta_indices], axis=1)
+
+            order = np.argsort(-scores, axis=1, kind="stable")[:, :candidates]
+            scores = np.take_along_axis(scores, order, axis=1)
+            indices = np.take_along_axis(indices, order, axis=1)
+
+        batch = []
+        for row in range(n_queries):
+            row_scores, row_indices = scores[row], indices[row]
+
+            if rerank > 1:
+                row_scores, row_indices = self._rerank(
+                    snapshot, query_embeddings[row], row_indices, top_k
+                )
+                row_scores, row_indices = row_scores[0], row_indices[0]
+
+            results = []
+            for idx, score in zip(row_indices, row_scores):
+                if idx < 0:
+                    continue
+
+                chunk = snapshot.chunks.get(int(idx))
+                if chunk is not None:
+                    results.append({
+                        "id": int(idx),
+                        "chunk": chunk,
+                        "score": float(score)
+                    })
+
+            batch.append(results)
+
+        return batch
+
+    def _search_index(self, index, queries: np.ndarray, k: int, selector, keep):
+        # keep(ids) -> bool array: what the selector lets through, applied
+        # here for indexes that cannot take one (flat PQ)
+        if selector is None or supports_selector(index):
+            return index.search(queries, k, params=search_params(index, self.index_config, selector))
+
+        # Over-fetch until every query has k kept results or the index is exhausted
+        fetch = k
+        while True:
+            fetch = min(index.ntotal, fetch * 4)
+            scores, ids = index.search(queries, fetch, params=search_params(index, self.index_config))
+            kept = keep(ids)
+
+            if fetch >= index.ntotal or (kept.sum(axis=1) >= k).all():
+                break
+
+        # Kept results first, in score order; the rest become padding
+        order = np.argsort(~kept, axis=1, kind="stable")[:, :k]
+        scores = np.take_along_axis(np.where(kept, scores, -np.inf).astype("float32"), order, axis=1)
+        ids = np.take_along_axis(np.where(kept, ids, -1), order, axis=1)
+
+        return scores, ids
+
+    def vector(self, vector_id: int) -> Optional[np.ndarray]:
+        # Stored (normalized) float32 vector of a live chunk
+        return self._snapshot.vector(vector_id)
+
+    @staticmethod
+    def _rerank(snapshot: StoreSnapshot, query: np.ndarray, candidates: np.ndarray, top_k: int):
+        # Re-score compressed-index candidates with the float32 vectors on disk
+        ids, vectors = [], []
+
+        for vector_id in candidates:
+            if vector_id < 0:
+                continue
+
+            vector = snapshot.vector(int(vector_id))
+            if vector is not None:
+                ids.append(int(vector_id))
+                vectors.append(vector)
+
+        if not ids:
+            return np.empty((1, 0), dtype="float32"), np.empty((1, 0), dtype="int64")
+
+        exact = np.stack(vectors).astype("float32") @ query
+        order = np.argsort(-exact)[:top_k]
+
+        return exact[order][None, :], np.asarray(ids, dtype="int64")[order][None, :]
+
+    # ---------------- index type ----------------
+
+    def _live_vectors(self, draft: _Draft):
+        ids, vectors = draft.chunks.committed_vectors(self.dimension)
+
+        if draft.vectors:
+            pending_ids = np.array(sorted(draft.vectors), dtype="int64")
+            ids = np.concatenate([ids, pending_ids])
+            vectors = np.concatenate([
+                vectors, np.stack([draft.vectors[int(i)] for i in pending_ids])
+            ])
+
+        return ids, vectors
+
+    def _maybe_promote(self, draft: _Draft):
+        config = self.index_config
+
+        if (
+            index_type_of(draft.base) == "flat"
+            and not config.is_target(draft.base)
+            and len(draft.chunks) >= config.promote_at
+        ):
+            self._promote(draft, config.index_type)
+
+    def promote(self, index_type: str):
+        with self._write_lock:
+            draft = _Draft(self._snapshot)
+            self._promote(draft, index_type)
+            # Same contents, different index: the version stays
+            self._publish(draft, changed=False)
+
+    def _promote(self, draft: _Draft, index_type: str):
+        # Build and train an ANN index from the stored vectors, no re-embedding
+        ids, vectors = self._live_vectors(draft)
+
+        index = build_index(
+            index_type, self.dimension, self.index_config, len(ids),
+            encoding=self.index_config.encoding
+        )
+        train_index(index, vectors)
+
+        # The trained, still empty index is persisted so loads skip training
+        self._pending_template = faiss.clone_index(index)
+
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype="float32"), ids)
+
+        # Everything live is in the new index, including the draft's additions
+        draft.base = index
+        draft.delta = None
+        draft.excluded = set()
+        draft.added_ids, draft.added_vectors = [], []
+
+    def _rebuild(self, draft: _Draft):
+        # HNSW graphs cannot drop nodes: once enough of them are removed,
+        # the graph is rebuilt from the live vectors
+        if len(draft.chunks):
+            self._promote(draft, index_type_of(draft.base))
             return
 
-        texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embedder.embed(texts)
-        embeddings = np.array(embeddings).astype("float32")
+        draft.base = self._new_index()
+        draft.delta = None
+        draft.excluded = set()
+        draft.added_ids, draft.added_vectors = [], []
 
-        self._normalize(embeddings)
-        self.index.add(embeddings)
\ No newline at end of file
+    # ---------------- persistence ----------------
+
+    def save(self, storage_dir: str):
+        # Append the changes since the last save as a new segment
+        if self.read_only:
+            raise RuntimeError("Store was loaded read-only")
+
+        with self._write_lock:
+            if self.segment_store is None or self.segment_store.root != storage_dir:
+                os.makedirs(storage_dir, exist_ok=True)
+                self.segment_store = SegmentStore(storage_dir)
+                self._checkpointed = None
+
+            snapshot = self._snapshot
+            ids = np.array(sorted(snapshot.vectors), dtype="int64")
+
+            if len(ids):
+                vectors = np.stack([snapshot.vectors[int(i)] for i in ids])
+            else:
+                vectors = np.empty((0, self.dimension), dtype="float32")
+
+            self.segment_store.commit(
+                ids=ids,
+                vectors=vectors,
+                chunks=[snapshot.chunks.pending[int(i)] for i in ids],
+                deleted_ids=np.array(self._pending_deletes, dtype="int64"),
+                next_id=snapshot.next_id,
+                documents=snapshot.documents.to_dict()
+            )
+
+            if self._pending_template is not None:
+                self.segment_store.write_index_template(self._pending_template)
+                self._pending_template = None
+
+            # Committed chunks are now served from the memory-mapped segments
+            chunks = snapshot.chunks.copy()
+            chunks.set_segments(self.segment_store.open_segments(), ids)
+
+            self._snapshot = StoreSnapshot(
+                snapshot.version, snapshot.base, snapshot.delta, snapshot.excluded,
+                chunks, {}, snapshot.documents, snapshot.next_id
+            )
+            self._pending_deletes = []
+            self._maybe_checkpoint()
+
+    def _maybe_checkpoint(self):
+        # Caller holds self._write_lock. The delta and later removals are
+        # recovered from the segments on load
+        base = self._snapshot.base
+
+        if (
+            self.segment_store is None or self.read_only
+            or base is self._checkpointed or base.ntotal == 0
+        ):
+            return
+
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            # A later save writes the newer base
+            return
+
+        self._checkpointed = base
+        self._checkpoint_thread = threading.Thread(
+            target=self.segment_store.write_index_checkpoint, args=(base,), daemon=True
+        )
+        self._checkpoint_thread.start()
+
+    def checkpoint(self):
+        # Writes the current base index unless already on disk, and waits
+        with self._write_lock:
+            if self._checkpoint_thread is not None:
+                self._checkpoint_thread.join()
+
+            self._maybe_checkpoint()
+
+        self.wait_for_background()
+
+    def wait_for_background(self):
+        # Checkpoint and compaction writers, e.g. before the directory goes away
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+
+        if self.segment_store is not None:
+            self.segment_store.wait_for_compaction()
+
+    def load(self, storage_dir: str, read_only: bool = False):
+        # read_only: for tools reading a directory the API may be writing to;
+        # no garbage collection, checkpoint or manifest write, and no saves
+        with self._write_lock:
+            self.read_only = read_only
+            draft = _Draft(self._empty_snapshot(self._snapshot.version))
+            self._pending_deletes = []
+
+            if SegmentStore.exists(storage_dir):
+                self._load_segments(draft, storage_dir)
+            else:
+                self._load_legacy(draft, storage_dir)
+
+            self._maybe_promote(draft)
+
+            lexical_index = BM25Index()
+            lexical_index.update(draft.lexical_added)
+            draft.lexical_added = []
+
+            self._publish(draft)
+            self.lexical_index = lexical_index
+            self._maybe_checkpoint()
+
+    def _load_segments(self, draft: _Draft, storage_dir: str):
+        self.segment_store = SegmentStore(storage_dir)
+        if not self.read_only:
+            self.segment_store.collect_garbage()
+
+        segments = self.segment_store.open_segments()
+        deleted = self.segment_store.deleted_ids()
+
+        checkpoint = self.segment_store.read_index_checkpoint()
+        in_base = None
+
+        if checkpoint is not None and self.index_config.accepts(checkpoint):
+            # Memory-mapped; vectors committed after it go to the delta
+            draft.base = checkpoint
+            in_base = stored_ids(checkpoint)
+        else:
+            template = self.segment_store.read_index_template()
+
+            if template is not None and self.index_config.is_target(template):
+                draft.base = without_ivf_id_map(template)
+
+        live_ids = [np.empty(0, dtype="int64")]
+
+        for segment in segments:
+            rows = segment.live_rows(deleted)
+            ids = np.asarray(segment.ids[rows])
+
+            if in_base is None:
+                draft.base.add_with_ids(np.ascontiguousarray(segment.vectors[rows]), ids)
+            else:
+                live_ids.append(ids)
+                new = ~np.isin(ids, in_base)
+
+                if new.any():
+                    draft.added_ids.append(ids[new])
+                    draft.added_vectors.append(np.ascontiguousarray(segment.vectors[rows[new]]))
+
+            # Postings are rebuilt from the segment texts rather than persisted
+            for row in rows:
+                draft.lexical_added.append((int(segment.ids[row]), segment.text(row)))
+
+        if in_base is not None:
+            # Removed since the checkpoint was written
+            draft.excluded.update(int(i) for i in np.setdiff1d(in_base, np.concatenate(live_ids)))
+            self._checkpointed = checkpoint
+
+        # Only the top-k rows returned by search are ever decoded
+        draft.chunks.open(segments, deleted)
+
+        if "documents" in self.segment_store.manifest:
+            draft.documents = DocumentRegistry.from_dict(self.segment_store.manifest["documents"])
+        else:
+            # Written before the registry; the next save persists it
+            draft.documents = DocumentRegistry.rebuild(
+                draft.chunks.document_ids(), draft.chunks.documents()
+            )
+
+        draft.next_id = self.segment_store.manifest["next_id"]
+
+    def _load_legacy(self, draft: _Draft, storage_dir: str):
+        # Everything is kept pending so the next save writes the first segment
+        index = faiss.read_index(os.path.join(storage_dir, LEGACY_INDEX_FILE))
+        chunks = list(np.load(
+            os.path.join(storage_dir, LEGACY_CHUNKS_FILE), allow_pickle=True
+        ))
+
+        if isinstance(index, faiss.IndexIDMap):
+            ids = faiss.vector_to_array(index.id_map)
+            index = faiss.downcast_index(index.index)
+        else:
+            # Index written before stable ids: vector positions are the ids
+            ids = np.arange(index.ntotal, dtype="int64")
+            for vector_id, chunk in zip(ids, chunks):
+                chunk["vector_id"] = int(vector_id)
+
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else []
+
+        if index.ntotal:
+            draft.base.add_with_ids(vectors, ids)
+
+        by_id = {chunk["vector_id"]: chunk for chunk in chunks}
+
+        draft.chunks.add([by_id[int(vector_id)] for vector_id in ids])
+        self._register(draft, ids, [by_id[int(vector_id)] for vector_id in ids], {})
+
+        for vector_id in ids:
+            draft.lexical_added.append((int(vector_id), by_id[int(vector_id)]["text"]))
+
+        for vector_id, vector in zip(ids, vectors):
+            draft.vectors[int(vector_id)] = vector
+
+        draft.next_id = int(ids.max()) + 1 if len(ids) else 0
+
+    def rebuild_index(self, chunks: List[dict], embedder=None):
+        # Re-embed the given chunks and replace the current contents in one swap.
+        # embedder: e.g. a BulkEmbedder for large corpora; the store's by default
+        embedder = embedder or self.embedder
+        embeddings = embedder.embed([chunk["text"] for chunk in chunks]) if chunks else None
+
+        with self._write_lock:
+            if not chunks:
+                self.remove(self.text_chunks.ids())
+                return
+
+            self.replace(self.text_chunks.ids(), embeddings, chunks)
@@ -0,0 +1,242 @@
+import math
+import faiss
+import numpy as np
+from typing import Optional
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# How vectors are stored inside the index: float32 (1536 B/vector at 384 dims),
+# fp16 (768 B), sq8 (384 B) or pq (pq_m bytes with 8-bit codes)
+ENCODINGS = ("float32", "fp16", "sq8", "pq")
+
+class IndexConfig:
+    # Starts on a flat index, promoted to index_type at promote_at vectors.
+    # Trained encodings (sq8, pq) also apply from promotion on
+
+    def __init__(
+        self,
+        index_type: str = "flat",
+        promote_at: int = 50000,
+        nlist: Optional[int] = None,
+        pq_m: int = 48,
+        pq_bits: int = 8,
+        hnsw_m: int = 32,
+        ef_construction: int = 80,
+        nprobe: int = 16,
+        ef_search: int = 64,
+        encoding: str = "float32",
+        rerank: int = 1
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported vector encoding: {encoding}")
+
+        self.index_type = index_type
+        self.promote_at = promote_at
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.encoding = "pq" if index_type == "ivf_pq" else encoding
+        self.rerank = max(1, rerank)
+
+    @property
+    def initial_encoding(self) -> str:
+        # What the untrained starting flat index can use
+        return self.encoding if not needs_training(self.encoding) else "float32"
+
+    def is_target(self, index: faiss.Index) -> bool:
+        return index_type_of(index) == self.index_type and encoding_of(index) == self.encoding
+
+    def accepts(self, index: faiss.Index) -> bool:
+        # The target index, or the flat one the store starts on
+        return self.is_target(index) or (
+            index_type_of(index) == "flat" and encoding_of(index) == self.initial_encoding
+        )
+
+    def nlist_for(self, n_vectors: int) -> int:
+        if self.nlist:
+            return self.nlist
+
+        # ~4 * sqrt(n) lists, with at least 39 training points per list
+        return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def index_type_of(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf = faiss.downcast_index(ivf)
+        return "ivf_pq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf_flat"
+
+    return "flat"
+
+
+def needs_training(encoding: str) -> bool:
+    return encoding in ("sq8", "pq")
+
+
+def encoding_of(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    else:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            index = faiss.downcast_index(ivf)
+
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+
+    return "float32"
+
+
+def _storage_factory(encoding: str, config: IndexConfig) -> str:
+    # index_factory suffix for the vector codes
+    return {
+        "float32": "Flat",
+        "fp16": "SQfp16",
+        "sq8": "SQ8",
+        "pq": f"PQ{config.pq_m}x{config.pq_bits}"
+    }[encoding]
+
+
+def build_index(index_type: str, dimension: int, config: IndexConfig, n_vectors: int = 0,
+                encoding: str = "float32"):
+    # Inner-product metric on L2-normalized vectors == cosine similarity
+    if index_type == "ivf_pq":
+        encoding = "pq"
+
+    storage = _storage_factory(encoding, config)
+
+    if index_type == "flat":
+        if encoding == "float32":
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            index = faiss.index_factory(dimension, storage, faiss.METRIC_INNER_PRODUCT)
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        index = faiss.index_factory(
+            dimension, f"IVF{config.nlist_for(n_vectors)},{storage}", faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "hnsw":
+        if encoding == "float32":
+            index = faiss.IndexHNSWFlat(dimension, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.index_factory(
+                dimension, f"HNSW{config.hnsw_m},{storage}", faiss.METRIC_INNER_PRODUCT
+            )
+        index.hnsw.efConstruction = config.ef_construction
+    else:
+        raise ValueError(f"Unsupported index type: {index_type}")
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        # Inverted lists store the ids themselves. Under an IndexIDMap,
+        # remove_ids compacts the id map but not the list ids, so a second
+        # removal drops the wrong vectors
+        return index
+
+    return faiss.IndexIDMap(index)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, max_training_points: int = 256):
+    if index.is_trained:
+        return
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    ivf = faiss.try_extract_index_ivf(inner)
+
+    if ivf is not None:
+        limit = ivf.nlist * max_training_points
+    elif encoding_of(index) == "pq":
+        # 256 centroids per sub-quantizer
+        limit = 256 * max_training_points
+    else:
+        limit = len(vectors)
+
+    if len(vectors) > limit:
+        rows = np.random.default_rng(0).choice(len(vectors), limit, replace=False)
+        vectors = vectors[np.sort(rows)]
+
+    index.train(np.ascontiguousarray(vectors, dtype="float32"))
+
+
+def without_ivf_id_map(index: faiss.Index) -> faiss.Index:
+    # Templates saved while IVF indexes were still wrapped in an IndexIDMap
+    if isinstance(index, faiss.IndexIDMap) and index.ntotal == 0:
+        inner = faiss.downcast_index(index.index)
+        if faiss.try_extract_index_ivf(inner) is not None:
+            # A copy: the wrapper owns the inner index
+            return faiss.clone_index(inner)
+
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    # HNSW graphs cannot drop nodes; removed ids are filtered at search time
+    return index_type_of(index) != "hnsw"
+
+
+def stored_ids(index: faiss.Index) -> np.ndarray:
+    # Ids of every vector in the index, in no particular order
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.vector_to_array(index.id_map)
+
+    invlists = faiss.extract_index_ivf(index).invlists
+    lists = [
+        faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i)).copy()
+        for i in range(invlists.nlist) if invlists.list_size(i)
+    ]
+
+    return np.concatenate(lists) if lists else np.empty(0, dtype="int64")
+
+
+def supports_selector(index: faiss.Index) -> bool:
+    # IndexPQ rejects search parameters, so it cannot skip ids at search time
+    return not (index_type_of(index) == "flat" and encoding_of(index) == "pq")
+
+
+def bytes_per_vector(index: faiss.Index) -> float:
+    # Code bytes per stored vector, excluding ids and graph/list overhead
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+    if isinstance(inner, faiss.IndexHNSW):
+        inner = faiss.downcast_index(inner.storage)
+
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        return float(ivf.code_size)
+
+    if hasattr(inner, "code_size"):
+        return float(inner.code_size)
+
+    return float(inner.d * 4)
+
+
+def search_params(index: faiss.Index, config: IndexConfig, selector=None):
+    # Runtime knobs for the index type, plus an optional id selector
+    index_type = index_type_of(index)
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(nprobe=config.nprobe, sel=selector)
+
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=config.ef_search, sel=selector)
+
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+
+    return None
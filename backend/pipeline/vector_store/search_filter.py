@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Chunk timestamps are stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+class SearchFilter:
+    # Matches whole documents (a chunk shares its document's filename and upload time)
+
+    def __init__(self, filenames: Optional[Iterable[str]] = None,
+                 uploaded_after: Optional[datetime] = None,
+                 uploaded_before: Optional[datetime] = None):
+        self.filenames = (
+            frozenset(name.strip().lower() for name in filenames) if filenames else None
+        )
+        self.uploaded_after = _naive_utc(uploaded_after)
+        self.uploaded_before = _naive_utc(uploaded_before)
+
+    def is_empty(self) -> bool:
+        return self.filenames is None and self.uploaded_after is None and self.uploaded_before is None
+
+    def key(self) -> tuple:
+        return (self.filenames, self.uploaded_after, self.uploaded_before)
+
+    def matches(self, filename: str, uploaded_at: str) -> bool:
+        if self.filenames is not None and filename.strip().lower() not in self.filenames:
+            return False
+
+        uploaded = datetime.fromisoformat(uploaded_at)
+
+        if self.uploaded_after is not None and uploaded < self.uploaded_after:
+            return False
+
+        if self.uploaded_before is not None and uploaded > self.uploaded_before:
+            return False
+
+        return True
@@ -0,0 +1,347 @@
+import json
+import os
+import shutil
+import threading
+import faiss
+import numpy as np
+from typing import Dict, List, Optional
+from pipeline.vector_store.chunk_store import ColumnarSegment, _save_array
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: garbage collection is skipped there
+    fcntl = None
+
+MANIFEST_FILE = "MANIFEST.json"
+WRITER_LOCK_FILE = ".writer.lock"
+
+def _fsync_dir(path: str):
+    # Make renames inside the directory durable (no-op where unsupported)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SegmentStore:
+    # Append-only: a commit writes a segment and a tombstone file, then switches
+    # the manifest to them. Files the manifest does not name are never read
+
+    def __init__(self, root: str, max_segments: int = 8, max_tombstones: int = 8):
+        self.root = root
+        self.segments_dir = os.path.join(root, "segments")
+        self.max_segments = max_segments
+        self.max_tombstones = max_tombstones
+
+        self._lock = threading.Lock()
+        self._compaction = None
+        # Memory-mapped segments, reused across open_segments() calls
+        self._open: Dict[str, ColumnarSegment] = {}
+        # Open while this store holds the directory's writer lock
+        self._writer_lock = None
+
+        self.manifest = self._read_manifest()
+
+    @staticmethod
+    def exists(root: str) -> bool:
+        return os.path.exists(os.path.join(root, MANIFEST_FILE))
+
+    # ---------------- manifest ----------------
+
+    def _read_manifest(self) -> dict:
+        path = os.path.join(self.root, MANIFEST_FILE)
+
+        if not os.path.exists(path):
+            return {
+                "generation": 0,
+                "sequence": 0,
+                "next_id": 0,
+                "segments": [],
+                "tombstones": []
+            }
+
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict):
+        # Caller holds self._lock
+        manifest["generation"] += 1
+
+        path = os.path.join(self.root, MANIFEST_FILE)
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+        _fsync_dir(self.root)
+
+        self.manifest = manifest
+
+    def _copy_manifest(self) -> dict:
+        manifest = dict(self.manifest)
+        manifest["segments"] = list(manifest["segments"])
+        manifest["tombstones"] = list(manifest["tombstones"])
+        return manifest
+
+    def _allocate_name(self, prefix: str) -> str:
+        # Names are unique for the lifetime of the store directory
+        with self._lock:
+            self.manifest["sequence"] += 1
+            return f"{prefix}-{self.manifest['sequence']:08d}"
+
+    # ---------------- segment files ----------------
+
+    def _write_segment(self, ids: np.ndarray, vectors: np.ndarray, chunks: List[dict]) -> str:
+        name = self._allocate_name("seg")
+        final_path = os.path.join(self.segments_dir, name)
+        tmp_path = final_path + ".tmp"
+
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        ColumnarSegment.write(tmp_path, ids, vectors, chunks)
+
+        # A leftover directory under this name is never referenced by the manifest
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.replace(tmp_path, final_path)
+        _fsync_dir(self.segments_dir)
+
+        return name
+
+    def _write_tombstones(self, ids: np.ndarray) -> str:
+        name = self._allocate_name("del") + ".npy"
+        path = os.path.join(self.segments_dir, name)
+
+        _save_array(path + ".tmp", ids.astype("int64"))
+        os.replace(path + ".tmp", path)
+        _fsync_dir(self.segments_dir)
+
+        return name
+
+    def _open_segment(self, name: str) -> ColumnarSegment:
+        if name not in self._open:
+            self._open[name] = ColumnarSegment(os.path.join(self.segments_dir, name))
+
+        return self._open[name]
+
+    def _read_tombstones(self, names: List[str]) -> np.ndarray:
+        if not names:
+            return np.empty(0, dtype="int64")
+
+        return np.concatenate([
+            np.load(os.path.join(self.segments_dir, name)) for name in names
+        ])
+
+    def _remove_files(self, segments: List[str], tombstones: List[str]):
+        for name in segments:
+            shutil.rmtree(os.path.join(self.segments_dir, name), ignore_errors=True)
+
+        for name in tombstones:
+            try:
+                os.remove(os.path.join(self.segments_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def acquire_writer_lock(self) -> bool:
+        # Non-blocking; held until the process exits. False when another
+        # store (in this or another process) already holds it
+        if self._writer_lock is not None:
+            return True
+
+        if fcntl is None or not os.path.isdir(self.root):
+            return False
+
+        lock_file = open(os.path.join(self.root, WRITER_LOCK_FILE), "a")
+
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._writer_lock = lock_file
+        return True
+
+    def collect_garbage(self):
+        # Drop files left behind by interrupted commits or compactions. Only
+        # the writer may: in another process's copy of the manifest, the
+        # files of a commit in progress look orphaned
+        if not os.path.isdir(self.segments_dir) or not self.acquire_writer_lock():
+            return
+
+        with self._lock:
+            live = set(self.manifest["segments"]) | set(self.manifest["tombstones"])
+            live.add(self.manifest.get("index_template"))
+            live.add(self.manifest.get("index_checkpoint"))
+
+        orphans = [name for name in os.listdir(self.segments_dir) if name not in live]
+
+        self._remove_files(
+            [name for name in orphans if os.path.isdir(os.path.join(self.segments_dir, name))],
+            [name for name in orphans if not os.path.isdir(os.path.join(self.segments_dir, name))]
+        )
+
+    # ---------------- public API ----------------
+
+    def _write_index(self, key: str, prefix: str, index: faiss.Index):
+        # Written aside, then switched in the manifest like a segment
+        os.makedirs(self.segments_dir, exist_ok=True)
+
+        name = self._allocate_name(prefix) + ".faiss"
+        path = os.path.join(self.segments_dir, name)
+
+        faiss.write_index(index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+        with self._lock:
+            manifest = self._copy_manifest()
+            previous = manifest.get(key)
+            manifest[key] = name
+            self._write_manifest(manifest)
+
+        if previous:
+            self._remove_files([], [previous])
+
+    def _read_index(self, key: str, flags: int = 0):
+        name = self.manifest.get(key)
+
+        if not name:
+            return None
+
+        return faiss.read_index(os.path.join(self.segments_dir, name), flags)
+
+    def write_index_template(self, index: faiss.Index):
+        # A trained but empty index, so loads can skip (re)training
+        self._write_index("index_template", "index", index)
+
+    def read_index_template(self):
+        return self._read_index("index_template")
+
+    def write_index_checkpoint(self, index: faiss.Index):
+        # The populated index, so loads can skip re-adding every vector
+        self._write_index("index_checkpoint", "base", index)
+
+    def read_index_checkpoint(self):
+        # Memory-mapped (flat codes, HNSW storage); must not be modified in place
+        return self._read_index("index_checkpoint", faiss.IO_FLAG_MMAP_IFC)
+
+    def open_segments(self) -> List[ColumnarSegment]:
+        # Live segments in id order, memory-mapped
+        with self._lock:
+            names = list(self.manifest["segments"])
+
+        segments = [self._open_segment(name) for name in names]
+
+        for name in list(self._open):
+            if name not in names:
+                del self._open[name]
+
+        return segments
+
+    def deleted_ids(self) -> np.ndarray:
+        with self._lock:
+            names = list(self.manifest["tombstones"])
+
+        return self._read_tombstones(names)
+
+    def commit(self, ids: np.ndarray, vectors: np.ndarray, chunks: List[dict],
+               deleted_ids: np.ndarray, next_id: int, documents: Optional[dict] = None):
+        # I/O is proportional to the change, never to the corpus
+        os.makedirs(self.segments_dir, exist_ok=True)
+        # Taken by the first committing store, so no other store's garbage
+        # collection removes this one's unfinished files
+        self.acquire_writer_lock()
+
+        segment = self._write_segment(ids, vectors, chunks) if len(ids) else None
+        tombstone = self._write_tombstones(deleted_ids) if len(deleted_ids) else None
+
+        with self._lock:
+            manifest = self._copy_manifest()
+
+            if segment:
+                manifest["segments"].append(segment)
+            if tombstone:
+                manifest["tombstones"].append(tombstone)
+
+            manifest["next_id"] = next_id
+
+            # The document registry switches in the same manifest write
+            if documents is not None:
+                manifest["documents"] = documents
+
+            self._write_manifest(manifest)
+
+        self.maybe_compact()
+
+    def maybe_compact(self):
+        with self._lock:
+            needs_compaction = (
+                len(self.manifest["segments"]) > self.max_segments
+                or len(self.manifest["tombstones"]) > self.max_tombstones
+            )
+            running = self._compaction is not None and self._compaction.is_alive()
+
+            if not needs_compaction or running:
+                return
+
+            self._compaction = threading.Thread(target=self.compact, daemon=True)
+            self._compaction.start()
+
+    def wait_for_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+
+    def compact(self):
+        # Merge the segments visible now into one, applying their tombstones
+        with self._lock:
+            snapshot = self._copy_manifest()
+
+        if len(snapshot["segments"]) <= 1 and not snapshot["tombstones"]:
+            return
+
+        deleted = self._read_tombstones(snapshot["tombstones"])
+
+        merged_ids, merged_vectors, merged_chunks = [], [], []
+
+        for name in snapshot["segments"]:
+            # Opened directly: the cache belongs to the foreground thread
+            segment = ColumnarSegment(os.path.join(self.segments_dir, name))
+            keep = segment.live_rows(deleted)
+
+            merged_ids.append(segment.ids[keep])
+            merged_vectors.append(segment.vectors[keep])
+            merged_chunks.extend(segment.chunk(row) for row in keep)
+
+        merged = None
+        if merged_chunks:
+            merged = self._write_segment(
+                np.concatenate(merged_ids),
+                np.concatenate(merged_vectors),
+                merged_chunks
+            )
+
+        with self._lock:
+            manifest = self._copy_manifest()
+
+            # Segments and tombstones committed during compaction are kept
+            manifest["segments"] = ([merged] if merged else []) + [
+                name for name in manifest["segments"]
+                if name not in snapshot["segments"]
+            ]
+            manifest["tombstones"] = [
+                name for name in manifest["tombstones"]
+                if name not in snapshot["tombstones"]
+            ]
+
+            self._write_manifest(manifest)
+
+        self._remove_files(snapshot["segments"], snapshot["tombstones"])
@@ -0,0 +1,34 @@
+from pipeline.vector_store.bm25_index import BM25Index
+
+
+def test_update_removes_then_adds():
+    index = BM25Index(delta_limit=4)
+    index.update([(0, "solar panel warranty"), (1, "wind turbine warranty"), (2, "panel mounting")])
+
+    assert [vector_id for vector_id, _ in index.search("warranty")] == [0, 1]
+
+    index.update([(3, "extended warranty terms")], removed=[0])
+
+    assert len(index) == 3
+    assert {vector_id for vector_id, _ in index.search("warranty")} == {1, 3}
+    assert [vector_id for vector_id, _ in index.search("panel")] == [2]
+
+
+def test_published_postings_are_not_modified():
+    index = BM25Index(delta_limit=2)
+    index.update((i, f"term{i % 3} shared") for i in range(10))
+
+    # What a search in progress holds
+    published = index._postings
+    lengths = published.lengths.copy()
+    parts = {term: [ids.copy() for ids, _ in published.parts(term)] for term in ("term0", "shared")}
+
+    for i in range(10, 40):
+        index.update([(i, "shared term0")], removed=[i - 10])
+
+    assert (published.lengths == lengths).all()
+    for term, copies in parts.items():
+        assert all((ids == copy).all() for (ids, _), copy in zip(published.parts(term), copies))
+
+    assert len(index) == 10
+    assert {vector_id for vector_id, _ in index.search("term0", top_k=100)} == set(range(30, 40))
@@ -0,0 +1,54 @@
+import faiss
+import numpy as np
+from pipeline.vector_store.collections import DEFAULT_COLLECTION, CollectionManager
+from pipeline.vector_store.faiss_store import LEGACY_CHUNKS_FILE, LEGACY_INDEX_FILE, FAISSStore
+
+DIMENSION = 8
+
+
+def open_store(path: str) -> FAISSStore:
+    store = FAISSStore(DIMENSION, None)
+    if FAISSStore.exists(path):
+        store.load(path)
+    return store
+
+
+def test_counts_of_an_unloaded_legacy_default_store(tmp_path):
+    # faiss.index + chunks.npy, as written before segment persistence
+    vectors = np.random.default_rng(0).standard_normal((6, DIMENSION)).astype("float32")
+    index = faiss.IndexFlatIP(DIMENSION)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / LEGACY_INDEX_FILE))
+
+    chunks = [
+        {"text": f"chunk {i}", "filename": f"doc{i % 2}.pdf", "uploaded_at": "2024-01-01T00:00:00", "chunk_id": i}
+        for i in range(6)
+    ]
+    np.save(str(tmp_path / LEGACY_CHUNKS_FILE), np.array(chunks, dtype=object))
+
+    collections = CollectionManager(str(tmp_path), open_store, lambda store: None)
+
+    assert collections.document_count(DEFAULT_COLLECTION) == 2
+    assert collections.chunk_count(DEFAULT_COLLECTION) == 6
+
+
+def test_counts_of_an_unloaded_collection(tmp_path):
+    collections = CollectionManager(str(tmp_path), open_store, lambda store: None, max_loaded=1)
+    collections.create("reports")
+    assert collections.chunk_count("reports") == 0
+
+    with collections.use("reports") as collection:
+        chunks = [
+            {"text": f"chunk {i}", "filename": "q1.pdf", "uploaded_at": "2024-01-01T00:00:00", "chunk_id": i}
+            for i in range(3)
+        ]
+        collection.store.add(np.ones((3, DIMENSION), dtype="float32"), chunks)
+        collection.store.save(collection.path)
+
+    # Evicted by loading the default collection; counted from the manifest
+    with collections.use(DEFAULT_COLLECTION):
+        pass
+
+    assert "reports" not in collections.loaded_stores()
+    assert collections.document_count("reports") == 1
+    assert collections.chunk_count("reports") == 3
@@ -0,0 +1,15 @@
+import pytest
+from pipeline.evaluation.concurrency_stress import run_stress
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_concurrent_reads_see_whole_writes(tmp_path, index_type):
+    # Small and short, but still promotes, merges, compacts and checkpoints
+    report = run_stress(
+        str(tmp_path), seconds=2, writers=2, readers=3, documents=20, max_parts=20,
+        dimension=32, index_type=index_type, promote_at=150, delta_limit=64
+    )
+
+    assert report["violations"] == []
+    assert report["counts"]["uploads"] > 0
+    assert report["counts"]["searches"] > 0
@@ -0,0 +1,34 @@
+import numpy as np
+from pipeline.embeddings.embedding_cache import EmbeddingCache
+
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(8).astype("float32")
+
+
+def test_get_many_with_repeated_keys(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), "model")
+    keys = [cache.key(f"text {i}") for i in range(3)]
+    cache.put_many({keys[0]: vector(0), keys[1]: vector(1)})
+
+    found = cache.get_many(keys + keys)
+
+    assert set(found) == set(keys[:2])
+    np.testing.assert_array_equal(found[keys[1]], vector(1))
+    assert (cache.hits, cache.misses) == (4, 2)
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(path, "model", max_entries=2, memory_entries=0)
+    old, other, new = (cache.key(text) for text in ("old", "other", "new"))
+
+    cache.put_many({old: vector(0)})
+    cache.put_many({other: vector(1)})
+    # Read from SQLite; its last use is only written when eviction needs it
+    assert old in cache.get_many([old])
+
+    cache.put_many({new: vector(2)})
+
+    reopened = EmbeddingCache(path, "model")
+    assert set(reopened.get_many([old, other, new])) == {old, new}
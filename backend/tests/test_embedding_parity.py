@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from pipeline.evaluation.embedding_benchmark import MAX_DRIFT, cosine_drift, sample_texts
+
+
+def test_cosine_drift_ignores_scale():
+    rng = np.random.default_rng(0)
+    reference = rng.standard_normal((4, 8)).astype("float32")
+
+    assert cosine_drift(reference * 3, reference)["max_drift"] == pytest.approx(0, abs=1e-6)
+    assert cosine_drift(-reference, reference)["mean_drift"] == pytest.approx(2, abs=1e-6)
+
+
+@pytest.fixture(scope="module")
+def reference(tmp_path_factory):
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    from pipeline.embeddings.embedder import Embedder
+
+    texts = sample_texts(32)
+    embedder = Embedder(backend="torch")
+    try:
+        embedder.load()
+    except OSError as e:  # the model is not cached and cannot be downloaded
+        pytest.skip(str(e))
+
+    return texts, embedder.embed(texts), str(tmp_path_factory.mktemp("models"))
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx_int8"])
+def test_onnx_backends_match_torch(reference, backend):
+    from pipeline.embeddings.embedder import Embedder
+
+    texts, vectors, model_dir = reference
+    embedder = Embedder(backend=backend, model_dir=model_dir)
+
+    assert cosine_drift(embedder.embed(texts), vectors)["max_drift"] <= MAX_DRIFT
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from pipeline.vector_store.faiss_store import FAISSStore
+from pipeline.vector_store.index_factory import ENCODINGS, INDEX_TYPES, IndexConfig
+
+DIMENSION = 16
+PROMOTE_AT = 400
+
+
+def make_chunks(start: int, count: int, per_document: int = 50):
+    return [
+        {
+            "text": f"chunk {i}",
+            "filename": f"doc{i // per_document}.txt",
+            "uploaded_at": "2024-01-01T00:00:00",
+            "chunk_id": i % per_document
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def make_store(index_type: str, encoding: str = "float32") -> FAISSStore:
+    config = IndexConfig(index_type, promote_at=PROMOTE_AT, encoding=encoding, pq_m=4, pq_bits=4)
+    return FAISSStore(DIMENSION, None, config, delta_limit=64)
+
+
+def add(store: FAISSStore, rng, start: int, count: int):
+    store.add(rng.standard_normal((count, DIMENSION)).astype("float32"), make_chunks(start, count))
+
+
+def checkpointed_store(tmp_path, index_type: str, encoding: str = "float32") -> FAISSStore:
+    # Promoted, saved with its index checkpoint, and loaded back
+    rng = np.random.default_rng(0)
+    store = make_store(index_type, encoding)
+    add(store, rng, 0, PROMOTE_AT)
+    store.save(str(tmp_path))
+    store.checkpoint()
+
+    reloaded = make_store(index_type, encoding)
+    reloaded.load(str(tmp_path))
+    return reloaded
+
+
+def live_ids(store: FAISSStore, rng, top_k: int = 1000) -> set:
+    query = rng.standard_normal((1, DIMENSION)).astype("float32")
+    return {result["id"] for result in store.search(query, top_k=top_k)}
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_merge_after_reload(tmp_path, index_type):
+    store = checkpointed_store(tmp_path, index_type)
+    assert store.index.ntotal == PROMOTE_AT
+
+    # Past the delta limit: merged into a copy of the memory-mapped checkpoint
+    add(store, np.random.default_rng(1), PROMOTE_AT, 200)
+    assert store.snapshot.delta is None
+    assert store.index.ntotal == PROMOTE_AT + 200
+
+    store.remove(store.ids_for_filename("doc0.txt"))
+    store.save(str(tmp_path))
+    store.wait_for_background()
+
+    assert len(store.text_chunks) == PROMOTE_AT + 150
+    if index_type == "flat":
+        # Exact search returns every live id and nothing removed
+        assert live_ids(store, np.random.default_rng(2)) == set(range(50, PROMOTE_AT + 200))
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_delete_after_reload(tmp_path, index_type, encoding):
+    if index_type == "ivf_pq" and encoding != "pq":
+        pytest.skip("ivf_pq always stores PQ codes")
+
+    store = checkpointed_store(tmp_path, index_type, encoding)
+    # Past the delta limit, so indexes that support it drop the ids in a merge
+    removed = set(store.ids_for_filename("doc0.txt")) | set(store.ids_for_filename("doc1.txt"))
+
+    assert store.remove(removed) == len(removed)
+    assert not live_ids(store, np.random.default_rng(1)) & removed
+
+    store.save(str(tmp_path))
+    store.wait_for_background()
+
+    reloaded = make_store(index_type, encoding)
+    reloaded.load(str(tmp_path))
+
+    assert len(reloaded.text_chunks) == PROMOTE_AT - len(removed)
+    assert not live_ids(reloaded, np.random.default_rng(1)) & removed
+
+
+def test_hnsw_rebuilt_once_removals_pass_the_limit(tmp_path):
+    store = checkpointed_store(tmp_path, "hnsw")
+
+    store.remove(store.ids_for_filename("doc0.txt"))
+    # Below the limit: hidden at search time only
+    assert store.index.ntotal == PROMOTE_AT
+    assert len(store.snapshot.excluded) == 50
+
+    store.remove(store.ids_for_filename("doc1.txt"))
+    assert store.index.ntotal == PROMOTE_AT - 100
+    assert not store.snapshot.excluded
+
+    store.save(str(tmp_path))
+    store.wait_for_background()
+
+    reloaded = make_store("hnsw")
+    reloaded.load(str(tmp_path))
+    assert reloaded.index.ntotal == PROMOTE_AT - 100
+    assert not reloaded.snapshot.excluded
+
+    # Removing everything leaves an empty index
+    reloaded.remove(reloaded.text_chunks.ids())
+    assert reloaded.index.ntotal == 0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from pipeline.chunking.recursive_chunker import RecursiveChunker
+
+# Includes a run longer than any chunk, which has to be cut between tokens
+WORDS = ["refund", "policy", "annual", "report", "FAISS", "index", "e.g.", "déjà", "42", "x" * 300]
+
+
+def make_document(seed: int, paragraphs: int = 40) -> str:
+    rng = np.random.default_rng(seed)
+    parts = []
+
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(int(rng.integers(1, 8))):
+            words = rng.choice(WORDS, size=int(rng.integers(1, 60)))
+            sentences.append(" ".join(words) + str(rng.choice([".", "!", "?", ";"])))
+        parts.append(str(rng.choice([" ", "\n"])).join(sentences))
+
+    return "\n\n".join(parts)
+
+
+def split_randomly(text: str, seed: int):
+    rng = np.random.default_rng(seed)
+    cuts = sorted(int(i) for i in rng.choice(len(text), size=20, replace=False))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(128, 16), (32, 8), (8, 0)])
+@pytest.mark.parametrize("seed", range(3))
+def test_chunks_stay_within_size_and_offsets(seed, chunk_size, overlap):
+    chunker = RecursiveChunker(chunk_size=chunk_size, overlap=overlap)
+    document = make_document(seed)
+
+    chunks = list(chunker.chunk_spans([document]))
+    covered = np.zeros(len(document), dtype=bool)
+
+    for chunk in chunks:
+        assert chunk.text and chunk.text == chunk.text.strip()
+        assert document[chunk.start:chunk.end] == chunk.text
+        assert chunk.tokens == chunker.count_tokens(chunk.text) <= chunk_size
+        covered[chunk.start:chunk.end] = True
+
+    assert [c.start for c in chunks] == sorted(c.start for c in chunks)
+    # Only whitespace is left out
+    assert all(covered[i] or char.isspace() for i, char in enumerate(document))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streamed_segments_chunk_like_the_whole_text(seed):
+    chunker = RecursiveChunker(chunk_size=32, overlap=8)
+    document = make_document(seed)
+
+    assert list(chunker.chunk_spans(split_randomly(document, seed))) == list(chunker.chunk_spans([document]))
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        RecursiveChunker(chunk_size=16, overlap=16)
@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
 import os
+import time
+import json
 
 def get_api_url():
     if os.getenv("RENDER") == "true":
@@ -47,6 +49,23 @@ else:
         ["Upload", "Ask Question", "Documents", "Metrics"]
     )
 
+    # Every page works on one collection; questions may span several
+    collections_response = requests.get(f"{API_URL}/collections", headers=headers)
+    collection_names = (
+        [c["name"] for c in collections_response.json()]
+        if collections_response.status_code == 200 else ["default"]
+    )
+    collection = st.sidebar.selectbox("Collection", collection_names)
+
+    with st.sidebar.expander("New collection"):
+        new_collection = st.text_input("Name")
+        if st.button("Create") and new_collection:
+            created = requests.post(f"{API_URL}/collections/{new_collection}", headers=headers)
+            if created.status_code == 201:
+                st.rerun()
+            else:
+                st.error(created.json().get("detail", created.text))
+
     # -------- Upload --------
     if page == "Upload":
         st.subheader("Upload Document")
@@ -57,11 +76,32 @@ else:
             response = requests.post(
                 f"{API_URL}/upload",
                 headers=headers,
+                params={"collection": collection},
                 files=files
             )
 
-            if response.status_code == 200:
-                st.success("Document uploaded successfully")
+            if response.status_code == 200 and response.json().get("status") == "duplicate":
+                st.info(f"Identical content is already indexed as {response.json()['duplicate_of']}")
+            elif response.status_code in (200, 202):
+                job = response.json()
+                progress = st.progress(0.0, text="Queued")
+
+                # Parsing and embedding run in the background; poll the job
+                while job["state"] not in ("completed", "failed"):
+                    time.sleep(1)
+                    job = requests.get(
+                        f"{API_URL}/jobs/{job['job_id']}",
+                        headers=headers
+                    ).json()
+                    progress.progress(job["progress"], text=job["state"].capitalize())
+
+                if job["state"] == "completed":
+                    st.success(
+                        f"Document indexed successfully ({job['chunks']} chunks, "
+                        f"{job['chunks_reused']} reused from the previous version)"
+                    )
+                else:
+                    st.error(job["error"])
             else:
                 st.error(response.text)
 
@@ -70,15 +110,65 @@ else:
         st.subheader("Ask a Question")
         question = st.text_input("Enter your question")
 
+        collections = st.multiselect("Search collections", collection_names, default=[collection])
+
+        documents = requests.get(
+            f"{API_URL}/documents", headers=headers, params={"collection": collection}
+        )
+        filenames = st.multiselect(
+            "Limit to documents (optional)",
+            [doc["filename"] for doc in documents.json()] if documents.status_code == 200 else []
+        )
+
         if st.button("Submit"):
             response = requests.post(
-                f"{API_URL}/query",
+                f"{API_URL}/query/stream",
                 headers=headers,
-                json={"question": question}
+                json={
+                    "question": question,
+                    "collections": collections or None,
+                    "filenames": filenames or None
+                },
+                stream=True
             )
 
             if response.status_code == 200:
-                st.write(response.json())
+                sources = []
+                usage = {}
+
+                def tokens():
+                    # Read the server-sent events and render tokens as they arrive
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data: "):
+                            continue
+
+                        event = json.loads(line[len("data: "):])
+
+                        if event["type"] == "sources":
+                            sources.extend(event["sources"])
+                        elif event["type"] == "token":
+                            yield event["token"]
+                        elif event["type"] == "done":
+                            usage.update(event.get("usage") or {})
+                        elif event["type"] == "error":
+                            st.error(event["detail"])
+
+                st.write_stream(tokens())
+
+                if sources:
+                    st.caption("Sources")
+                    for source in sources:
+                        chunks = source.get("chunk_ids") or [source["chunk_id"]]
+                        st.caption(
+                            f"{source['collection']} / {source['filename']} "
+                            f"(chunks {', '.join(map(str, chunks))}, score {source['score']:.3f})"
+                        )
+
+                if "prompt_tokens" in usage:
+                    st.caption(
+                        f"{usage['prompt_tokens']} prompt tokens, "
+                        f"{usage['passages']} passages, generated in {usage['generation_ms']:.0f} ms"
+                    )
             else:
                 st.error(response.text)
                 
@@ -88,7 +178,8 @@ else:
 
         response = requests.get(
             f"{API_URL}/documents",
-            headers=headers
+            headers=headers,
+            params={"collection": collection}
         )
 
         if response.status_code == 200:
@@ -99,7 +190,8 @@ else:
                 if col2.button("Delete", key=doc["filename"]):
                     del_res = requests.delete(
                         f"{API_URL}/documents/{doc['filename']}",
-                        headers=headers
+                        headers=headers,
+                        params={"collection": collection}
                     )
                     if del_res.status_code == 200:
                         st.success("Deleted")